@@ -173,3 +173,7 @@ class BuildNotFoundException(AppManagerException):
 
 class BuildConflictException(Exception):
     pass
+
+
+class BuildWorkerError(AppManagerException):
+    pass
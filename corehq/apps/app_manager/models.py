@@ -8,11 +8,12 @@ import os
 import random
 import re
 import types
+import time
 import uuid
 from collections import Counter, OrderedDict, defaultdict, namedtuple
 from copy import deepcopy
 from distutils.version import LooseVersion
-from functools import wraps
+from functools import partial, wraps
 from io import BytesIO, open
 from itertools import chain
 from mimetypes import guess_type
@@ -113,6 +114,10 @@ from corehq.apps.app_manager.helpers.validators import (
     ShadowFormValidator,
     ShadowModuleValidator,
 )
+from corehq.apps.app_manager.parallel_build import (
+    MIN_PARALLEL_BUILD_FILES,
+    generate_build_files,
+)
 from corehq.apps.app_manager.suite_xml import xml_models as suite_models
 from corehq.apps.app_manager.suite_xml.generator import (
     MediaSuiteGenerator,
@@ -175,6 +180,8 @@ from corehq.apps.users.dbaccessors.couch_users import (
     get_display_name_for_user_id,
 )
 from corehq.apps.users.util import cc_user_domain
+from corehq.blobs import get_blob_db
+from corehq.blobs.exceptions import NotFound
 from corehq.blobs.mixin import CODES, BlobMixin
 from corehq.const import USER_DATE_FORMAT, USER_TIME_FORMAT
 from corehq.util import bitly, view_utils
@@ -3813,7 +3820,7 @@ class LazyBlobDoc(BlobMixin):
                 for name, info in self._LAZY_ATTACHMENTS.items():
                     if not info['content_type']:
                         info['content_type'] = ';'.join(filter(None, guess_type(name)))
-                    super(LazyBlobDoc, self).put_attachment(name=name, **info)
+                super(LazyBlobDoc, self).put_attachments(self._LAZY_ATTACHMENTS)
             # super_save() has succeeded by now
             for name, info in self._LAZY_ATTACHMENTS.items():
                 self.__set_cached_attachment(name, info['content'])
@@ -3891,6 +3898,8 @@ class ApplicationBase(LazyBlobDoc, SnapshotMixin,
     last_released = DateTimeProperty(required=False)
     build_broken = BooleanProperty(default=False)
     is_auto_generated = BooleanProperty(default=False)
+    # seconds taken to generate each build file
+    build_file_timings = DictProperty()
     # not used yet, but nice for tagging/debugging
     # currently only canonical value is 'incomplete-build',
     # for when build resources aren't found where they should be
@@ -4710,20 +4719,31 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
         def _hash(val):
             return hashlib.md5(val).hexdigest()
 
+        # rendered form files of the forms that did not change since the
+        # last build, by filename, to be reused by _get_form_files
+        self._unchanged_form_files = {}
+        self._unchanged_forms_build = None
         latest_build = self._get_version_comparison_build()
         if not latest_build:
             return
         force_new_version = self.build_profiles != latest_build.build_profiles
-        for form_stuff in self.get_forms(bare=False):
+        form_stuffs = list(self.get_forms(bare=False))
+        if not force_new_version:
+            # take the previous version's compiled forms as-is
+            # (generation code may have changed since last build)
+            previous_sources = latest_build._fetch_files([
+                'files/%s' % self.get_form_filename(**form_stuff)
+                for form_stuff in form_stuffs
+            ])
+            self._unchanged_forms_build = latest_build
+        for form_stuff in form_stuffs:
             filename = 'files/%s' % self.get_form_filename(**form_stuff)
             form = form_stuff["form"]
             if not force_new_version:
                 try:
                     previous_form = latest_build.get_form(form.unique_id)
-                    # take the previous version's compiled form as-is
-                    # (generation code may have changed since last build)
-                    previous_source = latest_build.fetch_attachment(filename)
-                except (ResourceNotFound, FormNotFoundException):
+                    previous_source = previous_sources[filename]
+                except (KeyError, FormNotFoundException):
                     form.version = None
                 else:
                     previous_hash = _hash(previous_source)
@@ -4735,9 +4755,60 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
                     my_hash = _hash(self.fetch_xform(form=form))
                     if previous_hash != my_hash:
                         form.version = None
+                    else:
+                        self._unchanged_form_files[filename[len('files/'):]] = previous_source
             else:
                 form.version = None
 
+    def _get_unchanged_form_files(self, prefix):
+        """
+        Get the files of the forms found unchanged by set_form_versions.
+
+        A form that renders the same as in the previous build (with the same
+        build profiles) renders the same for each build profile too, so its
+        files are taken from the previous build instead of rendering them again.
+
+        :returns: dict of filename -> rendered form
+        """
+        unchanged_files = getattr(self, '_unchanged_form_files', {})
+        if not prefix or not unchanged_files:
+            return dict(unchanged_files)
+        previous_files = self._unchanged_forms_build._fetch_files([
+            'files/%s%s' % (prefix, filename) for filename in unchanged_files
+        ])
+        return {
+            filename[len('files/'):]: source
+            for filename, source in previous_files.items()
+        }
+
+    def _fetch_files(self, names):
+        """
+        Fetch many attachments at once, skipping the ones that do not exist
+
+        :returns: dict of name -> attachment content
+        """
+        keys = {
+            name: self.external_blobs[name].key
+            for name in names if name in self.external_blobs
+        }
+        try:
+            blobs = get_blob_db().get_many(list(keys.values()))
+        except NotFound:
+            blobs = None
+        if blobs is None:
+            files = {}
+            for name in keys:
+                try:
+                    files[name] = self.fetch_attachment(name)
+                except ResourceNotFound:
+                    pass
+            return files
+        files = {}
+        for name, blob in zip(keys, blobs):
+            with blob:
+                files[name] = blob.read()
+        return files
+
     def set_media_versions(self):
         """
         Set the media version numbers for all media in the app to the current app version
@@ -4956,81 +5027,157 @@ class Application(ApplicationBase, TranslationMixin, ApplicationMediaMixin,
     def get_form_filename(cls, type=None, form=None, module=None):
         return 'modules-%s/forms-%s.xml' % (module.id, form.id)
 
-    @time_method()
-    def _make_language_files(self, prefix, build_profile_id):
-        return {
-            "{}{}/app_strings.txt".format(prefix, lang): self.create_app_strings(lang, build_profile_id).encode('utf-8')
-            for lang in ['default'] + self.get_build_langs(build_profile_id)
+    def _get_build_file_generators(self, build_profile_id=None):
+        """
+        :returns: dict of filename -> function generating the file, in the
+        order the files are generated in. Functions return None for files
+        that are not needed.
+        """
+        prefix = '' if not build_profile_id else build_profile_id + '/'
+        generators = {
+            '{}profile.xml'.format(prefix): partial(self.create_profile, is_odk=False,
+                                                    build_profile_id=build_profile_id),
+            '{}profile.ccpr'.format(prefix): partial(self.create_profile, is_odk=True,
+                                                     build_profile_id=build_profile_id),
+            '{}media_profile.xml'.format(prefix):
+                partial(self.create_profile, is_odk=False, with_media=True, build_profile_id=build_profile_id),
+            '{}media_profile.ccpr'.format(prefix):
+                partial(self.create_profile, is_odk=True, with_media=True, build_profile_id=build_profile_id),
+            '{}suite.xml'.format(prefix): partial(self.create_suite, build_profile_id),
+            '{}media_suite.xml'.format(prefix): partial(self.create_media_suite, build_profile_id),
         }
+        if self.commcare_flavor:
+            for is_odk, extension in [(False, 'xml'), (True, 'ccpr')]:
+                generators['{}profile-{}.{}'.format(prefix, self.commcare_flavor, extension)] = partial(
+                    self.create_profile,
+                    is_odk=is_odk,
+                    build_profile_id=build_profile_id,
+                    commcare_flavor=self.commcare_flavor,
+                )
+            for is_odk, extension in [(False, 'xml'), (True, 'ccpr')]:
+                generators['{}media_profile-{}.{}'.format(prefix, self.commcare_flavor, extension)] = partial(
+                    self.create_profile,
+                    is_odk=is_odk,
+                    with_media=True,
+                    build_profile_id=build_profile_id,
+                    commcare_flavor=self.commcare_flavor,
+                )
 
-    @time_method()
-    def _get_form_files(self, prefix, build_profile_id):
-        files = {}
-        for form_stuff in self.get_forms(bare=False):
-            def exclude_form(form):
-                return isinstance(form, ShadowForm) or form.is_a_disabled_release_form()
+        generators['{}practice_user_restore.xml'.format(prefix)] = partial(
+            self.create_practice_user_restore, build_profile_id)
 
-            if not exclude_form(form_stuff['form']):
+        for lang in ['default'] + self.get_build_langs(build_profile_id):
+            generators["{}{}/app_strings.txt".format(prefix, lang)] = partial(
+                self._make_language_file, lang, build_profile_id)
+
+        for form_stuff in self.get_forms(bare=False):
+            form = form_stuff['form']
+            if not (isinstance(form, ShadowForm) or form.is_a_disabled_release_form()):
                 filename = prefix + self.get_form_filename(**form_stuff)
-                form = form_stuff['form']
-                try:
-                    files[filename] = self.fetch_xform(form=form, build_profile_id=build_profile_id)
-                except XFormValidationFailed:
-                    raise XFormException(_('Unable to validate the forms due to a server error. '
-                                           'Please try again later.'))
-                except XFormException as e:
-                    raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
-        return files
+                generators[filename] = partial(self._make_form_file, form, build_profile_id)
+        return generators
+
+    def _make_language_file(self, lang, build_profile_id):
+        return self.create_app_strings(lang, build_profile_id).encode('utf-8')
+
+    def _make_form_file(self, form, build_profile_id):
+        try:
+            return self.fetch_xform(form=form, build_profile_id=build_profile_id)
+        except XFormValidationFailed:
+            raise XFormException(_('Unable to validate the forms due to a server error. '
+                                   'Please try again later.'))
+        except XFormException as e:
+            raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+
+    @property
+    @memoized
+    def build_files_in_parallel(self):
+        return toggles.PARALLEL_APP_BUILD.enabled(self.domain)
 
     @time_method()
     @memoized
     def create_all_files(self, build_profile_id=None):
+        return self._create_all_files_for_profiles([build_profile_id])[build_profile_id]
+
+    def _create_all_files_for_profiles(self, build_profile_ids):
+        """
+        :returns: dict of build profile id -> dict of filename -> file content
+        """
         self.set_form_versions()
         self.set_media_versions()
-        prefix = '' if not build_profile_id else build_profile_id + '/'
-        files = {
-            '{}profile.xml'.format(prefix): self.create_profile(is_odk=False, build_profile_id=build_profile_id),
-            '{}profile.ccpr'.format(prefix): self.create_profile(is_odk=True, build_profile_id=build_profile_id),
-            '{}media_profile.xml'.format(prefix):
-                self.create_profile(is_odk=False, with_media=True, build_profile_id=build_profile_id),
-            '{}media_profile.ccpr'.format(prefix):
-                self.create_profile(is_odk=True, with_media=True, build_profile_id=build_profile_id),
-            '{}suite.xml'.format(prefix): self.create_suite(build_profile_id),
-            '{}media_suite.xml'.format(prefix): self.create_media_suite(build_profile_id),
-        }
-        if self.commcare_flavor:
-            files['{}profile-{}.xml'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=False,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
+        generators = {}
+        unchanged_files = {}
+        form_filenames = set()
+        to_generate = []
+        for build_profile_id in build_profile_ids:
+            prefix = '' if not build_profile_id else build_profile_id + '/'
+            generators[build_profile_id] = self._get_build_file_generators(build_profile_id)
+            form_filenames.update(
+                prefix + self.get_form_filename(**form_stuff) for form_stuff in self.get_forms(bare=False)
             )
-            files['{}profile-{}.ccpr'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
-            files['{}media_profile-{}.xml'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=False,
-                with_media=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
-            files['{}media_profile-{}.ccpr'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=True,
-                with_media=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
+            unchanged_files.update(self._get_unchanged_form_files(prefix))
+            to_generate.extend(
+                (build_profile_id, filename) for filename in generators[build_profile_id]
+                if filename not in unchanged_files
             )
 
-        practice_user_restore = self.create_practice_user_restore(build_profile_id)
-        if practice_user_restore:
-            files.update({
-                '{}practice_user_restore.xml'.format(prefix): practice_user_restore
-            })
+        if self.build_files_in_parallel and len(to_generate) >= MIN_PARALLEL_BUILD_FILES:
+            generated = self._generate_files_in_parallel(to_generate)
+        else:
+            language_files, form_files, other_files = [], [], []
+            for file in to_generate:
+                if file[1] in form_filenames:
+                    form_files.append(file)
+                elif file[1].endswith('/app_strings.txt'):
+                    language_files.append(file)
+                else:
+                    other_files.append(file)
+            generated = self._generate_files(generators, other_files)
+            generated.update(self._make_language_files(generators, language_files))
+            generated.update(self._get_form_files(generators, form_files))
+
+        files_by_profile = {}
+        for build_profile_id in build_profile_ids:
+            files = files_by_profile[build_profile_id] = {}
+            for filename in generators[build_profile_id]:
+                content = unchanged_files[filename] if filename in unchanged_files else generated[filename]
+                if content is not None:
+                    files[filename] = content
+        return files_by_profile
+
+    def _generate_files(self, generators, files):
+        """
+        :param generators: dict of build profile id -> file generators
+        :param files: list of ``(build_profile_id, filename)``
+        :returns: dict of filename -> file content
+        """
+        generated = {}
+        for build_profile_id, filename in files:
+            start = time.time()
+            generated[filename] = generators[build_profile_id][filename]()
+            self.build_file_timings[filename] = round(time.time() - start, 3)
+        return generated
 
-        files.update(self._make_language_files(prefix, build_profile_id))
-        files.update(self._get_form_files(prefix, build_profile_id))
-        return files
+    @time_method()
+    def _make_language_files(self, generators, files):
+        return self._generate_files(generators, files)
+
+    @time_method()
+    def _get_form_files(self, generators, files):
+        return self._generate_files(generators, files)
+
+    @time_method()
+    def _generate_files_in_parallel(self, files):
+        generated, timings = generate_build_files(self, files)
+        self.build_file_timings.update(timings)
+        return generated
+
+    def create_build_files_for_profiles(self, build_profile_ids):
+        """Create the build files of many build profiles at once"""
+        files_by_profile = self._create_all_files_for_profiles(build_profile_ids)
+        for files in files_by_profile.values():
+            for filepath, content in files.items():
+                self.lazy_put_attachment(content, 'files/%s' % filepath)
 
     get_modules = IndexedSchema.Getter('modules')
 
@@ -0,0 +1,173 @@
+"""
+Generate the files of an app build in a pool of processes
+
+Rendering forms, suites and app strings is CPU bound lxml work, so the
+files of large apps (and of all their build profiles) are generated
+concurrently in separate processes.
+
+Builds are made both in web requests and in celery tasks. Celery's prefork
+workers are daemonic and so can't start multiprocessing children, so the
+workers are started as subprocesses running this module instead. They do
+not share database, couch or redis connections with the process making the
+build. Starting a worker sets up django, which takes seconds, so only
+builds with at least ``MIN_PARALLEL_BUILD_FILES`` files are generated in
+parallel.
+
+The app, including its form sources, is saved to a temporary file which
+each worker loads when it starts. Workers are then sent a few files at a
+time to generate until none are left.
+"""
+import math
+import os
+import pickle
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from corehq.apps.app_manager.exceptions import BuildWorkerError
+from corehq.util.files import TransientTempfile
+from dimagi.utils.chunked import chunked
+
+BUILD_PROCESSES = 4
+
+MIN_PARALLEL_BUILD_FILES = 200
+
+# number of files sent to a worker at once
+FILES_PER_TASK = 5
+
+
+def generate_build_files(app, files):
+    """Generate build files of ``app`` in a pool of processes
+
+    :param files: list of ``(build_profile_id, filename)`` of the files
+    to generate. ``app`` must already have its form and media versions set.
+    :returns: tuple of a dict of filename -> file content and a dict of
+    filename -> seconds taken to generate the file
+    """
+    if not files:
+        return {}, {}
+    chunks = deque(chunked(files, FILES_PER_TASK, list))
+    processes = min(BUILD_PROCESSES, math.ceil(len(files) / FILES_PER_TASK))
+    results = {}
+    with TransientTempfile() as app_path:
+        _save_app(app, app_path)
+        with ThreadPoolExecutor(processes) as executor:
+            futures = [executor.submit(_generate_in_worker, app_path, chunks) for _ in range(processes)]
+            for future in futures:
+                results.update(future.result())
+    generated = {filename: content for filename, (content, duration) in results.items()}
+    timings = {filename: round(duration, 3) for filename, (content, duration) in results.items()}
+    return generated, timings
+
+
+def _generate_in_worker(app_path, chunks):
+    results = {}
+    with _Worker(app_path) as worker:
+        while True:
+            try:
+                files = chunks.popleft()
+            except IndexError:
+                return results
+            try:
+                results.update(worker.generate(files))
+            except Exception:
+                # the build failed, so stop the other workers
+                chunks.clear()
+                raise
+
+
+class _Worker(object):
+    """A subprocess generating the files of the app saved at ``app_path``"""
+
+    def __init__(self, app_path):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', __name__, app_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # the worker exits once it has no more requests to read
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+    def generate(self, files):
+        """
+        :returns: dict of filename -> tuple of (content, seconds taken)
+        """
+        try:
+            pickle.dump(files, self.process.stdin)
+            self.process.stdin.flush()
+            succeeded, result = pickle.load(self.process.stdout)
+        except (BrokenPipeError, EOFError):
+            raise BuildWorkerError("App build worker exited with code {}".format(self.process.wait()))
+        if not succeeded:
+            raise result
+        return result
+
+
+def _save_app(app, path):
+    form_sources = {
+        '%s.xml' % form.unique_id: form.source.encode('utf-8')
+        for form in app.get_forms()
+    }
+    with open(path, 'wb') as f:
+        pickle.dump((app.to_json(), form_sources), f)
+
+
+def _load_app(path):
+    from corehq.apps.app_manager.dbaccessors import wrap_app
+    with open(path, 'rb') as f:
+        app_json, form_sources = pickle.load(f)
+    app = wrap_app(dict(app_json, _attachments=form_sources))
+    app._generators_by_profile = {}
+    return app
+
+
+def _generate_files(app, files):
+    results = {}
+    for build_profile_id, filename in files:
+        try:
+            generators = app._generators_by_profile[build_profile_id]
+        except KeyError:
+            generators = app._generators_by_profile[build_profile_id] = \
+                app._get_build_file_generators(build_profile_id)
+        start = time.time()
+        content = generators[filename]()
+        results[filename] = (content, time.time() - start)
+    return results
+
+
+def _run_worker(app_path, requests, responses):
+    import django
+    django.setup()
+    app = _load_app(app_path)
+    while True:
+        try:
+            files = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            response = (True, _generate_files(app, files))
+        except Exception as e:
+            response = (False, e)
+        try:
+            data = pickle.dumps(response)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            data = pickle.dumps((False, BuildWorkerError(repr(response[1]))))
+        responses.write(data)
+        responses.flush()
+
+
+if __name__ == '__main__':
+    # responses are written to stdout, so send anything else printed to stderr
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    _run_worker(sys.argv[1], sys.stdin.buffer, responses)
@@ -55,13 +55,12 @@ def autogenerate_build_task(app_id, domain, version, comment):
 @task(serializer='pickle', queue='background_queue', ignore_result=True)
 def create_build_files_for_all_app_profiles(domain, build_id):
     app = get_app(domain, build_id)
-    build_profiles = app.build_profiles
-    save_app = False
-    for profile in build_profiles:
-        if not app.has_attachment('files/{id}/profile.xml'.format(id=profile)):
-            app.create_build_files(build_profile_id=profile)
-            save_app = True
-    if save_app:
+    build_profile_ids = [
+        profile for profile in app.build_profiles
+        if not app.has_attachment('files/{id}/profile.xml'.format(id=profile))
+    ]
+    if build_profile_ids:
+        app.create_build_files_for_profiles(build_profile_ids)
         app.save()
 
 
@@ -1,6 +1,7 @@
 import itertools
 import os
 import tempfile
+import uuid
 import zipfile
 
 from django.test import TestCase
@@ -10,10 +11,13 @@ from mock import patch
 from corehq.apps.app_manager.tests.app_factory import AppFactory
 from corehq.apps.app_manager.xform_builder import XFormBuilder
 from corehq.apps.hqmedia.models import CommCareImage
+from corehq.apps.hqmedia import tasks
 from corehq.apps.hqmedia.tasks import (
     check_ccz_multimedia_integrity,
+    create_files_for_ccz,
     find_missing_locale_ids_in_ccz,
 )
+from corehq.blobs import CODES, get_blob_db
 from corehq.apps.hqmedia.views import iter_media_files
 
 
@@ -65,6 +69,30 @@ class CCZTest(TestCase):
         self.assertEqual(len(errors), 1)
         self.assertIn('commcare/icon.png', errors[0])
 
+    @patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+    def test_build_ccz_cached(self, mock):
+        icon_path = 'jr://file/commcare/icon.png'
+        self.module.set_icon('en', icon_path)
+        build = self.factory.app
+        build.create_mapping(self.image, icon_path, save=False)
+        build.copy_of = uuid.uuid4().hex
+        build.save()
+        self.addCleanup(build.delete)
+        self.addCleanup(lambda: get_blob_db().bulk_delete(
+            metas=get_blob_db().metadb.get_for_parent(build._id, CODES.app_ccz)))
+
+        with patch.object(tasks, '_build_ccz_files', wraps=tasks._build_ccz_files) as build_ccz_files:
+            first_path = create_files_for_ccz(build, None)
+            second_path = create_files_for_ccz(build, None)
+        self.assertEqual(build_ccz_files.call_count, 1)
+
+        with zipfile.ZipFile(first_path) as first, zipfile.ZipFile(second_path) as second:
+            self.assertIn('commcare/icon.png', first.namelist())
+            self.assertEqual(first.namelist(), second.namelist())
+            for name in first.namelist():
+                self.assertEqual(first.read(name), second.read(name))
+            self.assertEqual(first.read('commcare/icon.png'), self.image.get_display_file(return_type=False))
+
     def _create_multimedia_integrity_zip(self, media_suite, media_objects):
         # Creates a limited zip, containing only media suite and multimedia files
         files, errors = iter_media_files(media_objects)
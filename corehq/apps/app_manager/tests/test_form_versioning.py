@@ -142,6 +142,36 @@ class FormVersioningTest(TestCase):
         self.assertEqual(self.get_form_versions(xxx_build1), [1, 1])
         self.assertEqual(self.get_form_versions(xxx_build2), [2, 1])
 
+    @patch_default_builds
+    @patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+    def test_unchanged_form_files_reused(self, mock):
+        add_build(version='2.7.0', build_number=20655)
+        app = Application.new_app('form-versioning-test', 'Foo')
+        app.modules.append(Module(forms=[Form(), Form()]))
+        app.build_spec = BuildSpec.from_string('2.7.0/latest')
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.0')
+        app.get_module(0).get_form(1).source = BLANK_TEMPLATE.format(xmlns='xmlns-1')
+        app.save()
+        build1 = app.make_build()
+        build1.save()
+
+        app.get_module(0).get_form(0).source = BLANK_TEMPLATE.format(xmlns='xmlns-0.1')
+        app.save()
+        with patch.object(Application, 'fetch_xform', autospec=True,
+                          side_effect=Application.fetch_xform) as fetch_xform:
+            build2 = app.make_build()
+        build2.save()
+
+        rendered = [call[1]['form'].unique_id for call in fetch_xform.call_args_list]
+        # both forms are rendered to compare them with the previous build,
+        # only the changed form is rendered again for the build files
+        self.assertEqual(rendered.count(app.get_module(0).get_form(0).unique_id), 2)
+        self.assertEqual(rendered.count(app.get_module(0).get_form(1).unique_id), 1)
+        self.assertEqual(
+            build2.fetch_attachment('files/modules-0/forms-1.xml'),
+            build1.fetch_attachment('files/modules-0/forms-1.xml'),
+        )
+
     @staticmethod
     def get_form_versions(build):
         from lxml import etree
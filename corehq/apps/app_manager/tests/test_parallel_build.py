@@ -0,0 +1,106 @@
+from django.test import TestCase
+
+from mock import patch
+
+from corehq.apps.app_manager.models import BuildProfile
+from corehq.apps.app_manager.parallel_build import (
+    _generate_files,
+    _load_app,
+    generate_build_files,
+)
+from corehq.apps.app_manager.tests.app_factory import AppFactory
+from corehq.apps.app_manager.tests.util import TestXmlMixin
+from corehq.util.test_utils import flag_enabled
+
+
+class InlineWorker(object):
+    """Generates files in this process"""
+
+    def __init__(self, app_path):
+        self.app = _load_app(app_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def generate(self, files):
+        return _generate_files(self.app, files)
+
+
+@patch('corehq.apps.app_manager.models.validate_xform', return_value=None)
+@patch('corehq.apps.app_manager.models.Application.create_practice_user_restore', return_value=None)
+@patch('corehq.apps.app_manager.models.ApplicationBase._get_version_comparison_build', return_value=None)
+class ParallelBuildTest(TestCase, TestXmlMixin):
+    file_path = ('data',)
+
+    def setUp(self):
+        factory = AppFactory(build_version='2.40.0', domain='parallel-build')
+        factory.app.langs = ['en', 'fra']
+        factory.app.build_profiles = {
+            'en-profile': BuildProfile(langs=['en'], name='en-profile'),
+        }
+        module, _ = factory.new_basic_module('register', 'patient')
+        factory.new_form(module)
+        self.app = factory.app
+
+    def _get_app(self):
+        app = self.app.__class__.wrap(self.app.to_json())
+        for form in app.get_forms():
+            form.source = self.get_xml('very_simple_form').decode('utf-8')
+        return app
+
+    def _create_files(self):
+        app = self._get_app()
+        return app, app._create_all_files_for_profiles([None, 'en-profile'])
+
+    @patch('corehq.apps.app_manager.models.MIN_PARALLEL_BUILD_FILES', 0)
+    @patch('corehq.apps.app_manager.parallel_build._Worker', InlineWorker)
+    def test_parallel_build_matches_sequential(self, *args):
+        sequential_app, sequential_files = self._create_files()
+        with flag_enabled('PARALLEL_APP_BUILD'):
+            app, parallel_files = self._create_files()
+
+        self.assertEqual(parallel_files, sequential_files)
+        self.assertIn('modules-0/forms-1.xml', parallel_files[None])
+        self.assertIn('en-profile/modules-0/forms-1.xml', parallel_files['en-profile'])
+        all_files = set(parallel_files[None]) | set(parallel_files['en-profile'])
+        self.assertEqual(set(app.build_file_timings), all_files)
+        self.assertEqual(set(sequential_app.build_file_timings), all_files)
+
+    @patch('corehq.apps.app_manager.models.generate_build_files')
+    def test_small_builds_are_sequential(self, generate_build_files, *args):
+        with flag_enabled('PARALLEL_APP_BUILD'):
+            self._create_files()
+        generate_build_files.assert_not_called()
+
+    @patch('corehq.apps.app_manager.parallel_build._Worker', InlineWorker)
+    def test_worker_error(self, *args):
+        app = self._get_app()
+        with self.assertRaises(KeyError):
+            generate_build_files(app, [(None, 'profile.xml'), (None, 'missing.xml')])
+
+    def test_worker_processes(self, *args):
+        app = self._get_app()
+        for form in app.get_forms():
+            # workers don't share the mocks of this process, so mark the form
+            # as valid in the (redis) cache to skip validating it with formplayer
+            form.validation_cache = ""
+        app.set_form_versions()
+        app.set_media_versions()
+        files = [
+            (build_profile_id, filename)
+            for build_profile_id in [None, 'en-profile']
+            for filename in app._get_build_file_generators(build_profile_id)
+            if 'forms-' in filename or filename.endswith('app_strings.txt')
+        ]
+        self.assertIn(('en-profile', 'en-profile/modules-0/forms-1.xml'), files)
+
+        generated, timings = generate_build_files(app, files)
+
+        self.assertEqual(generated, {
+            filename: app._get_build_file_generators(build_profile_id)[filename]()
+            for build_profile_id, filename in files
+        })
+        self.assertEqual(set(timings), set(generated))
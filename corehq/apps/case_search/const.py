@@ -9,6 +9,13 @@ INDICES_PATH = 'indices'
 REFERENCED_ID = 'referenced_id'
 IDENTIFIER = 'identifier'
 
+# Properties of the cases a case indexes are copied onto it in the case
+# search index, keyed by their path from the case, e.g. `parent/host/name`,
+# for domains with the CASE_SEARCH_DENORMALIZED_ANCESTORS toggle. This is the
+# number of levels of ancestors that are copied.
+DENORMALIZED_ANCESTOR_DEPTH = 2
+ANCESTOR_PATH_SEPARATOR = '/'
+
 # Added to each case response when case searches are performed
 RELEVANCE_SCORE = "commcare_search_score"
 
@@ -5,6 +5,7 @@ from django.utils.translation import ugettext as _
 from eulxml.xpath import parse as parse_xpath
 from eulxml.xpath.ast import FunctionCall, Step, UnaryExpression, serialize
 
+from corehq.apps.case_search.const import DENORMALIZED_ANCESTOR_DEPTH
 from corehq.apps.case_search.xpath_functions import (
     XPATH_FUNCTIONS,
     XPathFunctionException,
@@ -14,9 +15,11 @@ from corehq.apps.es.case_search import (
     CaseSearchES,
     case_property_missing,
     case_property_range_query,
+    case_property_exists,
     exact_case_property_text_query,
     reverse_index_case_query,
 )
+from corehq.toggles import CASE_SEARCH_DENORMALIZED_ANCESTORS
 
 
 class CaseFilterError(Exception):
@@ -72,6 +75,35 @@ ALL_OPERATORS = [EQ, NEQ] + list(OPERATOR_MAPPING.keys()) + list(COMPARISON_MAPP
 def build_filter_from_ast(domain, node):
     """Builds an ES filter from an AST provided by eulxml.xpath.parse
     """
+    denormalized_ancestors = CASE_SEARCH_DENORMALIZED_ANCESTORS.enabled(domain)
+
+    def _related_case_depth(node):
+        """Returns the number of related cases walked by a lookup, e.g. 2 for `parent/parent/foo = 'bar'`
+        """
+        depth = 0
+        n = node.left
+        while hasattr(n, 'op') and n.op == '/':
+            depth += 1
+            n = n.left
+        return depth
+
+    def _ancestor_property_filter(node):
+        """Return a filter on the ancestor properties copied onto each case in the index
+
+        :param node: a node returned from eulxml.xpath.parse of the form `parent/grandparent/property = 'value'`
+
+        The properties of `grandparent` are indexed on each case with keys like
+        `parent/grandparent/property`, so the filter only has to match the case
+        itself. The ancestor's `@case_id` is always indexed, which is used to
+        exclude cases without such an ancestor from negative filters.
+        """
+        if isinstance(node.right, Step):
+            _raise_step_RHS(node)
+        ancestor_path = serialize(node.left.left)
+        has_ancestor = case_property_exists('{}/@case_id'.format(ancestor_path))
+        if node.op in [EQ, NEQ]:
+            return filters.AND(has_ancestor, _equality(node))
+        return filters.AND(has_ancestor, _comparison(node))
 
     def _walk_related_cases(node):
         """Return a query that will fulfill the filter on the related case.
@@ -170,7 +202,7 @@ def build_filter_from_ast(domain, node):
 
         """
         acceptable_rhs_types = (int, str, float, FunctionCall, UnaryExpression)
-        if isinstance(node.left, Step) and (
+        if (isinstance(node.left, Step) or _is_related_case_lookup(node)) and (
                 isinstance(node.right, acceptable_rhs_types)):
             # This is a leaf node
             case_property_name = serialize(node.left)
@@ -220,6 +252,8 @@ def build_filter_from_ast(domain, node):
 
         if _is_related_case_lookup(node):
             # this node represents a filter on a property for a related case
+            if denormalized_ancestors and _related_case_depth(node) <= DENORMALIZED_ANCESTOR_DEPTH:
+                return _ancestor_property_filter(node)
             return _walk_related_cases(node)
 
         if node.op in [EQ, NEQ]:
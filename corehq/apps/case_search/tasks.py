@@ -3,7 +3,13 @@ from celery.task import task
 from corehq.pillows.case_search import (
     CaseSearchReindexerFactory,
     delete_case_search_cases,
+    get_descendant_case_ids,
+    reindex_cases_for_case_search,
 )
+from dimagi.utils.chunked import chunked
+
+# number of descendant cases each task reindexes
+CASES_PER_DESCENDANT_REINDEX_TASK = 100
 
 
 @task(serializer='pickle')
@@ -14,3 +20,21 @@ def reindex_case_search_for_domain(domain):
 @task(serializer='pickle')
 def delete_case_search_cases_for_domain(domain):
     delete_case_search_cases(domain)
+
+
+@task(serializer='pickle')
+def reindex_case_search_descendants(domain, case_ids):
+    """Reindex the cases that have the properties of ``case_ids`` copied
+    onto them in the case search index
+    """
+    descendant_ids = get_descendant_case_ids(domain, case_ids)
+    for chunk in chunked(descendant_ids, CASES_PER_DESCENDANT_REINDEX_TASK, list):
+        reindex_case_search_cases.delay(domain, chunk)
+
+
+@task(serializer='pickle', default_retry_delay=5 * 60, max_retries=12, bind=True)
+def reindex_case_search_cases(self, domain, case_ids):
+    failed_ids = reindex_cases_for_case_search(domain, case_ids)
+    if failed_ids:
+        # only retry the cases that failed
+        self.retry(args=(domain, failed_ids))
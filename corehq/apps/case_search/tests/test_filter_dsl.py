@@ -13,11 +13,17 @@ from corehq.apps.case_search.filter_dsl import (
 )
 from corehq.apps.es import CaseSearchES
 from corehq.elastic import get_es_new, send_to_elasticsearch
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
-from corehq.pillows.case_search import transform_case_for_elasticsearch
+from corehq.pillows.case_search import (
+    get_ancestor_cases,
+    get_descendant_case_ids,
+    reindex_cases_for_case_search,
+    transform_case_for_elasticsearch,
+)
 from corehq.pillows.mappings.case_search_mapping import CASE_SEARCH_INDEX_INFO
 from corehq.util.elastic import ensure_index_deleted
-from corehq.util.test_utils import generate_cases, trap_extra_setup
+from corehq.util.test_utils import flag_enabled, generate_cases, trap_extra_setup
 
 
 class TestFilterDsl(SimpleTestCase):
@@ -314,6 +320,60 @@ class TestFilterDsl(SimpleTestCase):
         with self.assertRaises(CaseFilterError):
             build_filter_from_ast(None, parse_xpath("parent/name > other_property"))
 
+    @flag_enabled('CASE_SEARCH_DENORMALIZED_ANCESTORS')
+    def test_denormalized_ancestor_lookup(self):
+        parsed = parse_xpath("parent/host/name != 'Mace'")
+        expected_filter = {
+            "and": (
+                {
+                    "nested": {
+                        "path": "case_properties",
+                        "query": {
+                            "filtered": {
+                                "query": {
+                                    "match_all": {}
+                                },
+                                "filter": {
+                                    "term": {
+                                        "case_properties.key.exact": "parent/host/@case_id"
+                                    }
+                                }
+                            }
+                        }
+                    }
+                },
+                {
+                    "not": {
+                        "nested": {
+                            "path": "case_properties",
+                            "query": {
+                                "filtered": {
+                                    "query": {
+                                        "match_all": {}
+                                    },
+                                    "filter": {
+                                        "and": (
+                                            {
+                                                "term": {
+                                                    "case_properties.key.exact": "parent/host/name"
+                                                }
+                                            },
+                                            {
+                                                "term": {
+                                                    "case_properties.value.exact": "Mace"
+                                                }
+                                            }
+                                        )
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            )
+        }
+        self.assertEqual(expected_filter, build_filter_from_ast("domain", parsed))
+
 
 class TestFilterDslLookups(TestCase):
     maxDiff = None
@@ -453,6 +513,52 @@ class TestFilterDslLookups(TestCase):
         self.assertEqual(expected_filter, built_filter)
         self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
 
+    @flag_enabled('CASE_SEARCH_DENORMALIZED_ANCESTORS')
+    def test_denormalized_ancestor_lookups(self):
+        child_case = CaseAccessors(self.domain).get_case(self.child_case_id)
+        send_to_elasticsearch('case_search', transform_case_for_elasticsearch(child_case.to_json()))
+        self.es.indices.refresh(CASE_SEARCH_INDEX_INFO.index)
+
+        for xpath in [
+            "father/name = 'Mace'",
+            "father/mother/house = 'Tyrell'",
+            "father/mother/alias != 'Queen of swords'",
+        ]:
+            built_filter = build_filter_from_ast(self.domain, parse_xpath(xpath))
+            self.assertEqual(
+                [self.child_case_id],
+                CaseSearchES().filter(built_filter).values_list('_id', flat=True),
+                xpath
+            )
+
+    @flag_enabled('CASE_SEARCH_DENORMALIZED_ANCESTORS')
+    def test_prefetched_ancestors(self):
+        child_case = CaseAccessors(self.domain).get_case(self.child_case_id).to_json()
+        ancestors = get_ancestor_cases(self.domain, [child_case])
+        self.assertEqual({self.parent_case_id, self.grandparent_case_id}, set(ancestors))
+        self.assertEqual(
+            transform_case_for_elasticsearch(child_case)['case_properties'],
+            transform_case_for_elasticsearch(child_case, ancestors)['case_properties'],
+        )
+
+    def test_get_descendant_case_ids(self):
+        self.assertEqual(
+            {self.child_case_id, self.parent_case_id},
+            set(get_descendant_case_ids(self.domain, [self.grandparent_case_id]))
+        )
+        self.assertEqual(
+            [self.parent_case_id],
+            get_descendant_case_ids(self.domain, [self.grandparent_case_id], depth=1)
+        )
+
+    @flag_enabled('CASE_SEARCH_DENORMALIZED_ANCESTORS')
+    def test_reindex_cases_for_case_search(self):
+        self.assertEqual([], reindex_cases_for_case_search(self.domain, [self.child_case_id]))
+        self.es.indices.refresh(CASE_SEARCH_INDEX_INFO.index)
+
+        built_filter = build_filter_from_ast(self.domain, parse_xpath("father/mother/house = 'Tyrell'"))
+        self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
+
 
 class TestGetProperties(SimpleTestCase):
     pass
@@ -87,12 +87,18 @@ class KafkaChangeFeed(ChangeFeed):
             assert not forever, 'Kafka pillow should not timeout when waiting forever!'
             # no need to do anything since this is just telling us we've reached the end of the feed
 
-    def get_current_checkpoint_offsets(self):
+    def get_current_checkpoint_offsets(self, processed_offsets=None):
+        """
+        :param processed_offsets: offsets to checkpoint at if the feed has been
+                                  consumed beyond what has been processed
+        """
         # the way kafka works, the checkpoint should increment by 1 because
         # querying the feed is inclusive of the value passed in.
         latest_offsets = self.get_latest_offsets()
+        if processed_offsets is None:
+            processed_offsets = self.get_processed_offsets()
         ret = {}
-        for topic_partition, sequence in self.get_processed_offsets().items():
+        for topic_partition, sequence in processed_offsets.items():
             if sequence == latest_offsets[topic_partition]:
                 # this topic and partition is totally up to date and if we add 1
                 # then kafka will give us an offset out of range error.
@@ -172,8 +178,9 @@ class KafkaCheckpointEventHandler(PillowCheckpointEventHandler):
         assert isinstance(change_feed, KafkaChangeFeed)
         self.change_feed = change_feed
 
-    def get_new_seq(self, change):
-        return self.change_feed.get_current_checkpoint_offsets()
+    def get_new_seq(self, change, context=None):
+        processed_offsets = context.processed_offsets if context else None
+        return self.change_feed.get_current_checkpoint_offsets(processed_offsets)
 
 
 def change_from_kafka_message(message):
@@ -1,6 +1,9 @@
 import json
 import logging
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from functools import partial
 
 from django.conf import settings
@@ -13,6 +16,7 @@ CHANGE_PRE_SEND = 'PRE-SEND'
 CHANGE_ERROR = 'ERROR'
 CHANGE_SENT = 'SENT'
 KAFKA_AUDIT_LOGGER = 'kafka_producer_audit'
+BATCH_TIMEOUT = 60  # seconds
 
 logger = logging.getLogger(KAFKA_AUDIT_LOGGER)
 
@@ -22,6 +26,7 @@ class ChangeProducer(object):
     def __init__(self, auto_flush=True):
         self.auto_flush = auto_flush
         self._producer = None
+        self._local = threading.local()
 
     @property
     def producer(self):
@@ -38,14 +43,48 @@ class ChangeProducer(object):
         )
         return self._producer
 
+    @contextmanager
+    def batch(self, timeout=BATCH_TIMEOUT):
+        """
+        Send changes without waiting for each one to be acknowledged, and
+        wait for all of them when the block exits, so that the changes are
+        sent in as few requests as possible.
+
+            with producer.batch():
+                producer.send_change(topic, change_meta)
+                ...
+
+        Like changes sent with ``auto_flush``, each change is audit logged
+        as sent or failed and an exception is raised if any of them failed,
+        but only once all of them have been waited for.
+
+        Has no effect when nested or when ``auto_flush`` is false.
+        """
+        if not self.auto_flush or self._pending is not None:
+            yield
+            return
+
+        self._local.pending = []
+        try:
+            yield
+        finally:
+            pending, self._local.pending = self._local.pending, None
+            _wait_for_changes(pending, timeout)
+
+    @property
+    def _pending(self):
+        # changes sent in the current thread's batch
+        return getattr(self._local, 'pending', None)
+
     def send_change(self, topic, change_meta):
         message = change_meta.to_json()
         message_json_dump = json.dumps(message).encode('utf-8')
         change_meta._transaction_id = uuid.uuid4().hex
+        pending = self._pending
         try:
             _audit_log(CHANGE_PRE_SEND, change_meta)
             future = self.producer.send(topic, message_json_dump, key=change_meta.document_id)
-            if self.auto_flush:
+            if self.auto_flush and pending is None:
                 future.get()
                 _audit_log(CHANGE_SENT, change_meta)
         except Exception:
@@ -53,7 +92,9 @@ class ChangeProducer(object):
             notify_exception(None, 'Problem sending change to Kafka', details=message)
             raise
 
-        if not self.auto_flush:
+        if pending is not None:
+            pending.append((future, change_meta))
+        elif not self.auto_flush:
             on_success = partial(_on_success, change_meta)
             on_error = partial(_on_error, change_meta)
             future.add_callback(on_success).add_errback(on_error)
@@ -62,6 +103,22 @@ class ChangeProducer(object):
         self.producer.flush(timeout=timeout)
 
 
+def _wait_for_changes(pending, timeout):
+    deadline = time.time() + timeout
+    error = None
+    for future, change_meta in pending:
+        try:
+            future.get(timeout=max(deadline - time.time(), 0))
+        except Exception as e:
+            _audit_log(CHANGE_ERROR, change_meta)
+            notify_exception(None, 'Problem sending change to Kafka', details=change_meta.to_json())
+            error = error or e
+        else:
+            _audit_log(CHANGE_SENT, change_meta)
+    if error is not None:
+        raise error
+
+
 def _on_success(change_meta, record_metadata):
     _audit_log(CHANGE_SENT, change_meta)
 
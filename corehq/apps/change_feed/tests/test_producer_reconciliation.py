@@ -60,6 +60,62 @@ class TestKafkaAuditLogging(SimpleTestCase):
 
         self._check_logs(logs, meta.document_id, [CHANGE_PRE_SEND, CHANGE_ERROR])
 
+    def test_success_batch(self):
+        kafka_producer = ChangeProducer()
+        futures = [Mock(), Mock()]
+        kafka_producer.producer.send = Mock(side_effect=futures)
+        metas = [
+            ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
+            for future in futures
+        ]
+
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with kafka_producer.batch():
+                for meta in metas:
+                    kafka_producer.send_change(topics.CASE, meta)
+                for future in futures:
+                    future.get.assert_not_called()
+
+        for future in futures:
+            future.get.assert_called_once()
+        self._check_batch_logs(logs, [
+            (CHANGE_PRE_SEND, metas[0]),
+            (CHANGE_PRE_SEND, metas[1]),
+            (CHANGE_SENT, metas[0]),
+            (CHANGE_SENT, metas[1]),
+        ])
+
+    def test_error_batch(self):
+        kafka_producer = ChangeProducer()
+        futures = [Mock(), Mock()]
+        futures[0].get.side_effect = Exception()
+        kafka_producer.producer.send = Mock(side_effect=futures)
+        metas = [
+            ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
+            for future in futures
+        ]
+
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with self.assertRaises(Exception):
+                with kafka_producer.batch():
+                    for meta in metas:
+                        kafka_producer.send_change(topics.CASE, meta)
+
+        # the remaining changes are still waited for
+        self._check_batch_logs(logs, [
+            (CHANGE_PRE_SEND, metas[0]),
+            (CHANGE_PRE_SEND, metas[1]),
+            (CHANGE_ERROR, metas[0]),
+            (CHANGE_SENT, metas[1]),
+        ])
+
+    def _check_batch_logs(self, captured_logs, events):
+        lines = captured_logs.get_output().splitlines()
+        self.assertEqual(len(events), len(lines))
+        for (event, meta), line in zip(events, lines):
+            self.assertIn(meta.document_id, line)
+            self.assertIn(event, line)
+
     def _test_success(self, auto_flush):
         kafka_producer = ChangeProducer(auto_flush=auto_flush)
         with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
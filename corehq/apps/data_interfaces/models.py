@@ -1,12 +1,15 @@
+import operator
 import re
 from collections import defaultdict
 from copy import deepcopy
 from datetime import date, datetime, time, timedelta
+from functools import reduce
 
 from django.conf import settings
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
 from django.db import models, transaction
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.utils.translation import ugettext_lazy
 
 import jsonfield
@@ -490,14 +493,61 @@ class AutomaticUpdateRule(models.Model):
         return date
 
     @classmethod
-    def iter_cases(cls, domain, case_type, boundary_date=None, db=None):
+    def get_case_filter_for_rules(cls, rules, now, db):
+        """
+        Get a filter on the cases in the given database that matches at
+        least the cases matching any of the given rules.
+
+        Cases still need to be checked with criteria_match; the filter
+        only narrows down the cases to check.
+
+        :returns: tuple of (annotations, Q), or None if the rules' criteria
+        cannot narrow down the cases
+        """
+        annotations = {}
+        rule_filters = []
+        for rule in rules:
+            rule_filter = rule.get_case_filter(now, annotations, db)
+            if rule_filter is None:
+                return None
+            rule_filters.append(rule_filter)
+
+        if not rule_filters:
+            return None
+
+        return annotations, reduce(operator.or_, rule_filters)
+
+    def get_case_filter(self, now, annotations, db):
+        """
+        :returns: Q matching at least the cases in the given database that
+        match the rule's criteria, or None if none of them can be expressed
+        in SQL. Annotations the filter refers to are added to `annotations`.
+        """
+        criteria_filters = [
+            criteria.definition.get_case_filter(now, annotations, db)
+            for criteria in self.memoized_criteria
+        ]
+        criteria_filters = [f for f in criteria_filters if f is not None]
+        if not criteria_filters:
+            return None
+
+        return reduce(operator.and_, criteria_filters)
+
+    @classmethod
+    def iter_cases(cls, domain, case_type, boundary_date=None, db=None, case_filter=None):
+        """
+        :param case_filter: (optional) function taking a database alias and
+        returning a further filter on the cases of that database as returned
+        by get_case_filter_for_rules. Only used for domains on the SQL backend.
+        """
         if should_use_sql_backend(domain):
-            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db)
+            return cls._iter_cases_from_postgres(domain, case_type, boundary_date=boundary_date, db=db,
+                                                 case_filter=case_filter)
         else:
             return cls._iter_cases_from_es(domain, case_type, boundary_date=boundary_date)
 
     @classmethod
-    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None):
+    def _iter_cases_from_postgres(cls, domain, case_type, boundary_date=None, db=None, case_filter=None):
         q_expression = Q(
             domain=domain,
             type=case_type,
@@ -508,6 +558,10 @@ class AutomaticUpdateRule(models.Model):
         if boundary_date:
             q_expression = q_expression & Q(server_modified_on__lte=boundary_date)
 
+        if case_filter:
+            db_names = [db] if db else get_db_aliases_for_partitioned_query()
+            return cls._iter_filtered_cases_from_postgres(db_names, q_expression, case_filter)
+
         if db:
             return paginate_query(db, CommCareCaseSQL, q_expression, load_source='auto_update_rule')
         else:
@@ -515,6 +569,19 @@ class AutomaticUpdateRule(models.Model):
                 CommCareCaseSQL, q_expression, load_source='auto_update_rule'
             )
 
+    @staticmethod
+    def _iter_filtered_cases_from_postgres(db_names, q_expression, case_filter):
+        for db_name in db_names:
+            db_filter = case_filter(db_name)
+            if db_filter is None:
+                annotations, db_q_expression = None, q_expression
+            else:
+                annotations, rules_q_expression = db_filter
+                db_q_expression = q_expression & rules_q_expression
+            for case in paginate_query(db_name, CommCareCaseSQL, db_q_expression, annotate=annotations,
+                                       load_source='auto_update_rule'):
+                yield case
+
     @classmethod
     def _iter_cases_from_es(cls, domain, case_type, boundary_date=None):
         case_ids = list(cls._get_case_ids_from_es(domain, case_type, boundary_date))
@@ -753,6 +820,24 @@ class CaseRuleCriteriaDefinition(models.Model):
     def matches(self, case, now):
         raise NotImplementedError()
 
+    def get_case_filter(self, now, annotations, db):
+        """
+        Get a filter on the cases in the given database that matches at
+        least the cases this definition matches. It may match more cases,
+        since cases are checked with matches() as well.
+
+        :param annotations: dict of annotations the filter refers to,
+        to which annotations used by the filter are added
+        :returns: Q or None if the definition cannot be expressed in SQL
+        """
+        return None
+
+
+def _annotate(annotations, expression):
+    alias = '_criteria_{}'.format(len(annotations))
+    annotations[alias] = expression
+    return alias
+
 
 class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
     # True when today < (the date in property_name + property_value days)
@@ -867,6 +952,44 @@ class MatchPropertyDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def _is_case_json_property(self):
+        # other properties are resolved through related cases or may be
+        # read from CommCareCaseSQL fields (see get_case_property)
+        return (
+            '/' not in self.property_name
+            and self.property_name not in ('_id', 'case_json')
+            and self.property_name not in {field.name for field in CommCareCaseSQL._meta.fields}
+        )
+
+    def get_case_filter(self, now, annotations, db):
+        if not self._is_case_json_property():
+            return None
+
+        if self.match_type in (self.MATCH_EQUAL, self.MATCH_NOT_EQUAL):
+            if self.property_value is None:
+                return None
+            q = Q(case_json__contains={self.property_name: self.property_value})
+            return q if self.match_type == self.MATCH_EQUAL else ~q
+
+        value = _annotate(annotations, KeyTextTransform(self.property_name, 'case_json'))
+        has_value = Q(**{value + '__isnull': False})
+        if self.match_type == self.MATCH_HAS_VALUE:
+            return has_value & ~Q(**{value: ''})
+
+        if self.match_type in (self.MATCH_DAYS_BEFORE, self.MATCH_DAYS_AFTER):
+            try:
+                days = int(self.property_value)
+            except (TypeError, ValueError):
+                return None
+            # Compare the date part of ISO formatted values as text, allowing
+            # a day either way for dates with a timezone offset
+            boundary = (now - timedelta(days=days)).date()
+            if self.match_type == self.MATCH_DAYS_BEFORE:
+                return has_value & Q(**{value + '__gte': (boundary - timedelta(days=1)).isoformat()})
+            return has_value & Q(**{value + '__lt': (boundary + timedelta(days=2)).isoformat()})
+
+        return None
+
     def matches(self, case, now):
         return {
             self.MATCH_DAYS_BEFORE: self.check_days_before,
@@ -918,6 +1041,18 @@ class ClosedParentDefinition(CaseRuleCriteriaDefinition):
 
         return False
 
+    def get_case_filter(self, now, annotations, db):
+        # parent cases may live in another database, so this only
+        # requires the case to have such an index
+        has_index = _annotate(annotations, Exists(
+            CommCareCaseIndexSQL.objects.using(db).filter(
+                case_id=OuterRef('case_id'),
+                identifier=self.identifier,
+                relationship_id=self.relationship_id,
+            )
+        ))
+        return Q(**{has_index: True})
+
 
 class CaseRuleAction(models.Model):
     rule = models.ForeignKey('AutomaticUpdateRule', on_delete=models.PROTECT)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from functools import partial
 
 from django.conf import settings
 from django.core.cache import cache
@@ -33,7 +34,10 @@ from corehq.form_processor.interfaces.dbaccessors import (
 )
 from corehq.form_processor.utils.general import should_use_sql_backend
 from corehq.sql_db.util import get_db_aliases_for_partitioned_query
-from corehq.toggles import DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK
+from corehq.toggles import (
+    CASE_UPDATE_RULE_SQL_FILTERS,
+    DISABLE_CASE_UPDATE_RULE_SCHEDULED_TASK,
+)
 from corehq.util.decorators import serial_task
 from corehq.util.log import send_HTML_email
 
@@ -150,7 +154,12 @@ def run_case_update_rules_for_domain_and_db(domain, now, run_id, case_type, db=N
     rules = list(all_rules.filter(case_type=case_type))
 
     boundary_date = AutomaticUpdateRule.get_boundary_date(rules, now)
-    for case in AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db):
+    case_filter = (
+        partial(AutomaticUpdateRule.get_case_filter_for_rules, rules, now)
+        if CASE_UPDATE_RULE_SQL_FILTERS.enabled(domain) else None
+    )
+
+    for case in AutomaticUpdateRule.iter_cases(domain, case_type, boundary_date, db=db, case_filter=case_filter):
         migration_in_progress, last_migration_check_time = check_data_migration_in_progress(
             domain,
             last_migration_check_time
@@ -37,6 +37,7 @@ from corehq.form_processor.signals import sql_case_post_save
 from corehq.form_processor.tests.utils import (
     run_with_all_backends,
     set_case_property_directly,
+    use_sql_backend,
 )
 from corehq.form_processor.utils.general import should_use_sql_backend
 from corehq.toggles import NAMESPACE_DOMAIN, RUN_AUTO_CASE_UPDATES_ON_SAVE
@@ -543,6 +544,69 @@ class CaseRuleCriteriaTest(BaseCaseRuleTest):
             self.assertTrue(rule.criteria_match(case, datetime(2017, 4, 15)))
 
 
+@use_sql_backend
+class CaseRuleSQLFilterTest(BaseCaseRuleTest):
+
+    def _get_filtered_case_ids(self, rules, now):
+        def case_filter(db):
+            return AutomaticUpdateRule.get_case_filter_for_rules(rules, now, db)
+
+        return {
+            case.case_id
+            for case in AutomaticUpdateRule.iter_cases(self.domain, 'person', case_filter=case_filter)
+        }
+
+    def test_case_property_filters(self):
+        equal_rule = _create_empty_rule(self.domain)
+        equal_rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='result',
+            property_value='x',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        days_rule = _create_empty_rule(self.domain)
+        days_rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='last_visit_date',
+            property_value='5',
+            match_type=MatchPropertyDefinition.MATCH_DAYS_AFTER,
+        )
+
+        with _with_case(self.domain, 'person', datetime.utcnow()) as result_case, \
+                _with_case(self.domain, 'person', datetime.utcnow()) as date_case, \
+                _with_case(self.domain, 'person', datetime.utcnow()) as other_case:
+            hqcase.utils.update_case(self.domain, result_case.case_id, case_properties={'result': 'x'})
+            hqcase.utils.update_case(self.domain, date_case.case_id,
+                                     case_properties={'last_visit_date': '2017-01-01'})
+            hqcase.utils.update_case(self.domain, other_case.case_id,
+                                     case_properties={'result': 'y', 'last_visit_date': '2017-01-14'})
+
+            self.assertEqual(
+                self._get_filtered_case_ids([equal_rule, days_rule], datetime(2017, 1, 15)),
+                {result_case.case_id, date_case.case_id}
+            )
+
+    def test_parent_case_closed_filter(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(ClosedParentDefinition)
+
+        with _with_case(self.domain, 'person', datetime.utcnow()) as child, \
+                _with_case(self.domain, 'person', datetime.utcnow()) as parent:
+            set_parent_case(self.domain, child, parent)
+            # the parent's status is only checked by criteria_match
+            self.assertEqual(self._get_filtered_case_ids([rule], datetime.utcnow()), {child.case_id})
+
+    def test_unsupported_criteria(self):
+        rule = _create_empty_rule(self.domain)
+        rule.add_criteria(
+            MatchPropertyDefinition,
+            property_name='parent/result',
+            property_value='x',
+            match_type=MatchPropertyDefinition.MATCH_EQUAL,
+        )
+        self.assertIsNone(AutomaticUpdateRule.get_case_filter_for_rules([rule], datetime.utcnow(), 'default'))
+
+
 class CaseRuleActionsTest(BaseCaseRuleTest):
 
     def assertActionResult(self, rule, submission_count, result=None, expected_result=None):
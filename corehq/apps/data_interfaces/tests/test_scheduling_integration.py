@@ -59,8 +59,10 @@ from corehq.messaging.scheduling.tests.util import (
 from corehq.messaging.tasks import (
     run_messaging_rule,
     sync_case_for_messaging_rule,
+    sync_cases_for_messaging_rule,
 )
 from corehq.sql_db.util import paginate_query_across_partitioned_databases
+from corehq.util.test_utils import flag_enabled
 
 
 def get_visit_scheduler_module_and_form_for_test():
@@ -1040,6 +1042,59 @@ class CaseRuleSchedulingIntegrationTest(TestCase):
                 any_order=True
             )
 
+    @run_with_all_backends
+    @flag_enabled('MESSAGING_RULE_CASE_CHUNKS')
+    @patch('corehq.messaging.tasks.sync_cases_for_messaging_rule.delay')
+    def test_run_messaging_rule_in_chunks(self, task_patch):
+        schedule = AlertSchedule.create_simple_alert(
+            self.domain,
+            SMSContent(message={'en': 'Hello'})
+        )
+
+        rule = create_empty_rule(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+
+        rule.add_action(
+            CreateScheduleInstanceActionDefinition,
+            alert_schedule_id=schedule.schedule_id,
+            recipients=(('Self', None),),
+        )
+
+        AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+
+        with create_case(self.domain, 'person') as case1, create_case(self.domain, 'person') as case2:
+            run_messaging_rule(self.domain, rule.pk)
+            self.assertEqual(task_patch.call_count, 1)
+            domain, case_ids, rule_id = task_patch.call_args[0]
+            self.assertEqual((domain, rule_id), (self.domain, rule.pk))
+            self.assertEqual(set(case_ids), {case1.case_id, case2.case_id})
+
+            for case in (case1, case2):
+                get_case_alert_schedule_instances_for_schedule(case.case_id, schedule).delete()
+
+            sync_cases_for_messaging_rule(self.domain, case_ids, rule.pk)
+            for case in (case1, case2):
+                instances = get_case_alert_schedule_instances_for_schedule(case.case_id, schedule)
+                self.assertEqual(instances.count(), 1)
+                self.assertEqual(instances[0].rule_id, rule.pk)
+
+    @run_with_all_backends
+    @patch('corehq.messaging.tasks.notify_exception')
+    @patch('corehq.messaging.tasks.sync_cases_for_messaging_rule.retry')
+    def test_run_messaging_rule_chunk_retries_failed_cases(self, retry_patch, notify_patch):
+        rule = create_empty_rule(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+        AutomaticUpdateRule.clear_caches(self.domain, AutomaticUpdateRule.WORKFLOW_SCHEDULING)
+
+        with create_case(self.domain, 'person') as case1, create_case(self.domain, 'person') as case2:
+            def run_rule(rule, case, now):
+                if case.case_id == case2.case_id:
+                    raise ValueError(case.case_id)
+
+            with patch.object(AutomaticUpdateRule, 'run_rule', run_rule):
+                sync_cases_for_messaging_rule(self.domain, [case1.case_id, case2.case_id], rule.pk)
+
+            self.assertEqual(notify_patch.call_count, 1)
+            retry_patch.assert_called_once_with(args=(self.domain, [case2.case_id], rule.pk))
+
     @run_with_all_backends
     @patch('corehq.messaging.scheduling.models.content.SMSContent.send')
     @patch('corehq.messaging.scheduling.util.utcnow')
@@ -15,6 +15,7 @@ from warnings import warn
 from django.utils.dateparse import parse_date
 
 from corehq.apps.case_search.const import (
+    ANCESTOR_PATH_SEPARATOR,
     CASE_PROPERTIES_PATH,
     IDENTIFIER,
     INDICES_PATH,
@@ -247,20 +248,25 @@ def reverse_index_case_query(case_ids, identifier=None):
     )
 
 
+def case_property_exists(case_property_name):
+    """case_property_name is set, possibly to the empty string
+
+    """
+    return queries.nested(
+        CASE_PROPERTIES_PATH,
+        queries.filtered(
+            queries.match_all(),
+            filters.term('{}.key.exact'.format(CASE_PROPERTIES_PATH), case_property_name),
+        )
+    )
+
+
 def case_property_missing(case_property_name):
     """case_property_name isn't set or is the empty string
 
     """
     return filters.OR(
-        filters.NOT(
-            queries.nested(
-                CASE_PROPERTIES_PATH,
-                queries.filtered(
-                    queries.match_all(),
-                    filters.term('{}.key.exact'.format(CASE_PROPERTIES_PATH), case_property_name),
-                )
-            )
-        ),
+        filters.NOT(case_property_exists(case_property_name)),
         exact_case_property_text_query(case_property_name, '')
     )
 
@@ -297,7 +303,8 @@ def flatten_result(hit, include_score=False):
     for case_property in case_properties:
         key = case_property.get('key')
         value = case_property.get('value')
-        if key is not None and key not in SPECIAL_CASE_PROPERTIES and value:
+        if (key is not None and key not in SPECIAL_CASE_PROPERTIES
+                and ANCESTOR_PATH_SEPARATOR not in key and value):
             result[key] = value
 
     for key in SYSTEM_PROPERTIES:
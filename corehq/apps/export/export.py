@@ -8,6 +8,7 @@ from couchdbkit import ResourceConflict
 
 from couchexport.export import FormattedRow, get_writer
 from couchexport.models import Format
+from couchexport.writers import StreamingExcel2007ExportWriter
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 
@@ -24,7 +25,7 @@ from corehq.apps.export.models.new import (
     SMSExportInstance,
 )
 from corehq.elastic import iter_es_docs_from_query
-from corehq.toggles import PAGINATED_EXPORTS
+from corehq.toggles import PAGINATED_EXPORTS, STREAMING_XLSX_EXPORTS
 from corehq.util.datadog.gauges import datadog_histogram, datadog_track_errors
 from corehq.util.datadog.utils import DAY_SCALE_TIME_BUCKETS, load_counter
 from corehq.util.files import TransientTempfile, safe_filename
@@ -270,7 +271,10 @@ def get_export_writer(export_instances, temp_path, allow_pagination=True):
     if len(export_instances) == 1:
         format = export_instances[0].export_format
 
-    legacy_writer = get_writer(format)
+    if format == Format.XLS_2007 and STREAMING_XLSX_EXPORTS.enabled(export_instances[0].domain):
+        legacy_writer = StreamingExcel2007ExportWriter()
+    else:
+        legacy_writer = get_writer(format)
     if allow_pagination and PAGINATED_EXPORTS.enabled(export_instances[0].domain):
         writer = _PaginatedExportWriter(legacy_writer, temp_path)
     else:
@@ -465,15 +469,25 @@ def rebuild_export(export_instance, progress_tracker):
     Rebuild the given daily saved ExportInstance
     """
     filters = export_instance.get_filters()
+    from corehq.apps.export.incremental import (
+        rebuild_export_incrementally,
+        supports_incremental_rebuild,
+    )
+    if supports_incremental_rebuild(export_instance):
+        rebuild_export_incrementally(export_instance, filters or [], progress_tracker)
+        return
     with TransientTempfile() as temp_path:
         export_file = get_export_file([export_instance], filters or [], temp_path, progress_tracker)
         with export_file as payload:
             save_export_payload(export_instance, payload)
 
 
-def save_export_payload(export, payload):
+def save_export_payload(export, payload, attachments=None):
     """
     Save the contents of an export file to disk for later retrieval.
+
+    :param attachments: optional dict of other attachments to save along
+    with the payload, attachment name -> file object or None to delete it
     """
     if export.last_accessed is None:
         export.last_accessed = datetime.datetime.utcnow()
@@ -482,6 +496,12 @@ def save_export_payload(export, payload):
     try:
         with export.atomic_blobs():
             export.set_payload(payload)
+            for name, content in (attachments or {}).items():
+                if content is None:
+                    if export.has_attachment(name):
+                        export.delete_attachment(name)
+                else:
+                    export.put_attachment(content, name)
     except ResourceConflict:
         # task was executed concurrently, so let first to finish win and abort the rest
         pass
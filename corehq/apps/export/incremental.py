@@ -0,0 +1,246 @@
+"""
+Incremental rebuilds of daily saved exports
+
+For domains with the INCREMENTAL_DAILY_SAVED_EXPORTS toggle, a full rebuild
+also saves the documents the export was built from. Later rebuilds only query Elasticsearch for the
+documents indexed since the previous build, merge them into the saved
+documents (replacing edited documents and dropping ones that no longer match
+the export, e.g. archived forms) and write the export from the merged
+documents. The added and changed documents are also written to a separate
+delta export.
+
+Documents deleted from Elasticsearch (e.g. deleted cases) and changes to what
+the export's user, group or location filters resolve to are only picked up by
+full rebuilds, which still happen every ``FULL_REBUILD_INTERVAL`` and
+whenever the export's filters are edited.
+"""
+import gzip
+import hashlib
+import heapq
+import json
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+from corehq.apps.es import filters as es_filters
+from corehq.apps.export.const import CASE_EXPORT, FORM_EXPORT
+from corehq.apps.export.export import (
+    ExportFile,
+    _get_base_query,
+    _get_export_query,
+    get_export_documents,
+    get_export_writer,
+    save_export_payload,
+    write_export_instance,
+)
+from corehq.apps.export.models.new import (
+    DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME,
+    DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME,
+)
+from corehq.elastic import ScanResult, iter_es_docs_from_query
+from corehq.toggles import INCREMENTAL_DAILY_SAVED_EXPORTS
+from corehq.util.files import TransientTempfile
+from dimagi.utils.chunked import chunked
+
+FULL_REBUILD_INTERVAL = timedelta(days=7)
+
+# Documents indexed shortly before a build started may not have been
+# searchable yet, so each build re-reads documents indexed in this window
+# before the previous one started.
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+# number of changed documents sorted in memory at a time
+SORT_RUN_SIZE = 10000
+
+# fields the base export queries sort on, by export type
+SORT_FIELDS = {
+    FORM_EXPORT: 'received_on',
+    CASE_EXPORT: 'opened_on',
+}
+
+
+def supports_incremental_rebuild(export_instance):
+    return (export_instance.type in SORT_FIELDS
+            and INCREMENTAL_DAILY_SAVED_EXPORTS.enabled(export_instance.domain))
+
+
+def can_rebuild_incrementally(export_instance, utcnow=None):
+    utcnow = utcnow or datetime.utcnow()
+    filters = getattr(export_instance, 'filters', None)
+    return bool(
+        supports_incremental_rebuild(export_instance)
+        and export_instance.last_incremental_watermark
+        and export_instance.last_full_rebuild
+        and export_instance.last_full_rebuild > utcnow - FULL_REBUILD_INTERVAL
+        and DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME in export_instance.blobs
+        # the saved documents may not match edited filters
+        and export_instance.last_build_filters_hash == get_filters_hash(export_instance)
+        # the documents matching a relative date period change every day
+        and not (filters and filters.date_period)
+    )
+
+
+def get_filters_hash(export_instance):
+    filters = getattr(export_instance, 'filters', None)
+    filters_json = filters.to_json() if filters else None
+    return hashlib.md5(json.dumps(filters_json, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def rebuild_export_incrementally(export_instance, filters, progress_tracker=None):
+    """
+    Rebuild the export and save the documents it was built from so that the
+    next rebuild can be incremental.
+    """
+    build_start = datetime.utcnow()
+    incremental = can_rebuild_incrementally(export_instance, build_start)
+    with TransientTempfile() as payload_path, \
+            TransientTempfile() as documents_path, \
+            TransientTempfile() as delta_path, \
+            ExitStack() as stack:
+        if incremental:
+            since = export_instance.last_incremental_watermark - WATERMARK_OVERLAP
+            changed_docs = stack.enter_context(get_changed_documents(export_instance, filters, since))
+            stale_ids = set(get_ids_indexed_since(export_instance, since))
+            previous_docs = _read_documents(export_instance.fetch_attachment(
+                DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME, stream=True))
+            docs = stack.enter_context(merge_documents(export_instance, previous_docs, changed_docs, stale_ids))
+            delta_file = _write_export_file(export_instance, ScanResult(len(changed_docs), changed_docs),
+                                            delta_path)
+        else:
+            docs = get_export_documents(export_instance, filters)
+            delta_file = None
+
+        with gzip.open(documents_path, 'wt', encoding='utf-8') as documents_file:
+            docs = _save_documents(docs, documents_file)
+            export_file = _write_export_file(export_instance, docs, payload_path, progress_tracker)
+
+        export_instance.last_incremental_watermark = build_start
+        export_instance.last_build_filters_hash = get_filters_hash(export_instance)
+        if not incremental:
+            export_instance.last_full_rebuild = build_start
+
+        with open(documents_path, 'rb') as documents, export_file as payload:
+            attachments = {DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME: documents}
+            if delta_file is None:
+                # a full rebuild has no delta
+                attachments[DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME] = None
+                save_export_payload(export_instance, payload, attachments)
+            else:
+                with delta_file as delta:
+                    attachments[DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME] = delta
+                    save_export_payload(export_instance, payload, attachments)
+
+
+def get_changed_documents(export_instance, filters, since):
+    """
+    :returns: ``SortedDocuments`` of the documents matching the export that
+    were indexed since ``since``, to be used as a context manager
+    """
+    query = _get_export_query(export_instance, filters).filter(es_filters.date_range('inserted_at', gte=since))
+    # the scroll API ignores the query's sort so the documents are sorted here
+    return SortedDocuments(iter_es_docs_from_query(query), _get_sort_key(export_instance))
+
+
+class SortedDocuments(object):
+    """
+    Documents in export order, without holding them all in memory
+
+    On entering, the documents are sorted in runs of ``SORT_RUN_SIZE`` which
+    are written to temporary files. Each iteration merges the runs, so the
+    documents can be iterated over more than once.
+    """
+
+    def __init__(self, docs, sort_key):
+        self.docs = docs
+        self.sort_key = sort_key
+        self.count = 0
+        self._run_paths = []
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        with self._stack:
+            for run in chunked(self.docs, SORT_RUN_SIZE):
+                path = self._stack.enter_context(TransientTempfile())
+                with gzip.open(path, 'wt', encoding='utf-8') as run_file:
+                    for doc in sorted(run, key=self.sort_key):
+                        run_file.write(json.dumps(doc) + '\n')
+                self._run_paths.append(path)
+                self.count += len(run)
+            # keep the run files until exit
+            self._stack = self._stack.pop_all()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stack.close()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return heapq.merge(*[self._read_run(path) for path in self._run_paths], key=self.sort_key)
+
+    @staticmethod
+    def _read_run(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as run_file:
+            for line in run_file:
+                yield json.loads(line)
+
+
+def get_ids_indexed_since(export_instance, since):
+    """
+    Get the IDs of all documents of the export's type indexed since
+    ``since``, whether or not they still match the export.
+    """
+    query = (_get_base_query(export_instance)
+             .remove_default_filters()
+             .filter(es_filters.date_range('inserted_at', gte=since)))
+    return query.scroll_ids()
+
+
+def merge_documents(export_instance, previous_docs, changed_docs, stale_ids):
+    """
+    :param previous_docs: ScanResult of the documents of the previous build
+    :param changed_docs: changed documents sorted in export order
+    :param stale_ids: IDs of the previous documents to drop
+    :returns: ``SortedDocuments`` of the merged documents, to be used as a
+    context manager. Merging them up front gives their exact count.
+    """
+    sort_key = _get_sort_key(export_instance)
+    current_docs = (doc for doc in previous_docs if doc['_id'] not in stale_ids)
+    return SortedDocuments(heapq.merge(current_docs, changed_docs, key=sort_key), sort_key)
+
+
+def _get_sort_key(export_instance):
+    field = SORT_FIELDS[export_instance.type]
+
+    def sort_key(doc):
+        return doc.get(field) or ''
+    return sort_key
+
+
+def _save_documents(docs, documents_file):
+    # the first line holds the (approximate) number of documents for progress tracking
+    documents_file.write(json.dumps({'count': docs.count}) + '\n')
+
+    def iter_docs():
+        for doc in docs:
+            documents_file.write(json.dumps(doc) + '\n')
+            yield doc
+    return ScanResult(docs.count, iter_docs())
+
+
+def _read_documents(fileobj):
+    lines = gzip.open(fileobj, 'rt', encoding='utf-8')
+    header = json.loads(next(lines))
+
+    def iter_docs():
+        with lines:
+            for line in lines:
+                yield json.loads(line)
+    return ScanResult(header['count'], iter_docs())
+
+
+def _write_export_file(export_instance, docs, path, progress_tracker=None):
+    writer = get_export_writer([export_instance], path)
+    with writer.open([export_instance]):
+        write_export_instance(writer, export_instance, docs, progress_tracker)
+    return ExportFile(writer.path, writer.format)
@@ -112,6 +112,10 @@ from corehq.util.timezones.utils import get_timezone_for_domain
 from corehq.util.view_utils import absolute_reverse
 
 DAILY_SAVED_EXPORT_ATTACHMENT_NAME = "payload"
+# documents the payload was built from, kept for incremental rebuilds
+DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME = "payload_documents"
+# export of only the documents added or changed by the last incremental rebuild
+DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME = "delta_payload"
 
 
 class PathNode(DocumentSchema):
@@ -752,6 +756,13 @@ class ExportInstance(BlobMixin, Document):
     last_accessed = DateTimeProperty()
     last_build_duration = IntegerProperty()
 
+    # Incremental rebuilds of daily saved exports (see export/incremental.py):
+    # when the documents in the last build were queried
+    last_incremental_watermark = DateTimeProperty()
+    last_full_rebuild = DateTimeProperty()
+    # hash of the filters the documents in the last build were queried with
+    last_build_filters_hash = StringProperty()
+
     description = StringProperty(default='')
 
     sharing = StringProperty(default=SharingOption.EDIT_AND_EXPORT, choices=SharingOption.CHOICES)
@@ -1070,10 +1081,27 @@ class ExportInstance(BlobMixin, Document):
         """
         return self.fetch_attachment(DAILY_SAVED_EXPORT_ATTACHMENT_NAME, stream=stream)
 
+    def has_delta_file(self):
+        """
+        Return True if there is an export of the documents added or changed
+        by the last incremental rebuild of this instance.
+        """
+        return DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME in self.blobs
+
+    def get_delta_payload(self, stream=False):
+        """
+        Get the export of the documents added or changed by the last
+        incremental rebuild of this instance.
+        """
+        return self.fetch_attachment(DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME, stream=stream)
+
     def copy_export(self):
         export_json = self.to_json()
         del export_json['_id']
         del export_json['external_blobs']
+        export_json.pop('last_incremental_watermark', None)
+        export_json.pop('last_full_rebuild', None)
+        export_json.pop('last_build_filters_hash', None)
         export_json['name'] = '{} - Copy'.format(self.name)
         new_export = self.__class__.wrap(export_json)
         return new_export
@@ -0,0 +1,129 @@
+import gzip
+import io
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.export.incremental import (
+    SortedDocuments,
+    _get_sort_key,
+    _read_documents,
+    _save_documents,
+    can_rebuild_incrementally,
+    get_filters_hash,
+    merge_documents,
+)
+from corehq.apps.export.models import (
+    CaseExportInstance,
+    FormExportInstance,
+    SMSExportInstance,
+)
+from corehq.apps.export.models.new import (
+    DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME,
+    DatePeriod,
+    FormExportInstanceFilters,
+)
+from corehq.blobs.mixin import BlobMetaRef
+from corehq.elastic import ScanResult
+from corehq.util.test_utils import flag_disabled, flag_enabled
+
+
+def _form(form_id, received_on):
+    return {'_id': form_id, 'received_on': received_on}
+
+
+class MergeDocumentsTest(SimpleTestCase):
+
+    def test_merge(self):
+        previous = [
+            _form('a', '2020-01-01'),
+            _form('b', '2020-01-02'),
+            _form('c', '2020-01-03'),
+            _form('d', '2020-01-04'),
+        ]
+        changed = [
+            # b was edited
+            _form('b', '2020-01-02'),
+            _form('e', '2020-01-05'),
+        ]
+        # c was archived
+        stale_ids = {'b', 'c', 'e'}
+        with merge_documents(FormExportInstance(), ScanResult(len(previous), previous), iter(changed),
+                             stale_ids) as merged:
+            self.assertEqual([doc['_id'] for doc in merged], ['a', 'b', 'd', 'e'])
+            self.assertEqual(merged.count, 4)
+
+    @patch('corehq.apps.export.incremental.SORT_RUN_SIZE', 2)
+    def test_sorted_documents(self):
+        docs = [
+            _form('c', '2020-01-03'),
+            _form('a', '2020-01-01'),
+            _form('e', None),
+            _form('d', '2020-01-04'),
+            _form('b', '2020-01-02'),
+        ]
+        with SortedDocuments(iter(docs), _get_sort_key(FormExportInstance())) as sorted_docs:
+            self.assertEqual(len(sorted_docs), 5)
+            self.assertEqual([doc['_id'] for doc in sorted_docs], ['e', 'a', 'b', 'c', 'd'])
+            # the documents can be read again
+            self.assertEqual(list(sorted_docs), sorted(docs, key=lambda doc: doc['received_on'] or ''))
+
+    def test_documents_round_trip(self):
+        docs = [_form('a', '2020-01-01'), _form('b', None)]
+        output = io.BytesIO()
+        with gzip.open(output, 'wt', encoding='utf-8') as documents_file:
+            written = list(_save_documents(ScanResult(len(docs), docs), documents_file))
+        self.assertEqual(written, docs)
+
+        output.seek(0)
+        result = _read_documents(output)
+        self.assertEqual(result.count, 2)
+        self.assertEqual(list(result), docs)
+
+
+@flag_enabled('INCREMENTAL_DAILY_SAVED_EXPORTS')
+class CanRebuildIncrementallyTest(SimpleTestCase):
+
+    def _instance(self, cls=FormExportInstance, with_documents=True, **kwargs):
+        now = datetime.utcnow()
+        instance = cls(
+            domain='incremental',
+            last_incremental_watermark=now - timedelta(days=1),
+            last_full_rebuild=now - timedelta(days=2),
+            **kwargs
+        )
+        instance.last_build_filters_hash = get_filters_hash(instance)
+        if with_documents:
+            instance.external_blobs[DAILY_SAVED_EXPORT_DOCUMENTS_ATTACHMENT_NAME] = BlobMetaRef()
+        return instance
+
+    def test_incremental(self):
+        self.assertTrue(can_rebuild_incrementally(self._instance()))
+        self.assertTrue(can_rebuild_incrementally(self._instance(CaseExportInstance)))
+
+    def test_not_enabled(self):
+        instance = self._instance()
+        with flag_disabled('INCREMENTAL_DAILY_SAVED_EXPORTS'):
+            self.assertFalse(can_rebuild_incrementally(instance))
+
+    def test_filters_edited(self):
+        instance = self._instance()
+        instance.filters.users = ['a-user-id']
+        self.assertFalse(can_rebuild_incrementally(instance))
+
+    def test_no_previous_documents(self):
+        self.assertFalse(can_rebuild_incrementally(self._instance(with_documents=False)))
+
+    def test_full_rebuild_due(self):
+        instance = self._instance()
+        instance.last_full_rebuild = datetime.utcnow() - timedelta(days=30)
+        self.assertFalse(can_rebuild_incrementally(instance))
+
+    def test_relative_date_period(self):
+        instance = self._instance(filters=FormExportInstanceFilters(date_period=DatePeriod(period_type='since')))
+        self.assertFalse(can_rebuild_incrementally(instance))
+
+    def test_sms_export(self):
+        self.assertFalse(can_rebuild_incrementally(self._instance(SMSExportInstance)))
@@ -34,6 +34,7 @@ from corehq.apps.export.views.list import (
     ODataFeedListView,
     commit_filters,
     download_daily_saved_export,
+    download_daily_saved_export_delta,
     get_app_data_drilldown_values,
     get_exports_page,
     get_saved_export_progress,
@@ -133,6 +134,9 @@ urlpatterns = [
     url(r"^custom/dailysaved/download/(?P<export_instance_id>[\w\-]+)/$",
         download_daily_saved_export,
         name="download_daily_saved_export"),
+    url(r"^custom/dailysaved/download_changes/(?P<export_instance_id>[\w\-]+)/$",
+        download_daily_saved_export_delta,
+        name="download_daily_saved_export_delta"),
     url(r"^custom/new/sms/download/$",
         DownloadNewSmsExportView.as_view(),
         name=DownloadNewSmsExportView.urlname),
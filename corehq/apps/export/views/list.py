@@ -47,6 +47,7 @@ from corehq.apps.export.forms import (
     DashboardFeedFilterForm,
 )
 from corehq.apps.export.models import CaseExportInstance, FormExportInstance
+from corehq.apps.export.models.new import DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME
 from corehq.apps.export.tasks import (
     get_saved_export_task_status,
     rebuild_saved_export,
@@ -274,6 +275,10 @@ class ExportListHelper(object):
                 export._id, export.file_size, export.last_updated,
                 export.last_accessed, download_url
             )
+            file_data['deltaDownloadUrl'] = None
+            if export.has_delta_file():
+                file_data['deltaDownloadUrl'] = self.request.build_absolute_uri(
+                    reverse('download_daily_saved_export_delta', args=[self.domain, export._id]))
 
         location_restrictions = []
         locations = []
@@ -736,32 +741,41 @@ def can_download_daily_saved_export(export, domain, couch_user):
     return False
 
 
+def _get_daily_saved_export_for_download(req, domain, export_instance_id):
+    """
+    :returns: the export instance, or raises Http404 if the user can't
+    download it. Location restrictions are left to the caller.
+    """
+    try:
+        export_instance = get_properly_wrapped_export_instance(export_instance_id)
+    except ResourceNotFound:
+        raise Http404(_("Export not found"))
+
+    assert domain == export_instance.domain
+
+    if export_instance.export_format == "html":
+        if not domain_has_privilege(domain, EXCEL_DASHBOARD):
+            raise Http404
+    elif export_instance.is_daily_saved_export:
+        if not domain_has_privilege(domain, DAILY_SAVED_EXPORT):
+            raise Http404
+
+    if not can_download_daily_saved_export(export_instance, domain, req.couch_user):
+        raise Http404
+    return export_instance
+
+
 @location_safe
 @csrf_exempt
 @api_auth
 @require_GET
 def download_daily_saved_export(req, domain, export_instance_id):
     with CriticalSection(['export-last-accessed-{}'.format(export_instance_id)]):
-        try:
-            export_instance = get_properly_wrapped_export_instance(export_instance_id)
-        except ResourceNotFound:
-            raise Http404(_("Export not found"))
-
-        assert domain == export_instance.domain
-
-        if export_instance.export_format == "html":
-            if not domain_has_privilege(domain, EXCEL_DASHBOARD):
-                raise Http404
-        elif export_instance.is_daily_saved_export:
-            if not domain_has_privilege(domain, DAILY_SAVED_EXPORT):
-                raise Http404
+        export_instance = _get_daily_saved_export_for_download(req, domain, export_instance_id)
 
         if not export_instance.filters.is_location_safe_for_user(req):
             return location_restricted_response(req)
 
-        if not can_download_daily_saved_export(export_instance, domain, req.couch_user):
-            raise Http404
-
         if export_instance.export_format == "html":
             message = "Download Excel Dashboard"
         else:
@@ -792,6 +806,31 @@ def download_daily_saved_export(req, domain, export_instance_id):
     return get_download_response(payload, export_instance.file_size, format, export_instance.filename, req)
 
 
+@location_safe
+@csrf_exempt
+@api_auth
+@require_GET
+def download_daily_saved_export_delta(req, domain, export_instance_id):
+    """
+    Download the documents added or changed by the last incremental rebuild
+    of a daily saved export. Unlike the full export this never triggers a
+    rebuild or counts as an access.
+    """
+    export_instance = _get_daily_saved_export_for_download(req, domain, export_instance_id)
+
+    if not export_instance.filters.is_location_safe_for_user(req):
+        return location_restricted_response(req)
+
+    if not export_instance.has_delta_file():
+        raise Http404(_("This export has no changes since its previous build"))
+
+    payload = export_instance.get_delta_payload(stream=True)
+    format = Format.from_format(export_instance.export_format)
+    filename = "%s (changes).%s" % (export_instance.name, format.extension)
+    content_length = export_instance.blobs[DAILY_SAVED_EXPORT_DELTA_ATTACHMENT_NAME].content_length
+    return get_download_response(payload, content_length, format, filename, req)
+
+
 @require_GET
 @login_and_domain_required
 @location_safe
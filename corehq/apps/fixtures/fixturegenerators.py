@@ -1,6 +1,7 @@
+import hashlib
 from collections import defaultdict
 from functools import partial
-from operator import attrgetter
+from operator import attrgetter, itemgetter
 from xml.etree import cElementTree as ElementTree
 
 from casexml.apps.phone.fixtures import FixtureProvider
@@ -10,11 +11,22 @@ from casexml.apps.phone.utils import (
 )
 
 from corehq.apps.fixtures.dbaccessors import iter_fixture_items_for_data_type
-from corehq.apps.fixtures.models import FIXTURE_BUCKET, FixtureDataType
+from corehq.apps.fixtures.models import (
+    FIXTURE_BUCKET,
+    FixtureDataItem,
+    FixtureDataType,
+)
 from corehq.apps.products.fixtures import product_fixture_generator_json
 from corehq.apps.programs.fixtures import program_fixture_generator_json
+from corehq.toggles import CACHE_USER_ITEM_LISTS, SKIP_UNCHANGED_ITEM_LISTS
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+from .utils import get_index_schema_node, get_item_list_versions
 
-from .utils import get_index_schema_node
+USER_ITEMS_CACHE_KEY_PREFIX = 'item-list-owner-items'
+USER_ITEMS_CACHE_TIMEOUT = 24 * 60 * 60
+# replaced with the serialized items when building cached item lists
+ITEMS_PLACEHOLDER = 'items-6C0B3A9E-placeholder'
 
 
 def item_lists_by_domain(domain):
@@ -53,20 +65,82 @@ class ItemListsProvider(FixtureProvider):
 
     def __call__(self, restore_state):
         restore_user = restore_state.restore_user
+        domain = restore_user.domain
         global_types = {}
         user_types = {}
-        for data_type in FixtureDataType.by_domain(restore_user.domain):
+        for data_type in FixtureDataType.by_domain(domain):
             if data_type.is_global:
                 global_types[data_type._id] = data_type
             else:
                 user_types[data_type._id] = data_type
+
+        use_cache = CACHE_USER_ITEM_LISTS.enabled(domain)
+        skip_unchanged = SKIP_UNCHANGED_ITEM_LISTS.enabled(domain)
+        versions = None
+        if use_cache or skip_unchanged:
+            versions = get_item_list_versions(domain, list(global_types) + list(user_types))
+        removed_fixture_ids = []
+        if skip_unchanged:
+            global_types, user_types, removed_fixture_ids = self._get_changed_types(
+                restore_state, global_types, user_types, versions
+            )
+
         items = []
         if global_types:
             items.extend(self.get_global_items(global_types, restore_state))
         if user_types:
-            items.extend(self.get_user_items(user_types, restore_user))
+            if use_cache:
+                items.extend(self.get_cached_user_items(user_types, restore_user, versions))
+            else:
+                items.extend(self.get_user_items(user_types, restore_user))
+        for fixture_id in removed_fixture_ids:
+            items.append(ElementTree.Element('fixture', {'id': fixture_id, 'user_id': restore_user.user_id}))
         return items
 
+    def _get_changed_types(self, restore_state, global_types, user_types, versions):
+        """Filter out the data types whose item lists have not changed since
+        the last sync and record the current ones in the new sync log
+
+        :returns: tuple of (<changed global types>, <changed user types>,
+        <ids of fixtures synced previously whose data type no longer exists>)
+        """
+        restore_user = restore_state.restore_user
+        owners = sorted(restore_user.get_fixture_data_item_owners())
+        # global item lists are cached and sent together, so they all change together
+        global_hash = _get_hash(sorted(
+            (data_type._id, data_type._rev, versions[data_type._id])
+            for data_type in global_types.values()
+        ))
+        hashes = {self._get_fixture_id(data_type): global_hash for data_type in global_types.values()}
+        hashes.update(
+            (self._get_fixture_id(data_type), _get_hash([
+                data_type._id, data_type._rev, versions[data_type._id], owners
+            ]))
+            for data_type in user_types.values()
+        )
+        if restore_state.current_sync_log is not None:
+            restore_state.current_sync_log.fixture_hashes.update(hashes)
+
+        last_sync_log = restore_state.last_sync_log
+        if not last_sync_log or restore_state.overwrite_cache:
+            return global_types, user_types, []
+
+        last_hashes = last_sync_log.fixture_hashes
+
+        def _changed(data_types):
+            return {
+                data_type_id: data_type
+                for data_type_id, data_type in data_types.items()
+                if last_hashes.get(self._get_fixture_id(data_type)) != hashes[self._get_fixture_id(data_type)]
+            }
+
+        prefix = self.id + ':'
+        removed_fixture_ids = sorted(
+            fixture_id for fixture_id in last_hashes
+            if fixture_id.startswith(prefix) and fixture_id not in hashes
+        )
+        return _changed(global_types), _changed(user_types), removed_fixture_ids
+
     def get_global_items(self, global_types, restore_state):
         domain = restore_state.restore_user.domain
         data_fn = partial(self._get_global_items, global_types, domain)
@@ -94,6 +168,51 @@ class ItemListsProvider(FixtureProvider):
 
         return self._get_fixtures(user_types, get_items_by_type, restore_user.user_id)
 
+    def get_cached_user_items(self, user_types, restore_user, versions):
+        """Get the user item lists from the serialized items of each owner
+        (the user and its groups and locations) cached per data type
+        """
+        domain = restore_user.domain
+        owners = restore_user.get_fixture_data_item_owners()
+        cache = get_redis_default_cache()
+        keys = {
+            (data_type_id, owner): _get_user_items_cache_key(domain, versions[data_type_id], data_type_id, owner)
+            for data_type_id in user_types
+            for owner in owners
+        }
+        cached = cache.get_many(list(keys.values())) if keys else {}
+        missing_owners = {owner for (data_type_id, owner), key in keys.items() if key not in cached}
+        if missing_owners:
+            new_entries = {}
+            items_by_owner = FixtureDataItem.by_owners(domain, list(missing_owners))
+            for owner in missing_owners:
+                items_by_type = defaultdict(list)
+                for item in items_by_owner.get(owner, []):
+                    data_type = user_types.get(item.data_type_id)
+                    if data_type:
+                        self._set_cached_type(item, data_type)
+                        items_by_type[item.data_type_id].append(
+                            (item.sort_key, item.get_id, ElementTree.tostring(item.to_xml(), encoding='utf-8'))
+                        )
+                for data_type_id in user_types:
+                    new_entries[keys[(data_type_id, owner)]] = items_by_type[data_type_id]
+            cache.set_many(new_entries, timeout=USER_ITEMS_CACHE_TIMEOUT)
+            cached.update(new_entries)
+
+        fixtures = []
+        for data_type in sorted(user_types.values(), key=attrgetter('tag')):
+            items_by_id = {}
+            for owner in owners:
+                for sort_key, item_id, item_xml in cached[keys[(data_type._id, owner)]]:
+                    items_by_id[item_id] = (sort_key, item_xml)
+            items = sorted(items_by_id.values(), key=itemgetter(0))
+            if data_type.is_indexed:
+                fixtures.append(self._get_schema_element(data_type))
+            fixtures.append(self._get_fixture_bytes(
+                data_type, restore_user.user_id, [item_xml for sort_key, item_xml in items]
+            ))
+        return fixtures
+
     def _set_cached_type(self, item, data_type):
         # set the cached version used by the object so that it doesn't
         # have to do another db trip later
@@ -108,9 +227,20 @@ class ItemListsProvider(FixtureProvider):
             fixtures.append(self._get_fixture_element(data_type, user_id, items))
         return fixtures
 
+    def _get_fixture_id(self, data_type):
+        return ':'.join((self.id, data_type.tag))
+
+    def _get_fixture_bytes(self, data_type, user_id, items_xml):
+        fixture_element = self._get_fixture_element(data_type, user_id, [])
+        fixture_element[0].text = ITEMS_PLACEHOLDER
+        head, tail = ElementTree.tostring(fixture_element, encoding='utf-8').split(
+            ITEMS_PLACEHOLDER.encode('utf-8')
+        )
+        return head + b''.join(items_xml) + tail
+
     def _get_fixture_element(self, data_type, user_id, items):
         attrib = {
-            'id': ':'.join((self.id, data_type.tag)),
+            'id': self._get_fixture_id(data_type),
             'user_id': user_id
         }
         if data_type.is_indexed:
@@ -128,4 +258,15 @@ class ItemListsProvider(FixtureProvider):
         return get_index_schema_node(fixture_id, attrs_to_index)
 
 
+def _get_user_items_cache_key(domain, version, data_type_id, owner):
+    owner_type, owner_id = owner
+    return '{}:{}'.format(USER_ITEMS_CACHE_KEY_PREFIX, ','.join([
+        domain, version, data_type_id, owner_type, owner_id
+    ]))
+
+
+def _get_hash(value):
+    return hashlib.md5(repr(value).encode('utf-8')).hexdigest()
+
+
 item_lists = ItemListsProvider()
@@ -1,4 +1,6 @@
+from collections import defaultdict, namedtuple
 from datetime import datetime
+from itertools import chain
 from xml.etree import cElementTree as ElementTree
 
 from django.db import models
@@ -32,6 +34,7 @@ from corehq.apps.fixtures.exceptions import (
 )
 from corehq.apps.fixtures.utils import (
     clean_fixture_field_name,
+    clear_fixture_cache,
     get_fields_without_attributes,
     remove_deleted_ownerships,
 )
@@ -244,14 +247,35 @@ class FixtureDataItem(Document):
             self._data_type = FixtureDataType.get(self.data_type_id)
         return self._data_type
 
+    def save(self, *args, **kwargs):
+        super(FixtureDataItem, self).save(*args, **kwargs)
+        self.clear_fixture_cache()
+
+    def delete(self):
+        super(FixtureDataItem, self).delete()
+        self.clear_fixture_cache()
+
+    def clear_fixture_cache(self):
+        # cached and previously synced user item lists are keyed by the
+        # version of their data type, so every write must change it
+        clear_fixture_cache(self.domain, [self.data_type_id])
+
+    def _clear_fixture_cache_on_commit(self, transaction):
+        action = _ClearFixtureCache(self.domain, self.data_type_id)
+        # items written together usually share a data type, so only clear it once
+        if action not in transaction.post_commit_actions:
+            transaction.add_post_commit_action(action)
+
     def add_owner(self, owner, owner_type, transaction=None):
         assert(owner.domain == self.domain)
         with transaction or CouchTransaction() as transaction:
             o = FixtureOwnership(domain=self.domain, owner_type=owner_type, owner_id=owner.get_id, data_item_id=self.get_id)
             transaction.save(o)
+            self._clear_fixture_cache_on_commit(transaction)
         return o
 
-    def remove_owner(self, owner, owner_type):
+    def remove_owner(self, owner, owner_type, transaction=None):
+        removed = False
         for ownership in FixtureOwnership.view('fixtures/ownership',
             key=[self.domain, 'by data_item and ' + owner_type, self.get_id, owner.get_id],
             reduce=False,
@@ -259,6 +283,7 @@ class FixtureDataItem(Document):
         ):
             try:
                 ownership.delete()
+                removed = True
             except ResourceNotFound:
                 # looks like it was already deleted
                 pass
@@ -272,24 +297,29 @@ class FixtureDataItem(Document):
                     data_type_id=self.data_type_id,
                     domain=self.domain
                 ))
+        if removed:
+            if transaction:
+                self._clear_fixture_cache_on_commit(transaction)
+            else:
+                self.clear_fixture_cache()
 
     def add_user(self, user, transaction=None):
         return self.add_owner(user, 'user', transaction=transaction)
 
-    def remove_user(self, user):
-        return self.remove_owner(user, 'user')
+    def remove_user(self, user, transaction=None):
+        return self.remove_owner(user, 'user', transaction=transaction)
 
     def add_group(self, group, transaction=None):
         return self.add_owner(group, 'group', transaction=transaction)
 
-    def remove_group(self, group):
-        return self.remove_owner(group, 'group')
+    def remove_group(self, group, transaction=None):
+        return self.remove_owner(group, 'group', transaction=transaction)
 
     def add_location(self, location, transaction=None):
         return self.add_owner(location, 'location', transaction=transaction)
 
-    def remove_location(self, location):
-        return self.remove_owner(location, 'location')
+    def remove_location(self, location, transaction=None):
+        return self.remove_owner(location, 'location', transaction=transaction)
 
     def type_check(self):
         fields = set(self.fields.keys())
@@ -376,48 +406,86 @@ class FixtureDataItem(Document):
         return SQLLocation.objects.filter(location_id__in=loc_ids)
 
     @classmethod
-    def by_user(cls, user, wrap=True):
+    def get_owners_for_user(cls, user):
+        """
+        :returns: list of (owner_type, owner_id) of the owners whose items
+        are synced to ``user``
+        """
         group_ids = Group.by_user_id(user.user_id, wrap=False)
         loc_ids = user.sql_location.path if user.sql_location else []
-
-        def make_keys(owner_type, ids):
-            return [[user.domain, 'data_item by {}'.format(owner_type), id_]
-                    for id_ in ids]
-
-        fixture_ids = set(
-            FixtureOwnership.get_db().view('fixtures/ownership',
-                keys=(make_keys('user', [user.user_id]) +
-                      make_keys('group', group_ids) +
-                      make_keys('location', loc_ids)),
-                reduce=False,
-                wrapper=lambda r: r['value'],
-            )
+        return (
+            [('user', user.user_id)]
+            + [('group', group_id) for group_id in group_ids]
+            + [('location', loc_id) for loc_id in loc_ids]
         )
+
+    @classmethod
+    def by_user(cls, user, wrap=True):
+        item_ids_by_owner = cls._get_item_ids_by_owner(user.domain, cls.get_owners_for_user(user))
+        fixture_ids = set(chain.from_iterable(item_ids_by_owner.values()))
         if wrap:
-            results = cls.get_db().view('_all_docs', keys=list(fixture_ids), include_docs=True)
-
-            # sort the results into those corresponding to real documents
-            # and those corresponding to deleted or non-existent documents
-            docs = []
-            deleted_fixture_ids = set()
-
-            for result in results:
-                if result.get('doc'):
-                    docs.append(cls.wrap(result['doc']))
-                elif result.get('error'):
-                    assert result['error'] == 'not_found'
-                    deleted_fixture_ids.add(result['key'])
-                else:
-                    assert result['value']['deleted'] is True
-                    deleted_fixture_ids.add(result['id'])
-            if deleted_fixture_ids:
-                # delete ownership documents pointing deleted/non-existent fixture documents
-                # this cleanup is necessary since we used to not do this
-                remove_deleted_ownerships.delay(list(deleted_fixture_ids), user.domain)
-            return docs
+            return cls._get_existing_items(user.domain, fixture_ids)
         else:
             return fixture_ids
 
+    @classmethod
+    def by_owners(cls, domain, owners):
+        """
+        :param owners: list of (owner_type, owner_id)
+        :returns: dict of (owner_type, owner_id) -> list of the items owned by that owner
+        """
+        item_ids_by_owner = cls._get_item_ids_by_owner(domain, owners)
+        items_by_id = {
+            item.get_id: item
+            for item in cls._get_existing_items(domain, set(chain.from_iterable(item_ids_by_owner.values())))
+        }
+        return {
+            owner: [items_by_id[item_id] for item_id in item_ids if item_id in items_by_id]
+            for owner, item_ids in item_ids_by_owner.items()
+        }
+
+    @staticmethod
+    def _get_item_ids_by_owner(domain, owners):
+        item_ids_by_owner = defaultdict(list)
+        if not owners:
+            return item_ids_by_owner
+        rows = FixtureOwnership.get_db().view(
+            'fixtures/ownership',
+            keys=[[domain, 'data_item by {}'.format(owner_type), owner_id] for owner_type, owner_id in owners],
+            reduce=False,
+        )
+        for row in rows:
+            _, view_type, owner_id = row['key']
+            owner_type = view_type[len('data_item by '):]
+            item_ids_by_owner[(owner_type, owner_id)].append(row['value'])
+        return item_ids_by_owner
+
+    @classmethod
+    def _get_existing_items(cls, domain, fixture_ids):
+        if not fixture_ids:
+            return []
+        results = cls.get_db().view('_all_docs', keys=list(fixture_ids), include_docs=True)
+
+        # sort the results into those corresponding to real documents
+        # and those corresponding to deleted or non-existent documents
+        docs = []
+        deleted_fixture_ids = set()
+
+        for result in results:
+            if result.get('doc'):
+                docs.append(cls.wrap(result['doc']))
+            elif result.get('error'):
+                assert result['error'] == 'not_found'
+                deleted_fixture_ids.add(result['key'])
+            else:
+                assert result['value']['deleted'] is True
+                deleted_fixture_ids.add(result['id'])
+        if deleted_fixture_ids:
+            # delete ownership documents pointing deleted/non-existent fixture documents
+            # this cleanup is necessary since we used to not do this
+            remove_deleted_ownerships.delay(list(deleted_fixture_ids), domain)
+        return docs
+
     @classmethod
     def by_group(cls, group, wrap=True):
         fixture_ids = cls.get_db().view('fixtures/ownership',
@@ -474,6 +542,13 @@ class FixtureDataItem(Document):
     def recursive_delete(self, transaction):
         self.delete_ownerships(transaction)
         transaction.delete(self)
+        self._clear_fixture_cache_on_commit(transaction)
+
+
+class _ClearFixtureCache(namedtuple('_ClearFixtureCache', 'domain data_type_id')):
+
+    def __call__(self):
+        clear_fixture_cache(self.domain, [self.data_type_id])
 
 
 def _id_from_doc(doc_or_doc_id):
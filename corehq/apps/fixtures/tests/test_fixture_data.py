@@ -2,7 +2,12 @@ from xml.etree import cElementTree as ElementTree
 
 from django.test import TestCase
 
+import mock
+
+from dimagi.utils.couch.bulk import CouchTransaction
+
 from casexml.apps.case.tests.util import check_xml_line_by_line
+from casexml.apps.phone.models import SimplifiedSyncLog
 from casexml.apps.phone.tests.utils import \
     call_fixture_generator as call_fixture_generator_raw
 
@@ -21,9 +26,11 @@ from corehq.apps.fixtures.models import (
     FixtureOwnership,
     FixtureTypeField,
 )
+from corehq.apps.fixtures.utils import clear_fixture_cache
 from corehq.apps.users.dbaccessors.all_commcare_users import delete_all_users
 from corehq.apps.users.models import CommCareUser
 from corehq.blobs import get_blob_db
+from corehq.util.test_utils import flag_enabled
 
 
 def call_fixture_generator(user):
@@ -310,6 +317,107 @@ class FixtureDataTest(TestCase):
         fixtures = call_fixture_generator(sammy)
         self.assertEqual({item.attrib['user_id'] for item in fixtures}, {sammy.user_id})
 
+    def test_cached_user_items(self):
+        restore_user = self.user.to_ota_restore_user()
+        expected = [ElementTree.tostring(fixture) for fixture in call_fixture_generator(restore_user)]
+        with flag_enabled('CACHE_USER_ITEM_LISTS'):
+            # the first call populates the cache
+            for i in range(2):
+                fixtures = call_fixture_generator(restore_user)
+                self.assertEqual([ElementTree.tostring(fixture) for fixture in fixtures], expected)
+
+            self.data_item.remove_user(self.user)
+            fixture, = call_fixture_generator(restore_user)
+            check_xml_line_by_line(self, """
+            <fixture id="item-list:district" user_id="{}">
+                <district_list />
+            </fixture>
+            """.format(self.user.user_id), ElementTree.tostring(fixture))
+
+        self.fixture_ownership = self.data_item.add_user(self.user)
+
+    @flag_enabled('SKIP_UNCHANGED_ITEM_LISTS')
+    def test_skip_unchanged_item_lists(self):
+        restore_user = self.user.to_ota_restore_user()
+
+        def sync(last_sync_log=None):
+            restore_state = mock.Mock(
+                restore_user=restore_user,
+                last_sync_log=last_sync_log,
+                current_sync_log=SimplifiedSyncLog(),
+                overwrite_cache=False,
+            )
+            fixtures = fixturegenerators.item_lists(restore_state)
+            return restore_state.current_sync_log, [fixture.attrib['id'] for fixture in fixtures]
+
+        first_sync, fixture_ids = sync()
+        self.assertEqual(fixture_ids, ['item-list:district'])
+
+        second_sync, fixture_ids = sync(first_sync)
+        self.assertEqual(fixture_ids, [])
+        self.assertEqual(second_sync.fixture_hashes, first_sync.fixture_hashes)
+
+        clear_fixture_cache(self.domain, [self.data_type.get_id])
+        third_sync, fixture_ids = sync(second_sync)
+        self.assertEqual(fixture_ids, ['item-list:district'])
+
+        # fixtures of deleted data types are cleared
+        third_sync.fixture_hashes['item-list:deleted'] = 'abc123'
+        _, fixture_ids = sync(third_sync)
+        self.assertEqual(fixture_ids, ['item-list:deleted'])
+
+    def test_item_edits_clear_cached_user_items(self):
+        restore_user = self.user.to_ota_restore_user()
+
+        def district_names():
+            fixture, = call_fixture_generator(restore_user)
+            return [node.text for node in fixture.iter('district_name')]
+
+        with flag_enabled('CACHE_USER_ITEM_LISTS'):
+            self.assertEqual(district_names(), ['Delhi_in_HIN', 'Delhi_in_ENG'])
+
+            # as the lookup table item API does
+            item = FixtureDataItem.get(self.data_item.get_id)
+            item.fields['district_name'] = FieldList(field_list=[
+                FixtureItemField(field_value='New Delhi', properties={'lang': 'eng'}),
+            ])
+            item.save()
+            self.data_item = item
+            self.assertEqual(district_names(), ['New Delhi'])
+
+    @flag_enabled('SKIP_UNCHANGED_ITEM_LISTS')
+    def test_item_edits_are_not_skipped(self):
+        restore_user = self.user.to_ota_restore_user()
+
+        def sync(last_sync_log=None):
+            restore_state = mock.Mock(
+                restore_user=restore_user,
+                last_sync_log=last_sync_log,
+                current_sync_log=SimplifiedSyncLog(),
+                overwrite_cache=False,
+            )
+            fixtures = fixturegenerators.item_lists(restore_state)
+            return restore_state.current_sync_log, [fixture.attrib['id'] for fixture in fixtures]
+
+        first_sync, _ = sync()
+        self.data_item.sort_key = 2
+        self.data_item.save()
+        second_sync, fixture_ids = sync(first_sync)
+        self.assertEqual(fixture_ids, ['item-list:district'])
+
+        self.data_item.remove_user(self.user)
+        _, fixture_ids = sync(second_sync)
+        self.assertEqual(fixture_ids, ['item-list:district'])
+        self.fixture_ownership = self.data_item.add_user(self.user)
+
+    def test_owner_edits_in_a_transaction_clear_cache_on_commit(self):
+        with mock.patch('corehq.apps.fixtures.models.clear_fixture_cache') as clear_cache:
+            with CouchTransaction() as transaction:
+                self.data_item.remove_user(self.user, transaction=transaction)
+                self.fixture_ownership = self.data_item.add_user(self.user, transaction=transaction)
+                self.assertFalse(clear_cache.called)
+            clear_cache.assert_called_once_with(self.domain, [self.data_type.get_id])
+
     def make_data_type(self, name, is_global):
         data_type = FixtureDataType(
             domain=self.domain,
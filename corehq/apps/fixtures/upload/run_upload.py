@@ -94,7 +94,7 @@ def _run_fixture_upload(domain, workbook, replace=False, task=None):
                 return_val.errors.extend(err)
 
     clear_fixture_quickcache(domain, data_types)
-    clear_fixture_cache(domain)
+    clear_fixture_cache(domain, [data_type.get_id for data_type in data_types])
     return return_val
 
 
@@ -217,7 +217,8 @@ def _run_fast_fixture_upload(domain, workbook, task=None):
             # couch view hit which introduces another opportunity for failure
             delete_unneeded_fixture_data_item.delay(domain, existing_data_type._id)
             clear_fixture_quickcache(domain, [existing_data_type])
-        clear_fixture_cache(domain)
+        # the new data type has a new id, so only the global cache is stale
+        clear_fixture_cache(domain, [])
 
     return return_val
 
@@ -366,12 +367,13 @@ def _process_data_item(domain, replace, data_type, di, item_fields, item_attribu
 def _process_group_ownership(di, old_data_item, group_memoizer, transaction):
     """Removes groups from data items and add new ones based on the group column.
 
-    Note the removal does not happen within a context of the "transaction"
+    Note the removal does not happen within a context of the "transaction",
+    only the fixture cache is cleared when it is committed
     """
     errors = []
     old_groups = old_data_item.groups
     for group in old_groups:
-        old_data_item.remove_group(group)
+        old_data_item.remove_group(group, transaction=transaction)
 
     for group_name in di.get('group', []):
         group = group_memoizer.by_name(group_name)
@@ -389,14 +391,15 @@ def _process_group_ownership(di, old_data_item, group_memoizer, transaction):
 def _process_user_ownership(di, old_data_item, transaction):
     """Removes users from data items and add new ones based on the user column.
 
-    Note the removal does not happen within a context of the "transaction"
+    Note the removal does not happen within a context of the "transaction",
+    only the fixture cache is cleared when it is committed
     """
     errors = []
     domain = old_data_item.domain
 
     old_users = old_data_item.users
     for user in old_users:
-        old_data_item.remove_user(user)
+        old_data_item.remove_user(user, transaction=transaction)
 
     for raw_username in di.get('user', []):
         try:
@@ -409,7 +412,7 @@ def _process_user_ownership(di, old_data_item, transaction):
             continue
         user = CommCareUser.get_by_username(username)
         if user:
-            old_data_item.add_user(user)
+            old_data_item.add_user(user, transaction=transaction)
         else:
             errors.append(
                 _("Unknown user: '%(name)s'. But the row is successfully added")
@@ -422,13 +425,14 @@ def _process_user_ownership(di, old_data_item, transaction):
 def _process_location_ownership(di, old_data_item, get_location, transaction):
     """Removes locations from data items and add new ones based on the location column.
 
-    Note the removal does not happen within a context of the "transaction"
+    Note the removal does not happen within a context of the "transaction",
+    only the fixture cache is cleared when it is committed
     """
     errors = []
 
     old_locations = old_data_item.locations
     for location in old_locations:
-        old_data_item.remove_location(location)
+        old_data_item.remove_location(location, transaction=transaction)
 
     for name in di.get('location', []):
         location_cache = get_location(name)
@@ -1,14 +1,19 @@
 import re
+import uuid
 from xml.etree import cElementTree as ElementTree
 
 from celery.task import task
 
 from dimagi.utils.chunked import chunked
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
 
 from corehq.blobs import get_blob_db
 
 BAD_SLUG_PATTERN = r"([/\\<>\s])"
 
+ITEM_LIST_VERSION_KEY_PREFIX = 'item-list-version'
+ITEM_LIST_VERSION_TIMEOUT = 30 * 24 * 60 * 60
+
 
 def clean_fixture_field_name(field_name):
     """Effectively slugifies a fixture's field name so that we don't send
@@ -61,9 +66,51 @@ def get_index_schema_node(fixture_id, attrs_to_index):
     return node
 
 
-def clear_fixture_cache(domain):
+def clear_fixture_cache(domain, data_type_ids=None):
+    """Clear the cached global item lists of the domain and the cached
+    user item lists of ``data_type_ids`` (all data types by default)
+    """
     from corehq.apps.fixtures.models import FIXTURE_BUCKET
     get_blob_db().delete(key=FIXTURE_BUCKET + '/' + domain)
+    if data_type_ids is None:
+        version_keys = [_get_item_list_version_key(domain)]
+    else:
+        version_keys = [_get_item_list_version_key(domain, data_type_id) for data_type_id in data_type_ids]
+    if version_keys:
+        get_redis_default_cache().delete_many(version_keys)
+
+
+def get_item_list_versions(domain, data_type_ids):
+    """Get the current version of the item lists of each data type
+
+    The version of a data type changes whenever ``clear_fixture_cache`` is
+    called for it or for the whole domain, so it can be used to key cached
+    item lists.
+
+    :returns: dict of data type id -> version
+    """
+    cache = get_redis_default_cache()
+    domain_key = _get_item_list_version_key(domain)
+    keys_by_type = {
+        data_type_id: _get_item_list_version_key(domain, data_type_id)
+        for data_type_id in data_type_ids
+    }
+    all_keys = [domain_key] + list(keys_by_type.values())
+    versions = cache.get_many(all_keys)
+    for key in all_keys:
+        if key not in versions:
+            version = uuid.uuid4().hex
+            # another process may have set it first
+            cache.add(key, version, timeout=ITEM_LIST_VERSION_TIMEOUT)
+            versions[key] = cache.get(key) or version
+    return {
+        data_type_id: '{}.{}'.format(versions[domain_key], versions[key])
+        for data_type_id, key in keys_by_type.items()
+    }
+
+
+def _get_item_list_version_key(domain, data_type_id=''):
+    return '{}:{}:{}'.format(ITEM_LIST_VERSION_KEY_PREFIX, domain, data_type_id)
 
 
 @task(queue='background_queue')
@@ -195,9 +195,16 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
             self.valid_domains.append(domain)
         self.save()
 
-    def get_display_file(self, return_type=True):
+    def get_display_file(self, return_type=True, stream=False):
+        """
+        :param stream: return a file-like object rather than the file's
+        content. The caller is responsible for closing it.
+        """
         if self.attachment_id:
-            data = self.fetch_attachment(self.attachment_id, stream=True).read()
+            data = self.fetch_attachment(self.attachment_id, stream=True)
+            if not stream:
+                with data:
+                    data = data.read()
             if return_type:
                 content_type = self.blobs[self.attachment_id].content_type
                 return data, content_type
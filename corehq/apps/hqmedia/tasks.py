@@ -2,7 +2,9 @@ import itertools
 import json
 import os
 import re
+import shutil
 import tempfile
+import time
 import zipfile
 from wsgiref.util import FileWrapper
 
@@ -20,12 +22,20 @@ from corehq import toggles
 from corehq.apps.app_manager.dbaccessors import get_app
 from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache
 from corehq.apps.hqmedia.models import CommCareMultimedia
+from corehq.blobs import CODES, NotFound, get_blob_db
+from corehq.blobs.models import BlobMeta
 from corehq.util.files import file_extention_from_filename
 
 logging = get_task_logger(__name__)
 
 MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.png', '.gif', '.3gp', '.mp4', '.zip', )
 
+# files kept in memory while zipping to check the CCZ's locale ids
+LOCALE_CHECK_FILES = ('default/app_strings.txt', 'suite.xml')
+
+# minutes a CCZ of a build is kept for repeat downloads
+CCZ_CACHE_TIMEOUT = 30 * 24 * 60
+
 
 @task(serializer='pickle')
 def process_bulk_upload_zip(processing_id, domain, app_id, username=None, share_media=False,
@@ -151,12 +161,58 @@ def _get_file_path(app, include_multimedia_files, include_index_files, build_pro
     return fpath
 
 
+def _get_ccz_cache_name(build, include_multimedia_files, include_index_files, build_profile_id,
+                        compress_zip, download_targeted_version):
+    """
+    :returns: name the CCZ is stored under for repeat downloads or None
+    if it should not be stored
+    """
+    if not build.copy_of or toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
+        # apps change and cautious CCZs include a manifest of the download
+        return None
+    return "ccz/{}{}{}{}{}".format(
+        'mm' if include_multimedia_files else '',
+        'ccz' if include_index_files else '',
+        '-compressed' if compress_zip else '',
+        '-targeted' if download_targeted_version else '',
+        '-' + build_profile_id if build_profile_id else '',
+    )
+
+
+def _fetch_cached_ccz(build, cache_name, fpath):
+    """Write the stored CCZ of the build to ``fpath``
+
+    :returns: True if the CCZ was found
+    """
+    db = get_blob_db()
+    try:
+        meta = db.metadb.get(parent_id=build._id, type_code=CODES.app_ccz, name=cache_name)
+        with open(fpath, 'wb') as f:
+            db.download(meta.key, f)
+    except (BlobMeta.DoesNotExist, NotFound):
+        return False
+    return True
+
+
+def _cache_ccz(build, cache_name, fpath):
+    with open(fpath, 'rb') as f:
+        get_blob_db().put(
+            f,
+            domain=build.domain,
+            parent_id=build._id,
+            type_code=CODES.app_ccz,
+            name=cache_name,
+            content_type='application/zip',
+            timeout=CCZ_CACHE_TIMEOUT,
+        )
+
+
 def _build_ccz_files(build, build_profile_id, include_multimedia_files, include_index_files,
                      download_id, compress_zip, filename, download_targeted_version):
     from corehq.apps.hqmedia.views import iter_app_files
     files, errors, file_count = iter_app_files(
         build, include_multimedia_files, include_index_files, build_profile_id,
-        download_targeted_version=download_targeted_version,
+        download_targeted_version=download_targeted_version, stream_media=True,
     )
 
     if toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
@@ -182,10 +238,17 @@ def _zip_files_for_ccz(fpath, files, current_progress, file_progress, file_count
                 # don't compress multimedia files
                 extension = os.path.splitext(path)[1]
                 file_compression = zipfile.ZIP_STORED if extension in MULTIMEDIA_EXTENSIONS else compression
-                z.writestr(path, data, file_compression)
+                if hasattr(data, 'read'):
+                    # copy streamed files to the archive without reading them into memory
+                    info = zipfile.ZipInfo(path, date_time=time.localtime(time.time())[:6])
+                    info.compress_type = file_compression
+                    with data, z.open(info, 'w') as entry:
+                        shutil.copyfileobj(data, entry)
+                else:
+                    z.writestr(path, data, file_compression)
                 current_progress += file_progress / file_count
                 DownloadBase.set_progress(task, current_progress, 100)
-                if extension not in MULTIMEDIA_EXTENSIONS:
+                if path in LOCALE_CHECK_FILES:
                     file_cache[path] = data
     return file_cache
 
@@ -207,8 +270,15 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
     fpath = _get_file_path(build, include_multimedia_files, include_index_files, build_profile_id,
                            download_targeted_version)
 
+    cache_name = _get_ccz_cache_name(build, include_multimedia_files, include_index_files, build_profile_id,
+                                     compress_zip, download_targeted_version)
+
     # Don't rebuild the file if it is already there
-    if not (os.path.isfile(fpath) and settings.SHARED_DRIVE_CONF.transfer_enabled):
+    if os.path.isfile(fpath) and settings.SHARED_DRIVE_CONF.transfer_enabled:
+        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+    elif cache_name and _fetch_cached_ccz(build, cache_name, fpath):
+        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+    else:
         files, errors, file_count = _build_ccz_files(build, build_profile_id, include_multimedia_files,
                                                      include_index_files, download_id, compress_zip,
                                                      filename, download_targeted_version)
@@ -241,8 +311,8 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
         if errors:
             os.remove(fpath)
             raise Exception('\t' + '\t'.join(errors))
-    else:
-        DownloadBase.set_progress(task, current_progress + file_progress, 100)
+        if cache_name:
+            _cache_ccz(build, cache_name, fpath)
     if expose_link:
         _expose_download_link(fpath, filename, compress_zip, download_id)
     DownloadBase.set_progress(task, 100, 100)
@@ -272,7 +342,7 @@ def find_missing_locale_ids_in_ccz(file_cache):
         return errors
 
     # Each line of an app_strings.txt file is of the format "name.of.key=value of key"
-    # decode is necessary because Application._make_language_files calls .encode('utf-8')
+    # decode is necessary because Application._make_language_file calls .encode('utf-8')
     app_strings_ids = {
         line.decode("utf-8").split('=')[0]
         for line in file_cache['default/app_strings.txt'].splitlines()
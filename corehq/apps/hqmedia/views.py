@@ -778,7 +778,7 @@ class RemoveLogoView(BaseMultimediaView):
         return HttpResponse()
 
 
-def iter_media_files(media_objects):
+def iter_media_files(media_objects, stream=False):
     """
     take as input the output of get_media_objects
     and return an iterator of (path, data) tuples for the media files
@@ -788,13 +788,15 @@ def iter_media_files(media_objects):
     as a side effect of implementation,
     errors will not include all error messages until the iterator is exhausted
 
+    with stream=True data is a file-like object to be closed by the caller
+
     """
     errors = []
 
     def _media_files():
         for path, media in media_objects:
             try:
-                data, _ = media.get_display_file()
+                data, _ = media.get_display_file(stream=stream)
                 folder = path.replace(MULTIMEDIA_PREFIX, "")
                 if not isinstance(data, str):
                     yield os.path.join(folder), data
@@ -807,7 +809,8 @@ def iter_media_files(media_objects):
     return _media_files(), errors
 
 
-def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None, download_targeted_version=False):
+def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None,
+                   download_targeted_version=False, stream_media=False):
     file_iterator = []
     errors = []
     index_file_count = 0
@@ -815,7 +818,7 @@ def iter_app_files(app, include_multimedia_files, include_index_files, build_pro
     if include_multimedia_files:
         media_objects = list(app.get_media_objects(build_profile_id=build_profile_id, remove_unused=True))
         multimedia_file_count = len(media_objects)
-        file_iterator, errors = iter_media_files(media_objects)
+        file_iterator, errors = iter_media_files(media_objects, stream=stream_media)
     if include_index_files:
         index_files, index_file_errors, index_file_count = iter_index_files(
             app, build_profile_id=build_profile_id, download_targeted_version=download_targeted_version
@@ -1,28 +1,35 @@
-from django.db import models
-from django.db.models.expressions import Exists, F, Func, OuterRef, Value
+from django.contrib.postgres.fields import ArrayField
+from django.db import connection, connections, models, router, transaction
+from django.db.models.expressions import F, Func, Subquery
 from django.db.models.query import EmptyResultSet, Q, QuerySet
 
-from django_cte import With
-
 field = models.Field()  # generic output field type
 
 
-class str_array(Func):
-    function = "Array"
-    # HACK fool postgres with concat
-    # https://stackoverflow.com/a/12488455/10840 (see comment by KajMagnus)
-    template = "%(function)s[%(expressions)s || '']::varchar[]"
+class array_length(Func):
+    function = "array_length"
+    template = "%(function)s(%(expressions)s, 1)"
     output_field = field
 
 
-class array_append(Func):
-    function = "array_append"
-    output_field = field
+class unnest(Func):
+    function = "unnest"
+    output_field = models.IntegerField()
 
 
-class array_length(Func):
-    function = "array_length"
-    template = "%(function)s(%(expressions)s, 1)"
+class array_subquery(Subquery):
+    template = "ARRAY(%(subquery)s)"
+
+
+class path_ordering(Func):
+    """Array of the ordering column values along a node's tree path"""
+    # HACK fool postgres with concat
+    # https://stackoverflow.com/a/12488455/10840 (see comment by KajMagnus)
+    template = (
+        "ARRAY(SELECT _anc.%(column)s || '' FROM %(table)s _anc, "
+        "unnest(%(expressions)s) WITH ORDINALITY _path(id, n) "
+        "WHERE _anc.id = _path.id ORDER BY _path.n)::varchar[]"
+    )
     output_field = field
 
 
@@ -57,24 +64,12 @@ class AdjListManager(models.Manager):
         else:
             where = Q(id=node.parent_id)
 
-        def make_cte_query(cte):
-            return self.filter(where).order_by().annotate(
-                _depth=Value(0, output_field=field),
-            ).union(
-                cte.join(
-                    self.all().order_by(),
-                    id=cte.col.parent_id,
-                ).annotate(
-                    _depth=cte.col._depth + Value(1, output_field=field),
-                ),
-            )
-
-        cte = With.recursive(make_cte_query)
-        return (
-            cte.queryset()
-            .with_cte(cte)
-            .order_by(("" if ascending else "-") + "_depth")
-        )
+        ancestor_ids = self.filter(where).order_by().annotate(
+            _ancestor_id=unnest(F("tree_path")),
+        ).values("_ancestor_id")
+        return self.filter(id__in=ancestor_ids).annotate(
+            _depth=array_length(F("tree_path")),
+        ).order_by(("-" if ascending else "") + "_depth")
 
     def get_descendants(self, node, include_self=False):
         """Query node descendants
@@ -83,77 +78,42 @@ class AdjListManager(models.Manager):
         the adjacency list model. If a QuerySet, it should query a
         single value with something like `.values('id')`. If Q the
         `include_self` argument will be ignored.
-        :returns: A `QuerySet` instance.
+        :returns: A `QuerySet` instance ordered depth-first by the
+        model's `ordering_col_attr`.
         """
-        ordering_col = self.model.ordering_col_attr
-
-        discard_dups = False
         if isinstance(node, Q):
             where = node
-            discard_dups = True
-        elif include_self:
-            if isinstance(node, QuerySet):
-                if _is_empty(node):
-                    return self.none()
-                where = Q(id__in=node.order_by())
-                discard_dups = True
-            else:
-                where = Q(id=node.id)
         elif isinstance(node, QuerySet):
             if _is_empty(node):
                 return self.none()
-            where = Q(parent_id__in=node.order_by())
-            discard_dups = True
+            if include_self:
+                where = Q(id__in=node.order_by())
+            else:
+                where = Q(parent_id__in=node.order_by())
+        else:
+            where = None
+
+        if where is None:
+            query = self.filter(tree_path__contains=[node.id])
+            if not include_self:
+                query = query.exclude(id=node.id)
         else:
-            where = Q(parent_id=node.id)
-
-        def make_cte_query(cte):
-            return self.filter(where).order_by().annotate(
-                _cte_ordering=str_array(ordering_col),
-            ).union(
-                cte.join(
-                    self.all().order_by(),
-                    parent_id=cte.col.id,
-                ).annotate(
-                    _cte_ordering=array_append(
-                        cte.col._cte_ordering,
-                        F(ordering_col),
-                    )
-                ),
-                all=True,
-            )
-        cte = With.recursive(make_cte_query)
-        query = cte.queryset().with_cte(cte)
-
-        if discard_dups:
-            # Remove duplicates when the supplied Queryset or Q object
-            # may contain/match both parents and children. For a given
-            # id, retain the row with the longest path. TODO remove this
-            # and ensure duplicates do not matter or the criteria never
-            # matches both parents and children in all calling code.
-            xdups = With(
-                cte.queryset().annotate(
-                    max_len=array_length(
-                        F("_cte_ordering"),
-                        output_field=field
-                    ),
-                ).distinct("id").order_by(
-                    "id",
-                    "-max_len",
-                ).values(
-                    "id",
-                    "_cte_ordering",
-                ),
-                name="xdups"
-            )
-            query = query.annotate(
-                _exclude_dups=Exists(SubQueryset(xdups.queryset().filter(
-                    id=OuterRef("id"),
-                    _cte_ordering=OuterRef("_cte_ordering"),
-                )))
-            ).filter(_exclude_dups=True).with_cte(xdups)
-
-        return query.order_by(cte.col._cte_ordering)
+            # a node is a descendant of each node on its path, so this
+            # matches each descendant once even if `where` matches both
+            # a node and some of its descendants
+            root_ids = self.filter(where).order_by().values("id")
+            query = self.filter(tree_path__overlap=array_subquery(
+                SubQueryset(root_ids),
+                output_field=ArrayField(models.IntegerField()),
+            ))
+
+        opts = self.model._meta
+        return query.annotate(_path_ordering=path_ordering(
+            F("tree_path"),
+            table=connection.ops.quote_name(opts.db_table),
+            column=connection.ops.quote_name(
+                opts.get_field(self.model.ordering_col_attr).column),
+        )).order_by("_path_ordering")
 
     def get_queryset_ancestors(self, queryset, include_self=False):
         return self.get_ancestors(queryset, include_self=include_self)
@@ -170,15 +130,41 @@ class AdjListModel(models.Model):
 
     For more on adjacency lists, see
     https://explainextended.com/2009/09/24/adjacency-list-vs-nested-sets-postgresql/
+
+    Each node also stores its materialized path, the ids of its
+    ancestors and itself (root first), so that ancestors and
+    descendants can be queried with an (indexed) array lookup rather
+    than a recursive query. The path is maintained on save.
     """
 
     ordering_col_attr = 'name'
 
+    tree_path = ArrayField(models.IntegerField(), default=list)
+
     objects = AdjListManager()
 
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super(AdjListModel, self).save(*args, **kwargs)
+            self._update_tree_path(kwargs.get('using'))
+
+    def _update_tree_path(self, using=None):
+        """Set the tree path of this node and, if it moved, its descendants
+
+        Paths are computed from the database rather than from the paths
+        of in-memory instances, which may be stale.
+        """
+        table = connection.ops.quote_name(self._meta.db_table)
+        with connections[using or router.db_for_write(type(self))].cursor() as cursor:
+            cursor.execute(UPDATE_TREE_PATH_SQL.format(table=table), {
+                "id": self.id,
+                "parent_id": self.parent_id,
+            })
+            self.tree_path = cursor.fetchone()[0]
+
     def get_ancestors(self, **kw):
         """
         Returns a Queryset of all ancestor locations of this location
@@ -195,6 +181,29 @@ class AdjListModel(models.Model):
         return self.children.all()
 
 
+# Only rows whose path prefix (up to and including the saved node)
+# changed are updated, so saving a node that did not move only touches
+# its own row if its path was not set yet.
+UPDATE_TREE_PATH_SQL = """
+WITH new_path AS (
+    SELECT COALESCE(
+        (SELECT tree_path FROM {table} WHERE id = %(parent_id)s),
+        '{{}}'::integer[]
+    ) || %(id)s::integer AS path
+), updated AS (
+    UPDATE {table} node
+    SET tree_path = new_path.path || node.tree_path[
+        array_position(node.tree_path, %(id)s) + 1:array_length(node.tree_path, 1)
+    ]
+    FROM new_path
+    WHERE (node.id = %(id)s OR node.tree_path @> ARRAY[%(id)s::integer])
+        AND node.tree_path[1:array_position(node.tree_path, %(id)s)]
+            IS DISTINCT FROM new_path.path
+)
+SELECT path FROM new_path
+"""
+
+
 def _is_empty(queryset):
     query = queryset.query
     if query.is_empty():
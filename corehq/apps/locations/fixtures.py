@@ -1,14 +1,16 @@
+import hashlib
 from collections import defaultdict
 from itertools import groupby
 from xml.etree.cElementTree import Element, SubElement
 
 from django.contrib.postgres.fields.array import ArrayField
-from django.db.models import IntegerField, Q
+from django.db.models import Count, IntegerField, Max, Q
 
 from django_cte import With
 from django_cte.raw import raw_cte_sql
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.utils import GLOBAL_USER_ID, write_fixture_items_to_io
 
 from corehq import toggles
 from corehq.apps.app_manager.const import (
@@ -24,6 +26,11 @@ from corehq.apps.locations.models import (
     LocationType,
     SQLLocation,
 )
+from dimagi.utils.couch import CriticalSection
+from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
+
+FIXTURE_SNAPSHOT_CACHE_KEY_PREFIX = 'location-fixture-snapshot'
+FIXTURE_SNAPSHOT_CACHE_TIMEOUT = 24 * 60 * 60
 
 
 class LocationSet(object):
@@ -123,18 +130,67 @@ class LocationFixtureProvider(FixtureProvider):
             return []
 
         data_fields = _get_location_data_fields(restore_user.domain)
+        if toggles.CACHE_LOCATION_FIXTURES.enabled(restore_user.domain):
+            return self._get_cached_fixture(restore_state, locations_queryset, data_fields)
         return self.serializer.get_xml_nodes(self.id, restore_user, locations_queryset, data_fields)
 
+    def _get_cached_fixture(self, restore_state, locations_queryset, data_fields):
+        """Get the fixture from a snapshot shared by all users who sync the
+        same locations
+
+        Snapshots are keyed by the state of the domain's locations and
+        location types, so any change to them makes a new one.
+        """
+        restore_user = restore_state.restore_user
+        key = _get_fixture_snapshot_cache_key(self.id, restore_user, data_fields)
+        cache = get_redis_default_cache()
+
+        data = None if restore_state.overwrite_cache else cache.get(key)
+        if data is None:
+            with CriticalSection([key]):
+                if not restore_state.overwrite_cache:
+                    # re-check cache to avoid re-computing it
+                    data = cache.get(key)
+                if data is None:
+                    nodes = self.serializer.get_xml_nodes(
+                        self.id, restore_user, locations_queryset, data_fields, user_id=GLOBAL_USER_ID)
+                    data = write_fixture_items_to_io(nodes).read()
+                    cache.set(key, data, timeout=FIXTURE_SNAPSHOT_CACHE_TIMEOUT)
+
+        return [data.replace(GLOBAL_USER_ID.encode('utf-8'), restore_user.user_id.encode('utf-8'))]
+
+
+def _get_fixture_snapshot_cache_key(fixture_id, restore_user, data_fields):
+    domain = restore_user.domain
+    location_pks = _get_fixture_location_pks(restore_user)
+    state = (
+        SQLLocation.objects.filter(domain=domain).aggregate(Max('last_modified'), Count('id')),
+        LocationType.objects.filter(domain=domain).aggregate(Max('last_modified'), Count('id')),
+    )
+    key_data = repr((
+        fixture_id,
+        domain,
+        'all' if location_pks is None else sorted(location_pks),
+        [field.slug for field in data_fields],
+        sorted(state[0].items()),
+        sorted(state[1].items()),
+    ))
+    return '{}:{}:{}'.format(
+        FIXTURE_SNAPSHOT_CACHE_KEY_PREFIX,
+        domain,
+        hashlib.md5(key_data.encode('utf-8')).hexdigest(),
+    )
+
 
 class HierarchicalLocationSerializer(object):
 
     def should_sync(self, restore_user, app):
         return should_sync_hierarchical_fixture(restore_user.project, app)
 
-    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields):
+    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields, user_id=None):
         locations_db = LocationSet(locations_queryset)
 
-        root_node = Element('fixture', {'id': fixture_id, 'user_id': restore_user.user_id})
+        root_node = Element('fixture', {'id': fixture_id, 'user_id': user_id or restore_user.user_id})
         root_locations = locations_db.root_locations
 
         if root_locations:
@@ -154,7 +210,7 @@ class FlatLocationSerializer(object):
     def should_sync(self, restore_user, app):
         return should_sync_flat_fixture(restore_user.project, app)
 
-    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields):
+    def get_xml_nodes(self, fixture_id, restore_user, locations_queryset, data_fields, user_id=None):
 
         all_types = LocationType.objects.filter(domain=restore_user.domain).values_list(
             'code', flat=True
@@ -165,12 +221,12 @@ class FlatLocationSerializer(object):
 
         return [get_index_schema_node(fixture_id, attrs_to_index),
                 self._get_fixture_node(fixture_id, restore_user, locations_queryset,
-                                       location_type_attrs, data_fields)]
+                                       location_type_attrs, data_fields, user_id)]
 
     def _get_fixture_node(self, fixture_id, restore_user, locations_queryset,
-                          location_type_attrs, data_fields):
+                          location_type_attrs, data_fields, user_id=None):
         root_node = Element('fixture', {'id': fixture_id,
-                                        'user_id': restore_user.user_id,
+                                        'user_id': user_id or restore_user.user_id,
                                         'indexed': 'true'})
         outer_node = Element('locations')
         root_node.append(outer_node)
@@ -353,13 +409,28 @@ int_array = ArrayField(int_field)
 
 
 def get_location_fixture_queryset(user):
-    if toggles.SYNC_ALL_LOCATIONS.enabled(user.domain):
+    location_pks = _get_fixture_location_pks(user)
+    if location_pks is None:
         return SQLLocation.active_objects.filter(domain=user.domain).prefetch_related('location_type')
 
+    if not location_pks:
+        return SQLLocation.objects.none()
+
+    return _location_queryset_helper(user.domain, location_pks)
+
+
+def _get_fixture_location_pks(user):
+    """Get the pks of the locations the user's location fixture is built from
+
+    :returns: list of pks or `None` if all locations of the domain are synced
+    """
+    if toggles.SYNC_ALL_LOCATIONS.enabled(user.domain):
+        return None
+
     user_locations = user.get_sql_locations(user.domain)
 
     if user_locations.query.is_empty():
-        return user_locations
+        return []
 
     user_location_ids = list(user_locations.order_by().values_list("id", flat=True))
 
@@ -373,7 +444,7 @@ def get_location_fixture_queryset(user):
             list(SQLLocation.objects.filter(location_id__in=related_location_ids).values_list('id', flat=True))
         )
 
-    return _location_queryset_helper(user.domain, user_location_ids)
+    return user_location_ids
 
 
 def _location_queryset_helper(domain, location_pks):
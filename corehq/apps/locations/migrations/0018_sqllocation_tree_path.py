@@ -0,0 +1,43 @@
+# Generated by Django 1.11.20 on 2019-03-04 14:12
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0017_locationrelation_last_modified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sqllocation',
+            name='tree_path',
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.IntegerField(), default=list, size=None),
+        ),
+        migrations.RunSQL(
+            """
+            WITH RECURSIVE paths AS (
+                SELECT id, ARRAY[id] AS path
+                FROM locations_sqllocation
+                WHERE parent_id IS NULL
+                UNION ALL
+                SELECT loc.id, paths.path || loc.id
+                FROM locations_sqllocation loc
+                INNER JOIN paths ON loc.parent_id = paths.id
+            )
+            UPDATE locations_sqllocation
+            SET tree_path = paths.path
+            FROM paths
+            WHERE locations_sqllocation.id = paths.id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='sqllocation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tree_path'], name='locations_tree_path_gin'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from collections import defaultdict
 from datetime import datetime
 from functools import partial
 
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models, transaction
 from django.db.models import Q
 
@@ -334,7 +335,7 @@ class LocationManager(LocationQueriesMixin, AdjListManager):
         )
 
     def get_locations_and_children_ids(self, location_ids):
-        return list(self.get_locations_and_children(location_ids).location_ids())
+        return list(self.get_locations_and_children(location_ids).order_by().location_ids())
 
 
 class OnlyUnarchivedLocationManager(LocationManager):
@@ -441,15 +442,6 @@ class SQLLocation(AdjListModel):
 
     full_delete = delete
 
-    def get_descendants(self, include_self=False, **kwargs):
-        if include_self:
-            where = Q(domain=self.domain, id=self.id)
-        else:
-            where = Q(domain=self.domain, parent_id=self.id)
-        return SQLLocation.objects.get_descendants(
-            where, **kwargs
-        )
-
     def get_ancestors(self, include_self=False, **kwargs):
         where = Q(domain=self.domain, id=self.id if include_self else self.parent_id)
         return SQLLocation.objects.get_ancestors(
@@ -593,6 +585,9 @@ class SQLLocation(AdjListModel):
     class Meta(object):
         app_label = 'locations'
         unique_together = ('domain', 'site_code',)
+        indexes = [
+            GinIndex(fields=['tree_path'], name='locations_tree_path_gin'),
+        ]
 
     def __str__(self):
         return "{} ({})".format(self.name, self.domain)
@@ -14,6 +14,7 @@ from casexml.apps.phone.tests.utils import (
     call_fixture_generator,
     create_restore_user,
 )
+from casexml.apps.phone.utils import get_cached_items_with_count
 
 from corehq.apps.app_manager.tests.util import (
     TestXmlMixin,
@@ -32,6 +33,7 @@ from corehq.apps.users.models import CommCareUser
 from corehq.util.test_utils import flag_enabled, generate_cases
 
 from ..fixtures import (
+    HierarchicalLocationSerializer,
     LocationSet,
     _get_location_data_fields,
     _location_to_fixture,
@@ -192,6 +194,43 @@ class LocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
              'New York City', 'Manhattan', 'Queens', 'Brooklyn']
         )
 
+    @flag_enabled('HIERARCHICAL_LOCATION_FIXTURE')
+    @flag_enabled('CACHE_LOCATION_FIXTURES')
+    def test_cached_location_fixture(self):
+        other_user = create_restore_user(self.domain, 'other-user', '123')
+        self.addCleanup(other_user._couch_user.delete)
+        for user in [self.user, other_user]:
+            user._couch_user.set_location(self.locations['Suffolk'])
+
+        def get_fixture(user):
+            fixture, = call_fixture_generator(location_fixture_generator, user)
+            fixture, num_items = get_cached_items_with_count(fixture)
+            self.assertEqual(num_items, 1)
+            return fixture
+
+        with mock.patch.object(HierarchicalLocationSerializer, 'get_xml_nodes',
+                               wraps=location_fixture_generator.serializer.get_xml_nodes) as get_xml_nodes:
+            self.assertXmlEqual(
+                self._assemble_expected_fixture('simple_fixture',
+                                                ['Massachusetts', 'Suffolk', 'Boston', 'Revere']),
+                get_fixture(self.user),
+            )
+            other_fixture = get_fixture(other_user)
+            self.assertEqual(get_xml_nodes.call_count, 1)
+            self.assertIn(other_user.user_id.encode('utf-8'), other_fixture)
+            self.assertNotIn(self.user.user_id.encode('utf-8'), other_fixture)
+
+            boston = self.locations['Boston']
+            boston.name = 'Beantown'
+            boston.save()
+            self.addCleanup(self._rename_location, boston, 'Boston')
+            self.assertIn(b'Beantown', get_fixture(other_user))
+            self.assertEqual(get_xml_nodes.call_count, 2)
+
+    def _rename_location(self, location, name):
+        location.name = name
+        location.save()
+
     def test_all_locations_flag_returns_all_locations(self):
         with flag_enabled('SYNC_ALL_LOCATIONS'):
             self._assert_fixture_matches_file(
@@ -208,3 +208,74 @@ class TestDeleteLocations(LocationHierarchyPerTest):
             SQLLocation.objects.all().values_list('name', flat=True),
             ['Massachusetts', 'Middlesex', 'Somerville']
         )
+
+
+class TestLocationTreePath(LocationHierarchyPerTest):
+    location_type_names = ['state', 'county', 'city']
+    location_structure = [
+        ('Massachusetts', [
+            ('Middlesex', [
+                ('Cambridge', []),
+                ('Somerville', []),
+            ]),
+            ('Suffolk', [
+                ('Boston', []),
+            ])
+        ]),
+        ('California', [
+            ('Los Angeles', []),
+        ])
+    ]
+
+    def assertTreePath(self, name, path_names):
+        location = SQLLocation.objects.get(domain=self.domain, name=name)
+        self.assertEqual(location.tree_path, [self.locations[n].id for n in path_names])
+
+    def test_tree_path(self):
+        self.assertTreePath('Massachusetts', ['Massachusetts'])
+        self.assertTreePath('Cambridge', ['Massachusetts', 'Middlesex', 'Cambridge'])
+        self.assertEqual(self.locations['Boston'].tree_path,
+                         [self.locations[n].id for n in ['Massachusetts', 'Suffolk', 'Boston']])
+
+    def test_descendants_ordering(self):
+        self.assertEqual(
+            [loc.name for loc in self.locations['Massachusetts'].get_descendants(include_self=True)],
+            ['Massachusetts', 'Middlesex', 'Cambridge', 'Somerville', 'Suffolk', 'Boston']
+        )
+        self.assertEqual(
+            [loc.name for loc in SQLLocation.objects.get_queryset_descendants(
+                SQLLocation.objects.filter(domain=self.domain, name__in=['Middlesex', 'Cambridge']),
+                include_self=True,
+            )],
+            ['Middlesex', 'Cambridge', 'Somerville']
+        )
+
+    def test_move_location(self):
+        middlesex = self.locations['Middlesex']
+        middlesex.parent = self.locations['California']
+        middlesex.save()
+
+        self.assertTreePath('Middlesex', ['California', 'Middlesex'])
+        self.assertTreePath('Somerville', ['California', 'Middlesex', 'Somerville'])
+        self.assertTreePath('Boston', ['Massachusetts', 'Suffolk', 'Boston'])
+        self.assertItemsEqual(
+            [loc.name for loc in self.locations['California'].get_descendants()],
+            ['Middlesex', 'Cambridge', 'Somerville', 'Los Angeles']
+        )
+        self.assertEqual(
+            [loc.name for loc in SQLLocation.objects.get(name='Cambridge').get_ancestors()],
+            ['California', 'Middlesex']
+        )
+
+    def test_save_stale_descendant(self):
+        cambridge = SQLLocation.objects.get(domain=self.domain, name='Cambridge')
+        middlesex = self.locations['Middlesex']
+        middlesex.parent = self.locations['California']
+        middlesex.save()
+
+        cambridge.name = 'Cambridge, CA'
+        cambridge.save()
+        self.assertEqual(
+            SQLLocation.objects.get(id=cambridge.id).tree_path,
+            [self.locations[n].id for n in ['California', 'Middlesex', 'Cambridge']]
+        )
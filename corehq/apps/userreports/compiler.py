@@ -0,0 +1,470 @@
+"""
+Compiles the expression, filter and indicator trees of a data source into
+flat python functions.
+
+Built expression trees are evaluated one node at a time, each node being a
+``JsonObject`` with its own ``__call__`` and (for named expressions) context
+cache lookups. For data sources with many indicators that adds up to most of
+the time spent processing a document.
+
+The compiler walks the configured trees once and generates the source of two
+functions per data source:
+
+    filter(doc, context) -> bool
+    get_values(item, context) -> [ColumnValue, ...]
+
+While doing that it:
+
+* inlines the supported node types (see ``_ExpressionCompiler._compile_expression``
+  and ``_compile_filter``), calling any other node as it would have been called
+* folds constants, e.g. a ``conditional`` with a constant test only compiles one branch
+* evaluates identical sub-expressions (same spec, same item) at most once per
+  call even if they are used by several indicators
+
+Anything the compiler doesn't know about is called as-is so compiled data sources
+always return the same values as the uncompiled ones.
+"""
+import json
+import threading
+from collections import Counter, OrderedDict, namedtuple
+
+from corehq.apps.userreports.expressions.getters import (
+    safe_recursive_lookup,
+    transform_from_datatype,
+)
+from corehq.apps.userreports.expressions.specs import (
+    ArrayIndexExpressionSpec,
+    CoalesceExpressionSpec,
+    ConditionalExpressionSpec,
+    ConstantGetterSpec,
+    IdentityExpressionSpec,
+    NamedExpressionSpec,
+    NestedExpressionSpec,
+    PropertyNameGetterSpec,
+    PropertyPathGetterSpec,
+    RootDocExpressionSpec,
+    SwitchExpressionSpec,
+)
+from corehq.apps.userreports.filters import (
+    ANDFilter,
+    NamedFilter,
+    NOTFilter,
+    ORFilter,
+    SinglePropertyValueFilter,
+)
+from corehq.apps.userreports.indicators import (
+    BooleanIndicator,
+    ColumnValue,
+    CompoundIndicator,
+    RawIndicator,
+)
+
+_MISSING = object()
+_NOT_CONSTANT = object()
+
+
+class CompilationError(Exception):
+    pass
+
+
+class _Value(namedtuple('_Value', ['code', 'key', 'constant'])):
+    """
+    The result of compiling a node.
+
+    :param code: python expression that evaluates to the node's value. Always a
+                 variable name so that it can be used more than once.
+    :param key: hashable key that identifies the value for sharing
+    :param constant: the value if known at compile time
+    """
+
+    def __new__(cls, code, key, constant=_NOT_CONSTANT):
+        return super(_Value, cls).__new__(cls, code, key, constant)
+
+    @property
+    def is_constant(self):
+        return self.constant is not _NOT_CONSTANT
+
+
+def _array_index(array_value, index_value):
+    # same as ArrayIndexExpressionSpec.__call__
+    if not isinstance(array_value, list) or not isinstance(index_value, int):
+        return None
+    try:
+        return array_value[index_value]
+    except IndexError:
+        return None
+
+
+class _ExpressionCompiler(object):
+    """
+    Generates the body of one function. Compilation is run twice: the first
+    pass only counts how often each (node, item) pair occurs so that the second
+    pass knows which values are worth sharing.
+    """
+
+    def __init__(self, namespace, counts=None):
+        self.namespace = namespace
+        self.counts = counts
+        self.seen = Counter()
+        self.lines = []
+        self.memo_vars = []
+        self._indent = 1
+        self._var_count = 0
+        self._memo = {}
+        # memo vars that are definitely assigned in the current branch
+        self._assigned = [set()]
+
+    @property
+    def counting(self):
+        return self.counts is None
+
+    def emit(self, line):
+        self.lines.append('    ' * self._indent + line)
+
+    def new_var(self, prefix='_v'):
+        self._var_count += 1
+        return '{}{}'.format(prefix, self._var_count)
+
+    def constant(self, value, key=None):
+        name = '_k{}'.format(len(self.namespace))
+        self.namespace[name] = value
+        return _Value(name, key or ('constant', name), value)
+
+    def reference(self, obj):
+        """Make ``obj`` available to the generated code, returning its name"""
+        name = '_o{}'.format(len(self.namespace))
+        self.namespace[name] = obj
+        return name
+
+    def assign(self, code, key):
+        var = self.new_var()
+        self.emit('{} = {}'.format(var, code))
+        return _Value(var, key)
+
+    def _enter_branch(self, condition):
+        self.emit(condition)
+        self._indent += 1
+        self._assigned.append(set(self._assigned[-1]))
+
+    def _exit_branch(self):
+        self._indent -= 1
+        self._assigned.pop()
+
+    def shared(self, key, compile_fn):
+        """
+        Compile a node at most once per evaluation if it occurs more than once.
+        """
+        self.seen[key] += 1
+        if key in self._memo:
+            value = self._memo[key]
+            if value.is_constant or value.code in self._assigned[-1]:
+                return value
+        elif self.counting or self.counts[key] < 2:
+            return compile_fn()
+
+        if key not in self._memo:
+            var = self.new_var('_m')
+            self.memo_vars.append(var)
+            self._memo[key] = _Value(var, key)
+        var = self._memo[key].code
+        start = len(self.lines)
+        self._enter_branch('if {} is _MISSING:'.format(var))
+        value = compile_fn()
+        self.emit('{} = {}'.format(var, value.code))
+        self._exit_branch()
+        if value.is_constant:
+            del self.lines[start:]
+            self.memo_vars.remove(var)
+            self._memo[key] = value
+            return value
+        self._assigned[-1].add(var)
+        return self._memo[key]
+
+    def expression(self, expression, item):
+        while isinstance(expression, NamedExpressionSpec):
+            expression = expression._context.named_expressions[expression.name]
+        key = (_node_key(expression), item.key)
+        return self.shared(key, lambda: self._compile_expression(expression, item, key))
+
+    def filter(self, filter_, item):
+        while isinstance(filter_, NamedFilter):
+            filter_ = filter_.filter
+        key = (_node_key(filter_), item.key)
+        return self.shared(key, lambda: self._compile_filter(filter_, item, key))
+
+    def _compile_expression(self, expression, item, key):
+        if isinstance(expression, IdentityExpressionSpec):
+            return item
+        elif isinstance(expression, ConstantGetterSpec):
+            return self.constant(expression.constant, key)
+        elif isinstance(expression, PropertyNameGetterSpec):
+            name = self.expression(expression._property_name_expression, item)
+            value = self.assign('{item}.get({name}) if isinstance({item}, dict) else None'.format(
+                item=item.code, name=name.code), key)
+            return self._transform(value, expression.datatype)
+        elif isinstance(expression, PropertyPathGetterSpec):
+            value = self.assign('_safe_recursive_lookup({}, {})'.format(
+                item.code, self.constant(expression.property_path).code), key)
+            return self._transform(value, expression.datatype)
+        elif isinstance(expression, RootDocExpressionSpec):
+            return self.expression(expression._expression_fn, _Value('_root', 'root_doc'))
+        elif isinstance(expression, NestedExpressionSpec):
+            argument = self.expression(expression._argument_expression, item)
+            return self.expression(expression._value_expression, argument)
+        elif isinstance(expression, ConditionalExpressionSpec):
+            test = self.filter(expression._test_function, item)
+            if test.is_constant:
+                chosen = expression._true_expression if test.constant else expression._false_expression
+                return self.expression(chosen, item)
+            return self._if_else(key, test.code, [
+                lambda: self.expression(expression._true_expression, item),
+                lambda: self.expression(expression._false_expression, item),
+            ])
+        elif isinstance(expression, SwitchExpressionSpec):
+            return self._switch(expression, item, key)
+        elif isinstance(expression, CoalesceExpressionSpec):
+            value = self.expression(expression._expression, item)
+            if value.is_constant:
+                if value.constant is None or value.constant == '':
+                    return self.expression(expression._default_expression, item)
+                return value
+            return self._if_else(key, '{0} is None or {0} == \'\''.format(value.code), [
+                lambda: self.expression(expression._default_expression, item),
+                lambda: value,
+            ])
+        elif isinstance(expression, ArrayIndexExpressionSpec):
+            array_value = self.expression(expression._array_expression, item)
+            index_value = self.expression(expression._index_expression, item)
+            return self.assign('_array_index({}, {})'.format(array_value.code, index_value.code), key)
+        return self._call(expression, item, key)
+
+    def _compile_filter(self, filter_, item, key):
+        if isinstance(filter_, (ANDFilter, ORFilter)):
+            return self._and_or(filter_, item, key)
+        elif isinstance(filter_, NOTFilter):
+            value = self.filter(filter_._filter, item)
+            if value.is_constant:
+                return self.constant(not value.constant, key)
+            return self.assign('not {}'.format(value.code), key)
+        elif isinstance(filter_, SinglePropertyValueFilter):
+            value = self.expression(filter_.expression, item)
+            reference = self.expression(filter_.reference_expression, item)
+            if value.is_constant and reference.is_constant:
+                try:
+                    return self.constant(filter_.operator(value.constant, reference.constant), key)
+                except Exception:
+                    # e.g. a TypeError comparing mismatched types: leave it to
+                    # raise when the filter is run, as the uncompiled filter would
+                    pass
+            return self.assign('{}({}, {})'.format(
+                self.reference(filter_.operator), value.code, reference.code), key)
+        return self._call(filter_, item, key)
+
+    def _call(self, node, item, key):
+        return self.assign('{}({}, context)'.format(self.reference(node), item.code), key)
+
+    def _transform(self, value, datatype):
+        self.emit('{var} = {transform}({var})'.format(
+            var=value.code, transform=self.reference(_get_transform(datatype))))
+        return value
+
+    def _if_else(self, key, condition, branches):
+        var = self.new_var()
+        for statement, compile_branch in zip(['if {}:'.format(condition), 'else:'], branches):
+            self._enter_branch(statement)
+            self.emit('{} = {}'.format(var, compile_branch().code))
+            self._exit_branch()
+        return _Value(var, key)
+
+    def _switch(self, expression, item, key):
+        switch_value = self.expression(expression._switch_on_expression, item)
+        if switch_value.is_constant:
+            for case in expression.cases:
+                if switch_value.constant == case:
+                    return self.expression(expression._case_expressions[case], item)
+            return self.expression(expression._default_expression, item)
+
+        var = self.new_var()
+        statement = 'if'
+        for case in expression.cases:
+            self._enter_branch('{} {} == {}:'.format(statement, switch_value.code, self.constant(case).code))
+            self.emit('{} = {}'.format(var, self.expression(expression._case_expressions[case], item).code))
+            self._exit_branch()
+            statement = 'elif'
+        if not expression.cases:
+            return self.expression(expression._default_expression, item)
+        self._enter_branch('else:')
+        self.emit('{} = {}'.format(var, self.expression(expression._default_expression, item).code))
+        self._exit_branch()
+        return _Value(var, key)
+
+    def _and_or(self, filter_, item, key):
+        # short circuits like all() / any() without nesting a level per sub-filter
+        is_and = isinstance(filter_, ANDFilter)
+        var = None
+        for sub_filter in filter_.filters:
+            if var is None:
+                value = self.filter(sub_filter, item)
+            else:
+                start = len(self.lines)
+                self._enter_branch('if {}{}:'.format('' if is_and else 'not ', var))
+                value = self.filter(sub_filter, item)
+            if value.is_constant and bool(value.constant) != is_and:
+                # False in an AND or True in an OR decides it
+                if var is None:
+                    return self.constant(not is_and, key)
+                self.emit('{} = {}'.format(var, not is_and))
+                self._exit_branch()
+                return _Value(var, key)
+            if var is None:
+                if not value.is_constant:
+                    var = self.new_var()
+                    self.emit('{} = bool({})'.format(var, value.code))
+            else:
+                if not value.is_constant:
+                    self.emit('{} = bool({})'.format(var, value.code))
+                self._exit_branch()
+                if len(self.lines) == start + 1:
+                    # nothing to do in the branch
+                    del self.lines[start:]
+        if var is None:
+            # every sub-filter was a constant that didn't decide the outcome
+            return self.constant(is_and, key)
+        return _Value(var, key)
+
+    def indicator(self, indicator, item):
+        if isinstance(indicator, CompoundIndicator):
+            for sub_indicator in indicator.indicators:
+                self.indicator(sub_indicator, item)
+        elif isinstance(indicator, BooleanIndicator):
+            value = self.filter(indicator.filter, item)
+            self.emit('_values.append(_ColumnValue({}, 1 if {} else 0))'.format(
+                self.reference(indicator.column), value.code))
+        elif isinstance(indicator, RawIndicator):
+            value = self.expression(indicator.getter, item)
+            self.emit('_values.append(_ColumnValue({}, {}))'.format(
+                self.reference(indicator.column), value.code))
+        else:
+            self.emit('_values.extend({}.get_values({}, context))'.format(
+                self.reference(indicator), item.code))
+
+
+def _node_key(node):
+    if isinstance(node, NamedExpressionSpec):
+        return 'named_expression', node.name
+    elif isinstance(node, NamedFilter):
+        return 'named_filter', node.filter_name
+    elif isinstance(node, (ANDFilter, ORFilter)):
+        return type(node).__name__, tuple(_node_key(f) for f in node.filters)
+    elif isinstance(node, NOTFilter):
+        return 'not', _node_key(node._filter)
+    elif isinstance(node, SinglePropertyValueFilter):
+        return ('compare', _node_key(node.expression), node.operator.__name__,
+                _node_key(node.reference_expression))
+    elif isinstance(node, (
+        IdentityExpressionSpec, ConstantGetterSpec, PropertyNameGetterSpec, PropertyPathGetterSpec,
+        RootDocExpressionSpec, NestedExpressionSpec, ConditionalExpressionSpec, SwitchExpressionSpec,
+        CoalesceExpressionSpec, ArrayIndexExpressionSpec,
+    )):
+        return 'spec', json.dumps(node.to_json(), sort_keys=True, default=str)
+    # not something we compile so only share with itself
+    return 'object', id(node)
+
+
+_transforms = {}
+
+
+def _get_transform(datatype):
+    if datatype not in _transforms:
+        _transforms[datatype] = transform_from_datatype(datatype)
+    return _transforms[datatype]
+
+
+def _generate_function(name, namespace, compile_body):
+    """
+    :param compile_body: function taking an ``_ExpressionCompiler`` and an item ``_Value``
+                         that compiles the function body, returning the lines that
+                         end the function
+    """
+    counting_compiler = _ExpressionCompiler(dict(namespace))
+    compile_body(counting_compiler, _Value('item', 'item'))
+
+    compiler = _ExpressionCompiler(namespace, counts=counting_compiler.seen)
+    return_lines = compile_body(compiler, _Value('item', 'item'))
+    lines = ['def {}(item, context):'.format(name), '    _root = context.root_doc']
+    if compiler.memo_vars:
+        lines.append('    {} = _MISSING'.format(' = '.join(compiler.memo_vars)))
+    return '\n'.join(lines + compiler.lines + return_lines)
+
+
+class CompiledDataSource(object):
+    """
+    Compiled versions of a data source's main filter and indicators.
+    The generated code is kept in ``source`` for debugging.
+    """
+
+    def __init__(self, filter_fn, get_values_fn, source):
+        self.filter = filter_fn
+        self.get_values = get_values_fn
+        self.source = source
+
+
+def compile_data_source(config):
+    """
+    :raises: CompilationError if the data source could not be compiled
+    """
+    namespace = {
+        '_MISSING': _MISSING,
+        '_ColumnValue': ColumnValue,
+        '_safe_recursive_lookup': safe_recursive_lookup,
+        '_array_index': _array_index,
+    }
+
+    def filter_body(compiler, item):
+        value = compiler.filter(config._get_main_filter(), item)
+        return ['    return bool({})'.format(value.code)]
+
+    def get_values_body(compiler, item):
+        compiler.emit('_values = []')
+        compiler.indicator(config.indicators, item)
+        return ['    return _values']
+
+    source = '\n\n'.join([
+        _generate_function('filter', namespace, filter_body),
+        _generate_function('get_values', namespace, get_values_body),
+    ])
+    try:
+        code = compile(source, '<compiled data source {}>'.format(config._id), 'exec')
+    except (SyntaxError, RecursionError) as e:
+        # e.g. trees nested deeper than python allows blocks to be indented
+        raise CompilationError(str(e))
+    exec(code, namespace)
+    return CompiledDataSource(namespace['filter'], namespace['get_values'], source)
+
+
+MAX_CACHED_DATA_SOURCES = 500
+_compiled_by_rev = OrderedDict()
+_compiled_by_rev_lock = threading.Lock()
+
+
+def get_compiled_data_source(config):
+    """
+    Returns the compiled data source, cached in memory per revision of the config.
+    Returns None if the data source could not be compiled.
+    """
+    key = (config._id, config._rev) if config._id and config._rev else None
+    with _compiled_by_rev_lock:
+        if key in _compiled_by_rev:
+            _compiled_by_rev.move_to_end(key)
+            return _compiled_by_rev[key]
+
+    try:
+        compiled = compile_data_source(config)
+    except CompilationError:
+        compiled = None
+    if key:
+        with _compiled_by_rev_lock:
+            _compiled_by_rev[key] = compiled
+            if len(_compiled_by_rev) > MAX_CACHED_DATA_SOURCES:
+                _compiled_by_rev.popitem(last=False)
+    return compiled
@@ -0,0 +1,177 @@
+from collections import defaultdict
+
+from corehq.apps.change_feed.data_sources import (
+    get_document_store_for_doc_type,
+)
+from corehq.apps.userreports.expressions.list_specs import (
+    FilterItemsExpressionSpec,
+    FlattenExpressionSpec,
+    MapItemsExpressionSpec,
+    ReduceItemsExpressionSpec,
+    SortItemsExpressionSpec,
+)
+from corehq.apps.userreports.expressions.specs import (
+    NamedExpressionSpec,
+    NestedExpressionSpec,
+    RelatedDocExpressionSpec,
+    RootDocExpressionSpec,
+)
+from corehq.apps.userreports.filters import (
+    ANDFilter,
+    NamedFilter,
+    NOTFilter,
+    ORFilter,
+    SinglePropertyValueFilter,
+)
+from corehq.apps.userreports.indicators import (
+    BooleanIndicator,
+    CompoundIndicator,
+    RawIndicator,
+)
+from corehq.apps.userreports.specs import EvaluationContext
+
+
+class RelatedDocumentCache(object):
+    """
+    Documents looked up by ``related_doc`` expressions while processing a chunk
+    of documents from the same domain.
+
+    One instance is shared by the evaluation contexts of every document in the
+    chunk so that a related document is only fetched once for all documents and
+    data sources that need it. Documents that don't exist are cached as None.
+    """
+
+    def __init__(self, domain, load_source="related_doc_expression"):
+        self.domain = domain
+        self.load_source = load_source
+        self._docs = {}
+
+    def is_loaded(self, doc_type, doc_id):
+        return (doc_type, doc_id) in self._docs
+
+    def get_document(self, doc_type, doc_id):
+        return self._docs[(doc_type, doc_id)]
+
+    def set_document(self, doc_type, doc_id, doc):
+        self._docs[(doc_type, doc_id)] = doc
+
+    def prefetch(self, doc_ids_by_type):
+        """
+        Load documents in bulk
+
+        :param doc_ids_by_type: dict of doc type -> iterable of doc IDs
+        """
+        for doc_type, doc_ids in doc_ids_by_type.items():
+            doc_ids = [doc_id for doc_id in doc_ids if not self.is_loaded(doc_type, doc_id)]
+            if not doc_ids:
+                continue
+            document_store = get_document_store_for_doc_type(
+                self.domain, doc_type, load_source=self.load_source
+            )
+            for doc in document_store.iter_documents(doc_ids):
+                self.set_document(doc_type, doc['_id'], doc)
+            for doc_id in doc_ids:
+                if not self.is_loaded(doc_type, doc_id):
+                    self.set_document(doc_type, doc_id, None)
+
+
+def get_related_doc_ids(doc, configs, related_docs=None):
+    """
+    Dry run the ``doc_id_expression`` of each ``related_doc`` expression in
+    the data sources that is evaluated against the root document.
+
+    :return: dict of doc type -> set of doc IDs
+    """
+    doc_ids_by_type = defaultdict(set)
+    for config in configs:
+        for expression in config.get_root_related_doc_expressions():
+            try:
+                doc_id = expression._doc_id_expression(doc, EvaluationContext(doc, related_docs=related_docs))
+            except Exception:
+                # the real evaluation will deal with this
+                continue
+            if doc_id and isinstance(doc_id, str):
+                doc_ids_by_type[expression.related_doc_type].add(doc_id)
+    return doc_ids_by_type
+
+
+def prefetch_related_docs(related_docs, docs_and_configs):
+    """
+    :param related_docs: ``RelatedDocumentCache`` to load documents into
+    :param docs_and_configs: iterable of (doc, list of data source configs) tuples
+    """
+    doc_ids_by_type = defaultdict(set)
+    for doc, configs in docs_and_configs:
+        for doc_type, doc_ids in get_related_doc_ids(doc, configs, related_docs).items():
+            doc_ids_by_type[doc_type].update(doc_ids)
+    related_docs.prefetch(doc_ids_by_type)
+
+
+def find_root_related_doc_expressions(nodes):
+    """
+    Find the ``related_doc`` expressions in the expression, filter and indicator
+    trees given that get evaluated against the root document.
+
+    :param nodes: list of (node, is evaluated against the root document) tuples
+    """
+    found = []
+    seen = set()
+
+    def _walk(node, is_root):
+        if node is None or (id(node), is_root) in seen:
+            return
+        seen.add((id(node), is_root))
+
+        if isinstance(node, NamedExpressionSpec):
+            _walk(node._context.named_expressions.get(node.name), is_root)
+        elif isinstance(node, RelatedDocExpressionSpec):
+            if is_root:
+                found.append(node)
+            _walk(node._doc_id_expression, is_root)
+        elif isinstance(node, RootDocExpressionSpec):
+            _walk(node._expression_fn, True)
+        elif isinstance(node, NestedExpressionSpec):
+            _walk(node._argument_expression, is_root)
+            _walk(node._value_expression, False)
+        elif isinstance(node, (FilterItemsExpressionSpec, MapItemsExpressionSpec, ReduceItemsExpressionSpec,
+                               FlattenExpressionSpec, SortItemsExpressionSpec)):
+            # only the items expression is evaluated against the current item
+            _walk(node._items_expression, is_root)
+            for attr in ('_filter_expression', '_map_expression', '_sort_expression'):
+                _walk(getattr(node, attr, None), False)
+        elif isinstance(node, CompoundIndicator):
+            for indicator in node.indicators:
+                _walk(indicator, is_root)
+        elif isinstance(node, RawIndicator):
+            _walk(node.getter, is_root)
+        elif isinstance(node, BooleanIndicator):
+            _walk(node.filter, is_root)
+        elif isinstance(node, (ANDFilter, ORFilter)):
+            for filter_ in node.filters:
+                _walk(filter_, is_root)
+        elif isinstance(node, NOTFilter):
+            _walk(node._filter, is_root)
+        elif isinstance(node, NamedFilter):
+            _walk(node.filter, is_root)
+        elif isinstance(node, SinglePropertyValueFilter):
+            _walk(node.expression, is_root)
+            _walk(node.reference_expression, is_root)
+        else:
+            # any other expression: assume sub-expressions are evaluated against the same item.
+            # If that's not the case we only prefetch documents that weren't needed.
+            for name, value in getattr(node, '__dict__', {}).items():
+                if not name.startswith('_') or name == '_obj':
+                    continue
+                if isinstance(value, dict):
+                    sub_nodes = list(value.values())
+                elif isinstance(value, (list, tuple)):
+                    sub_nodes = value
+                else:
+                    sub_nodes = [value]
+                for sub_node in sub_nodes:
+                    if callable(sub_node):
+                        _walk(sub_node, is_root)
+
+    for node, is_root in nodes:
+        _walk(node, is_root)
+    return found
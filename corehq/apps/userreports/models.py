@@ -260,7 +260,8 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
         if eval_context is None:
             eval_context = EvaluationContext(document)
 
-        filter_fn = self._get_main_filter()
+        compiled = self.get_compiled()
+        filter_fn = compiled.filter if compiled else self._get_main_filter()
         return filter_fn(document, eval_context)
 
     def deleted_filter(self, document):
@@ -294,6 +295,31 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
             for validation in self.validations
         ]
 
+    @memoized
+    def get_root_related_doc_expressions(self):
+        """
+        :return: list of ``related_doc`` expressions that are evaluated against the
+                 document itself (as opposed to items within it or other documents)
+        """
+        from corehq.apps.userreports.expressions.related_docs import find_root_related_doc_expressions
+        return find_root_related_doc_expressions([
+            (self._get_main_filter(), True),
+            (self.parsed_expression, True),
+            (self.indicators, not self.base_item_expression),
+        ])
+
+    @memoized
+    def get_compiled(self):
+        """
+        :return: ``CompiledDataSource`` if compiling is enabled for the domain and
+                 the data source could be compiled, otherwise None
+        """
+        from corehq.toggles import COMPILE_UCR_EXPRESSIONS
+        if not COMPILE_UCR_EXPRESSIONS.enabled(self.domain):
+            return None
+        from corehq.apps.userreports.compiler import get_compiled_data_source
+        return get_compiled_data_source(self)
+
     @memoized
     def _get_main_filter(self):
         return self._get_filter([self.referenced_doc_type])
@@ -479,9 +505,11 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                     )
                 return []
 
+        compiled = self.get_compiled()
+        get_values = compiled.get_values if compiled else self.indicators.get_values
         rows = []
         for item in self.get_items(doc, eval_context):
-            indicators = self.indicators.get_values(item, eval_context)
+            indicators = get_values(item, eval_context)
             rows.append(indicators)
             eval_context.increment_iteration()
 
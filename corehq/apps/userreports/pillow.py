@@ -31,6 +31,10 @@ from corehq.apps.userreports.exceptions import (
     TableRebuildError,
     UserReportsWarning,
 )
+from corehq.apps.userreports.expressions.related_docs import (
+    RelatedDocumentCache,
+    prefetch_related_docs,
+)
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.rebuild import (
     get_table_diffs,
@@ -303,11 +307,22 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
         change_exceptions = []
 
+        related_docs = RelatedDocumentCache(domain)
+        with self._datadog_timing('related_doc_prefetch'):
+            try:
+                prefetch_related_docs(related_docs, [
+                    (doc, self._get_configs_for_doc(adapters, doc, changes_by_id[doc['_id']]))
+                    for doc in docs
+                ])
+            except Exception:
+                # related docs not loaded here get loaded one at a time while processing
+                pillow_logging.exception("Error prefetching related docs for domain %s", domain)
+
         with self._datadog_timing('single_batch_transform'):
             for doc in docs:
                 change = changes_by_id[doc['_id']]
                 doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
+                eval_context = EvaluationContext(doc, related_docs=related_docs)
                 with self._datadog_timing('single_doc_transform'):
                     for adapter in adapters:
                         with self._datadog_timing('transform', adapter.config._id):
@@ -371,6 +386,17 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
             tags=tags, timing_buckets=(.03, .1, .3, 1, 3, 10)
         )
 
+    @staticmethod
+    def _get_configs_for_doc(adapters, doc, change):
+        """Configs of the adapters whose filter the document could match"""
+        doc_subtype = change.metadata.document_subtype
+        return [
+            adapter.config for adapter in adapters
+            if adapter.config.referenced_doc_type == doc.get('doc_type')
+            and (doc_subtype is None or doc_subtype in adapter.config.get_case_type_or_xmlns_filter()
+                 or None in adapter.config.get_case_type_or_xmlns_filter())
+        ]
+
     def process_change(self, change):
         self.bootstrap_if_needed()
 
@@ -26,9 +26,14 @@ class EvaluationContext(object):
     as the root document and the iteration number.
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, related_docs=None):
+        """
+        :param related_docs: optional ``RelatedDocumentCache`` shared with the
+                             contexts of other documents being processed together
+        """
         self.root_doc = root_doc
         self.iteration = iteration
+        self.related_docs = related_docs
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
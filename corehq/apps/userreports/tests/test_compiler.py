@@ -0,0 +1,164 @@
+import datetime
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.userreports.compiler import (
+    compile_data_source,
+    get_compiled_data_source,
+)
+from corehq.apps.userreports.models import DataSourceConfiguration
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_sample_data_source,
+    get_sample_doc_and_indicators,
+)
+from corehq.util.test_utils import flag_enabled
+
+
+def _values(rows):
+    return [[(value.column.id, value.value) for value in row] for row in rows]
+
+
+class CompiledDataSourceTest(SimpleTestCase):
+
+    def _config(self, **kwargs):
+        config = get_sample_data_source().to_json()
+        config.update(kwargs)
+        return DataSourceConfiguration.wrap(config)
+
+    def assertSameAsUncompiled(self, config, docs):
+        compiled = compile_data_source(config)
+        for doc in docs:
+            context = EvaluationContext(doc)
+            self.assertEqual(compiled.filter(doc, context), config.filter(doc, EvaluationContext(doc)))
+            self.assertEqual(
+                [(v.column.id, v.value) for v in compiled.get_values(doc, context)],
+                [(v.column.id, v.value) for v in config.indicators.get_values(doc, EvaluationContext(doc))],
+            )
+
+    @patch('corehq.apps.userreports.specs.datetime')
+    def test_sample_data_source(self, datetime_mock):
+        datetime_mock.utcnow.return_value = datetime.datetime(2015, 4, 24, 12, 30, 8, 24886)
+        sample_doc, _ = get_sample_doc_and_indicators()
+        self.assertSameAsUncompiled(get_sample_data_source(), [
+            sample_doc,
+            dict(sample_doc, category='app', tags='roadmap', is_starred='no'),
+            dict(sample_doc, type='not-ticket'),
+            dict(sample_doc, domain='other-domain'),
+            {'_id': 'empty'},
+        ])
+
+    def test_named_expressions_and_conditionals(self):
+        config = self._config(
+            named_expressions={
+                'age': {'type': 'property_name', 'property_name': 'age', 'datatype': 'integer'},
+                'is_adult': {
+                    'type': 'conditional',
+                    'test': {
+                        'type': 'boolean_expression',
+                        'expression': {'type': 'named', 'name': 'age'},
+                        'operator': 'gte',
+                        'property_value': 18,
+                    },
+                    'expression_if_true': 'adult',
+                    'expression_if_false': 'child',
+                },
+            },
+            configured_indicators=[
+                {'type': 'expression', 'column_id': 'age', 'datatype': 'integer',
+                 'expression': {'type': 'named', 'name': 'age'}},
+                {'type': 'expression', 'column_id': 'is_adult', 'datatype': 'string',
+                 'expression': {'type': 'named', 'name': 'is_adult'}},
+                {'type': 'expression', 'column_id': 'group', 'datatype': 'string', 'expression': {
+                    'type': 'switch',
+                    'switch_on': {'type': 'named', 'name': 'is_adult'},
+                    'cases': {'adult': {'type': 'property_path', 'property_path': ['work', 'job']}},
+                    'default': {'type': 'coalesce',
+                                'expression': {'type': 'property_name', 'property_name': 'school'},
+                                'default_expression': 'none'},
+                }},
+                {'type': 'expression', 'column_id': 'always', 'datatype': 'string', 'expression': {
+                    'type': 'conditional',
+                    'test': {'type': 'boolean_expression', 'expression': 1, 'operator': 'eq',
+                             'property_value': 1},
+                    'expression_if_true': {'type': 'property_name', 'property_name': 'name'},
+                    'expression_if_false': {'type': 'property_name', 'property_name': 'missing'},
+                }},
+                {'type': 'boolean', 'column_id': 'not_named', 'filter': {
+                    'type': 'not',
+                    'filter': {'type': 'or', 'filters': [
+                        {'type': 'boolean_expression', 'expression': {'type': 'named', 'name': 'age'},
+                         'operator': 'in', 'property_value': [1, 2, 3]},
+                        {'type': 'boolean_expression', 'expression': 'a', 'operator': 'eq',
+                         'property_value': 'b'},
+                    ]},
+                }},
+            ],
+        )
+        base_doc = {'_id': 'doc', 'doc_type': 'CommCareCase', 'domain': 'user-reports', 'type': 'ticket'}
+        self.assertSameAsUncompiled(config, [
+            dict(base_doc, age='21', name='adult', work={'job': 'farmer'}),
+            dict(base_doc, age='2', name='child', school='primary'),
+            dict(base_doc, age='5', school=''),
+            dict(base_doc, age=None, work='not a dict'),
+            base_doc,
+        ])
+
+    def test_constants_folded(self):
+        config = self._config(configured_indicators=[
+            {'type': 'expression', 'column_id': 'folded', 'datatype': 'string', 'expression': {
+                'type': 'conditional',
+                'test': {'type': 'boolean_expression', 'expression': 'x', 'operator': 'eq',
+                         'property_value': 'y'},
+                'expression_if_true': {'type': 'property_name', 'property_name': 'never_looked_up'},
+                'expression_if_false': 'constant',
+            }},
+        ])
+        self.assertNotIn('never_looked_up', compile_data_source(config).source)
+        self.assertEqual(
+            [(v.column.id, v.value)
+             for v in compile_data_source(config).get_values({}, EvaluationContext({}))][-1],
+            ('folded', 'constant'),
+        )
+
+    def test_constant_filter_errors_not_folded(self):
+        config = self._config(configured_indicators=[
+            {'type': 'boolean', 'column_id': 'mismatched', 'filter': {
+                'type': 'boolean_expression', 'expression': 1, 'operator': 'lt', 'property_value': 'a',
+            }},
+        ])
+        compiled = compile_data_source(config)
+        with self.assertRaises(TypeError):
+            config.indicators.get_values({}, EvaluationContext({}))
+        with self.assertRaises(TypeError):
+            compiled.get_values({}, EvaluationContext({}))
+
+    def test_shared_subexpressions_evaluated_once(self):
+        config = self._config(configured_indicators=[
+            {'type': 'expression', 'column_id': 'name_{}'.format(i), 'datatype': 'string',
+             'expression': {'type': 'property_name', 'property_name': 'name'}}
+            for i in range(3)
+        ])
+        source = compile_data_source(config).source
+        get_values_source = source[source.index('def get_values'):]
+        self.assertEqual(get_values_source.count('.get(_k'), 2)  # doc_id and name
+
+    def test_cached_per_revision(self):
+        config = self._config(_id='compiled-config', _rev='1-abc')
+        compiled = get_compiled_data_source(config)
+        self.assertIs(get_compiled_data_source(self._config(_id='compiled-config', _rev='1-abc')), compiled)
+        self.assertIsNot(get_compiled_data_source(self._config(_id='compiled-config', _rev='2-def')), compiled)
+
+    @flag_enabled('COMPILE_UCR_EXPRESSIONS')
+    @patch('corehq.apps.userreports.specs.datetime')
+    def test_get_all_values_uses_compiled(self, datetime_mock):
+        fake_time_now = datetime.datetime(2015, 4, 24, 12, 30, 8, 24886)
+        datetime_mock.utcnow.return_value = fake_time_now
+        config = get_sample_data_source()
+        self.assertIsNotNone(config.get_compiled())
+        sample_doc, expected_indicators = get_sample_doc_and_indicators(fake_time_now)
+        [row] = _values(config.get_all_values(sample_doc))
+        self.assertEqual(row[0], ('doc_id', sample_doc['_id']))
+        self.assertEqual(len(row), len(config.get_columns()))
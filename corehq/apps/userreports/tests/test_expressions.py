@@ -18,9 +18,14 @@ from corehq.apps.groups.models import Group
 from corehq.apps.userreports.decorators import ucr_context_cache
 from corehq.apps.userreports.exceptions import BadSpecError
 from corehq.apps.userreports.expressions.factory import ExpressionFactory
+from corehq.apps.userreports.expressions.related_docs import (
+    RelatedDocumentCache,
+    find_root_related_doc_expressions,
+)
 from corehq.apps.userreports.expressions.specs import (
     PropertyNameGetterSpec,
     PropertyPathGetterSpec,
+    RelatedDocExpressionSpec,
     eval_statements,
 )
 from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
@@ -925,6 +930,63 @@ class RelatedDocExpressionTest(SimpleTestCase):
         self.database.mock_docs.clear()
         self.assertEqual('foo', self.expression(my_doc, context))
 
+    def test_related_docs_cache(self):
+        my_doc = {
+            'domain': 'test-domain',
+            'parent_id': 'related-id',
+        }
+        related_docs = RelatedDocumentCache('test-domain')
+        related_docs.set_document('CommCareCase', 'related-id', {
+            'domain': 'test-domain',
+            'related_property': 'foo'
+        })
+        # nothing in the database so the value must come from the cache
+        self.assertEqual('foo', self.expression(my_doc, EvaluationContext(my_doc, related_docs=related_docs)))
+
+    def test_related_docs_cache_cross_domain(self):
+        my_doc = {
+            'domain': 'test-domain',
+            'parent_id': 'related-id',
+        }
+        related_docs = RelatedDocumentCache('test-domain')
+        related_docs.set_document('CommCareCase', 'related-id', {
+            'domain': 'wrong-domain',
+            'related_property': 'foo'
+        })
+        self.assertEqual(None, self.expression(my_doc, EvaluationContext(my_doc, related_docs=related_docs)))
+
+    def test_related_docs_cache_populated(self):
+        self.database.mock_docs = {
+            'related-id': {'domain': 'test-domain', 'related_property': 'foo'},
+        }
+        my_doc = {
+            'domain': 'test-domain',
+            'parent_id': 'related-id',
+        }
+        related_docs = RelatedDocumentCache('test-domain')
+        self.assertEqual('foo', self.expression(my_doc, EvaluationContext(my_doc, related_docs=related_docs)))
+        self.assertTrue(related_docs.is_loaded('CommCareCase', 'related-id'))
+
+        # a new context for another document in the chunk reuses the fetched document
+        self.database.mock_docs.clear()
+        other_doc = dict(my_doc, _id='other-id')
+        other_context = EvaluationContext(other_doc, related_docs=related_docs)
+        self.assertEqual('foo', self.expression(other_doc, other_context))
+
+    def test_find_root_related_doc_expressions(self):
+        expressions = find_root_related_doc_expressions([(self.nested_expression, True)])
+        # the inner lookup is evaluated against the related document so can't be prefetched
+        self.assertEqual(expressions, [self.nested_expression])
+
+    def test_find_root_related_doc_expressions_in_root_doc(self):
+        root_doc_expression = ExpressionFactory.from_spec({
+            "type": "root_doc",
+            "expression": self.spec,
+        })
+        expressions = find_root_related_doc_expressions([(root_doc_expression, False)])
+        self.assertEqual(len(expressions), 1)
+        self.assertIsInstance(expressions[0], RelatedDocExpressionSpec)
+
 
 class RelatedDocExpressionDbTest(TestCase):
     domain = 'related-doc-db-test-domain'
@@ -81,6 +81,7 @@ class CODES:
     demo_user_restore = 14  # DemoUserRestore
     data_file = 15      # domain data file (see DataFile class)
     form_multimedia = 16     # form submission multimedia zip
+    app_ccz = 17        # CCZ archives of Application builds
 
 
 CODES.name_of = {code: name
@@ -29,9 +29,22 @@ class AtomicBlobs(object):
         self.puts.append(meta)
         return meta
 
+    def put_many(self, contents):
+        if self.puts is None:
+            raise InvalidContext("AtomicBlobs context is not active")
+        metas = self.db.put_many(contents)
+        self.puts.extend(metas)
+        return metas
+
     def get(self, *args, **kw):
         return self.db.get(*args, **kw)
 
+    def get_many(self, *args, **kw):
+        return self.db.get_many(*args, **kw)
+
+    def download(self, *args, **kw):
+        return self.db.download(*args, **kw)
+
     def delete(self, key):
         """Delete a blob
 
@@ -24,6 +24,25 @@ class FilesystemBlobDB(AbstractBlobDB):
 
     def put(self, content, **blob_meta_args):
         meta = self.metadb.new(**blob_meta_args)
+        self._write(content, meta)
+        self.metadb.put(meta)
+        return meta
+
+    def put_many(self, contents):
+        metas = []
+        try:
+            for content, blob_meta_args in contents:
+                meta = self.metadb.new(**blob_meta_args)
+                self._write(content, meta)
+                metas.append(meta)
+        except Exception:
+            for meta in metas:
+                os.remove(self.get_path(meta.key))
+            raise
+        self.metadb.put_many(metas)
+        return metas
+
+    def _write(self, content, meta):
         path = self.get_path(meta.key)
         dirpath = dirname(path)
         if not isdir(dirpath):
@@ -39,8 +58,6 @@ class FilesystemBlobDB(AbstractBlobDB):
                 length += len(chunk)
                 digest.update(chunk)
         meta.content_length = length
-        self.metadb.put(meta)
-        return meta
 
     def get(self, key):
         path = self.get_path(key)
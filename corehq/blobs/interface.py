@@ -1,3 +1,4 @@
+import shutil
 from abc import ABCMeta, abstractmethod
 
 from .metadata import MetaDB
@@ -61,6 +62,63 @@ class AbstractBlobDB(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def put_many(self, contents):
+        """Put many blobs in persistent storage
+
+        Backends may upload blobs concurrently and save their metadata
+        in bulk. If any blob cannot be stored the blobs that were stored
+        are deleted before the error is raised.
+
+        :param contents: A list of `(content, blob_meta_args)` pairs.
+        `content` is a file-like object in binary read mode, which need
+        not be seekable, and `blob_meta_args` is a dict of arguments as
+        accepted by `put`.
+        :returns: A list of `BlobMeta` objects in the order of `contents`.
+        """
+        metas = []
+        try:
+            for content, blob_meta_args in contents:
+                metas.append(self.put(content, **blob_meta_args))
+        except Exception:
+            if metas:
+                self.bulk_delete(metas)
+            raise
+        return metas
+
+    def get_many(self, keys):
+        """Get many blobs
+
+        Backends may request blobs concurrently.
+
+        :param keys: List of blob keys.
+        :raises: `NotFound` if any of the blobs does not exist.
+        :returns: A list of file-like objects in binary read mode in the
+        order of `keys`. The returned objects should be closed when
+        finished reading.
+        """
+        blobs = []
+        try:
+            for key in keys:
+                blobs.append(self.get(key))
+        except Exception:
+            for blob in blobs:
+                blob.close()
+            raise
+        return blobs
+
+    def download(self, key, fileobj):
+        """Write the content of a blob to a file
+
+        Backends may read large blobs in ranges that are requested
+        concurrently, which is faster than reading from `get` for very
+        large blobs.
+
+        :param key: Blob key.
+        :param fileobj: A seekable file-like object in binary write mode.
+        """
+        with self.get(key) as content:
+            shutil.copyfileobj(content, fileobj)
+
     @abstractmethod
     def exists(self, key):
         """Check if blob exists
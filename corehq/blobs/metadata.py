@@ -54,6 +54,25 @@ class MetaDB(object):
             datadog_counter('commcare.temp_blobs.count')
             datadog_counter('commcare.temp_blobs.bytes_added', value=length)
 
+    def put_many(self, metas):
+        """Save many `BlobMeta` objects in the metadata database
+
+        Rows are inserted with one statement per database partition.
+        """
+        metas_by_db = defaultdict(list)
+        for meta in metas:
+            metas_by_db[meta.db].append(meta)
+        for dbname, db_metas in metas_by_db.items():
+            BlobMeta.objects.using(dbname).bulk_create(db_metas)
+        length = sum(meta.content_length for meta in metas)
+        datadog_counter('commcare.blobs.added.count', value=len(metas))
+        datadog_counter('commcare.blobs.added.bytes', value=length)
+        temp_metas = [meta for meta in metas if meta.expires_on is not None]
+        if temp_metas:
+            datadog_counter('commcare.temp_blobs.count', value=len(temp_metas))
+            datadog_counter('commcare.temp_blobs.bytes_added',
+                            value=sum(meta.content_length for meta in temp_metas))
+
     def delete(self, key, content_length):
         """Delete blob metadata
 
@@ -19,12 +19,27 @@ class MigratingBlobDB(object):
     def put(self, *args, **kw):
         return self.new_db.put(*args, **kw)
 
+    def put_many(self, *args, **kw):
+        return self.new_db.put_many(*args, **kw)
+
     def get(self, *args, **kw):
         try:
             return self.new_db.get(*args, **kw)
         except NotFound:
             return self.old_db.get(*args, **kw)
 
+    def get_many(self, keys):
+        try:
+            return self.new_db.get_many(keys)
+        except NotFound:
+            return [self.get(key) for key in keys]
+
+    def download(self, *args, **kw):
+        try:
+            return self.new_db.download(*args, **kw)
+        except NotFound:
+            return self.old_db.download(*args, **kw)
+
     def size(self, *args, **kw):
         try:
             return self.new_db.size(*args, **kw)
@@ -126,50 +126,78 @@ class BlobMixin(Document):
 
         :param content: String or file object.
         """
-        db = get_blob_db()
-
         if name is None:
             name = getattr(content, "name", None)
-        if name is None:
+        return BlobMixin.put_attachments(self, {name: {
+            "content": content,
+            "content_type": content_type,
+            "content_length": content_length,
+            "domain": domain,
+            "type_code": type_code,
+        }})
+
+    @document_method
+    def put_attachments(self, attachments):
+        """Put many attachments in blob database
+
+        The attachments are stored with a single `put_many` call to the
+        blob db, and the document is saved once (unless this is called
+        in an `atomic_blobs` context).
+
+        :param attachments: A dict of attachment name -> dict of other
+        `put_attachment` arguments (`content` is required).
+        """
+        db = get_blob_db()
+
+        if None in attachments:
             raise InvalidAttachment("cannot save attachment without name")
         if self._id is None:
             raise ResourceNotFound("cannot put attachment on unidentified document")
-        if hasattr(self, "domain"):
-            if domain is not None and self.domain != domain:
-                raise ValueError("domain mismatch: %s != %s" % (self.domain, domain))
-            domain = self.domain
-        elif domain is None:
-            raise ValueError("domain attribute or argument is required")
-        old_meta = self.blobs.get(name)
-
-        if isinstance(content, str):
-            content = BytesIO(content.encode("utf-8"))
-        elif isinstance(content, bytes):
-            content = BytesIO(content)
-
-        # do we need to worry about BlobDB reading beyond content_length?
-        meta = db.put(
-            content,
-            domain=domain or self.domain,
-            parent_id=self._id,
-            name=name,
-            type_code=(self._blobdb_type_code if type_code is None else type_code),
-            content_type=content_type,
-        )
-        self.external_blobs[name] = BlobMetaRef(
-            key=meta.key,
-            blobmeta_id=meta.id,
-            content_type=content_type,
-            content_length=meta.content_length,
-        )
-        if self._migrating_blobs_from_couch and self._attachments:
-            self._attachments.pop(name, None)
+        contents = []
+        for name, info in attachments.items():
+            domain = info.get("domain")
+            if hasattr(self, "domain"):
+                if domain is not None and self.domain != domain:
+                    raise ValueError("domain mismatch: %s != %s" % (self.domain, domain))
+                domain = self.domain
+            elif domain is None:
+                raise ValueError("domain attribute or argument is required")
+            type_code = info.get("type_code")
+
+            content = info["content"]
+            if isinstance(content, str):
+                content = BytesIO(content.encode("utf-8"))
+            elif isinstance(content, bytes):
+                content = BytesIO(content)
+
+            # do we need to worry about BlobDB reading beyond content_length?
+            contents.append((content, dict(
+                domain=domain or self.domain,
+                parent_id=self._id,
+                name=name,
+                type_code=(self._blobdb_type_code if type_code is None else type_code),
+                content_type=info.get("content_type"),
+            )))
+        old_metas = {name: self.blobs.get(name) for name in attachments}
+        metas = db.put_many(contents)
+
+        for name, meta in zip(attachments, metas):
+            self.external_blobs[name] = BlobMetaRef(
+                key=meta.key,
+                blobmeta_id=meta.id,
+                content_type=attachments[name].get("content_type"),
+                content_length=meta.content_length,
+            )
+            if self._migrating_blobs_from_couch and self._attachments:
+                self._attachments.pop(name, None)
+        old_keys = {name: meta.key for name, meta in old_metas.items() if meta and meta.key}
         if self._atomic_blobs is None:
             self.save()
-            if old_meta and old_meta.key:
-                db.delete(key=old_meta.key)
-        elif old_meta and old_meta.key:
-            self._atomic_blobs[name].append(old_meta.key)
+            for key in old_keys.values():
+                db.delete(key=key)
+        else:
+            for name, key in old_keys.items():
+                self._atomic_blobs[name].append(key)
         return True
 
     @document_method
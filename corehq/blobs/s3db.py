@@ -1,5 +1,6 @@
 import os
 import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from io import RawIOBase, UnsupportedOperation
 
@@ -12,12 +13,14 @@ from dimagi.utils.logging import notify_exception
 from dimagi.utils.chunked import chunked
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from botocore.utils import fix_s3_host
 
 DEFAULT_S3_BUCKET = "blobdb"
 DEFAULT_BULK_DELETE_CHUNKSIZE = 1000
+DEFAULT_MAX_POOL_CONNECTIONS = 10  # botocore default
 
 
 class S3BlobDB(AbstractBlobDB):
@@ -35,6 +38,10 @@ class S3BlobDB(AbstractBlobDB):
             **kwargs
         )
         self.bulk_delete_chunksize = config.get("bulk_delete_chunksize", DEFAULT_BULK_DELETE_CHUNKSIZE)
+        # concurrent requests of put_many/get_many/download are limited
+        # to the size of the connection pool, which they share
+        self.max_concurrent_requests = config.get("config", {}).get(
+            "max_pool_connections", DEFAULT_MAX_POOL_CONNECTIONS)
         self.s3_bucket_name = config.get("s3_bucket", DEFAULT_S3_BUCKET)
         self._s3_bucket_exists = False
         # https://github.com/boto/boto3/issues/259
@@ -74,12 +81,114 @@ class S3BlobDB(AbstractBlobDB):
                 s3_bucket.upload_fileobj(content, meta.key)
         return meta
 
+    def put_many(self, contents):
+        """Put many blobs concurrently
+
+        Each blob is uploaded by a worker thread; the threads share the
+        connection pool of the S3 client. Metadata is saved in bulk once
+        all blobs have been uploaded.
+        """
+        contents = list(contents)
+        metas = [self.metadb.new(**blob_meta_args) for content, blob_meta_args in contents]
+        for meta in metas:
+            check_safe_key(meta.key)
+        self._s3_bucket(create=True)
+        client = self.db.meta.client
+
+        def upload(content, meta):
+            if isinstance(content, BlobStream) and content.blob_db is self:
+                source = {"Bucket": self.s3_bucket_name, "Key": content.blob_key}
+                meta.content_length = client.head_object(**source)["ContentLength"]
+                with self.report_timing('put-via-copy', meta.key):
+                    client.copy(source, self.s3_bucket_name, meta.key)
+            else:
+                if _is_seekable(content):
+                    content.seek(0)
+                    meta.content_length = get_file_size(content)
+                else:
+                    content = _CountingReader(content)
+                with self.report_timing('put', meta.key):
+                    client.upload_fileobj(content, self.s3_bucket_name, meta.key)
+                if isinstance(content, _CountingReader):
+                    meta.content_length = content.length
+            return meta
+
+        uploaded, error = self._map_concurrently(upload, list(zip(contents, metas)))
+        if error is not None:
+            for chunk in chunked(uploaded, self.bulk_delete_chunksize):
+                self._s3_bucket().delete_objects(Delete={"Objects": [{"Key": m.key} for m in chunk]})
+            raise error
+        self.metadb.put_many(metas)
+        return metas
+
     def get(self, key):
         check_safe_key(key)
         with maybe_not_found(throw=NotFound(key)), self.report_timing('get', key):
             resp = self._s3_bucket().Object(key).get()
         return BlobStream(resp["Body"], self, key)
 
+    def get_many(self, keys):
+        keys = list(keys)
+        for key in keys:
+            check_safe_key(key)
+        client = self.db.meta.client
+
+        def get(key):
+            with maybe_not_found(throw=NotFound(key)), self.report_timing('get', key):
+                resp = client.get_object(Bucket=self.s3_bucket_name, Key=key)
+            return BlobStream(resp["Body"], self, key)
+
+        blobs, error = self._map_concurrently(get, [(key,) for key in keys])
+        if error is not None:
+            for blob in blobs:
+                blob.close()
+            raise error
+        return blobs
+
+    def download(self, key, fileobj):
+        """Download a blob to a file with concurrent ranged requests
+
+        Blobs larger than `TransferConfig.multipart_threshold` (8MB by
+        default) are requested in parts by several threads.
+        """
+        check_safe_key(key)
+        with maybe_not_found(throw=NotFound(key)), self.report_timing('download', key):
+            self.db.meta.client.download_fileobj(
+                self.s3_bucket_name,
+                key,
+                fileobj,
+                Config=TransferConfig(max_concurrency=self.max_concurrent_requests),
+            )
+
+    def _map_concurrently(self, fn, args_list):
+        """Call `fn(*args)` for each item of `args_list` in worker threads
+
+        :returns: A tuple `(results, error)`. `results` is a list of the
+        return values of successful calls in the order of `args_list`
+        and `error` is the first exception raised or `None`.
+        """
+        if len(args_list) < 2:
+            futures = []
+            for args in args_list:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as err:
+                    future.set_exception(err)
+                futures.append(future)
+        else:
+            max_workers = min(self.max_concurrent_requests, len(args_list))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(fn, *args) for args in args_list]
+        results = []
+        error = None
+        for future in futures:
+            if future.exception() is None:
+                results.append(future.result())
+            elif error is None:
+                error = future.exception()
+        return results, error
+
     def size(self, key):
         check_safe_key(key)
         with maybe_not_found(throw=NotFound(key)), self.report_timing('size', key):
@@ -178,6 +287,28 @@ class BlobStream(RawIOBase):
         return self._blob_db()
 
 
+class _CountingReader(object):
+    """Non-seekable file-like object that counts the bytes read from it"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.length = 0
+
+    def read(self, *args, **kw):
+        data = self._fileobj.read(*args, **kw)
+        self.length += len(data)
+        return data
+
+
+def _is_seekable(fileobj):
+    if hasattr(fileobj, "seekable"):
+        try:
+            return fileobj.seekable()
+        except ValueError:
+            return False
+    return hasattr(fileobj, "seek") and hasattr(fileobj, "tell")
+
+
 def is_not_found(err, not_found_codes=["NoSuchKey", "NoSuchBucket", "404"]):
     return (err.response["Error"]["Code"] in not_found_codes or
         err.response.get("Errors", {}).get("Error", {}).get("Code") in not_found_codes)
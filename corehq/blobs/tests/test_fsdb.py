@@ -12,7 +12,7 @@ import corehq.blobs.fsdb as mod
 from corehq.blobs import CODES
 from corehq.blobs.metadata import MetaDB
 from corehq.blobs.tasks import delete_expired_blobs
-from corehq.blobs.tests.util import new_meta, temporary_blob_db
+from corehq.blobs.tests.util import get_meta, new_meta, temporary_blob_db
 from corehq.util.test_utils import generate_cases, patch_datadog
 
 
@@ -66,6 +66,43 @@ class _BlobDBTests(object):
         with self.db.get(key=new.key) as fh:
             self.assertEqual(fh.read(), b"content")
 
+    def test_put_many_and_get_many(self):
+        class NonSeekable(object):
+            def __init__(self, data):
+                self._fileobj = BytesIO(data)
+
+            def read(self, *args):
+                return self._fileobj.read(*args)
+
+        with patch_datadog() as stats:
+            metas = self.db.put_many([
+                (BytesIO(b"content"), {"domain": "test", "parent_id": "test", "type_code": CODES.form_xml}),
+                (NonSeekable(b"other content"), {"meta": new_meta(parent_id="other")}),
+            ])
+        self.assertEqual([m.content_length for m in metas], [7, 13])
+        self.assertEqual(sum(s for s in stats["commcare.blobs.added.count"]), 2)
+        self.assertEqual(sum(s for s in stats["commcare.blobs.added.bytes"]), 20)
+        for meta in metas:
+            self.assertEqual(get_meta(meta).key, meta.key)
+
+        blobs = self.db.get_many([meta.key for meta in reversed(metas)])
+        self.assertEqual([b.read() for b in blobs], [b"other content", b"content"])
+        for blob in blobs:
+            blob.close()
+
+    def test_get_many_not_found(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        with self.assertRaises(mod.NotFound):
+            self.db.get_many([meta.key, "missing"])
+
+    def test_download(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        fileobj = BytesIO()
+        self.db.download(meta.key, fileobj)
+        self.assertEqual(fileobj.getvalue(), b"content")
+        with self.assertRaises(mod.NotFound):
+            self.db.download("missing", BytesIO())
+
     def test_exists(self):
         meta = self.db.put(BytesIO(b"content"), meta=new_meta())
         self.assertTrue(self.db.exists(key=meta.key), 'not found')
@@ -32,8 +32,16 @@ from casexml.apps.phone.data_providers.case.load_testing import (
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
+from casexml.apps.phone.restore_caching import CaseXMLCache
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
+from casexml.apps.phone.xml import get_case_element, tostring
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.form_processor.utils import should_use_sql_backend
+from corehq.sql_db.util import PartitionedQueryPool, split_list_by_db_partition
+from corehq.toggles import (
+    LIVEQUERY_CASE_XML_CACHE,
+    LIVEQUERY_PARALLEL_SHARD_QUERIES,
+)
 from corehq.util.datadog.utils import case_load_counter
 
 
@@ -164,7 +172,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
             for index in related
             for case_id in [index.case_id, index.referenced_id]
             if case_id not in all_ids}
-        rows = accessor.get_closed_and_deleted_ids(list(case_ids))
+        rows = index_accessor.get_closed_and_deleted_ids(list(case_ids))
         for case_id, closed, deleted in rows:
             if deleted:
                 deleted_ids.add(case_id)
@@ -175,6 +183,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
     IGNORE = object()
     debug = logging.getLogger(__name__).debug
     accessor = CaseAccessors(restore_state.domain)
+    index_accessor = get_index_accessor(accessor)
 
     # case graph data structures
     live_ids = set()
@@ -187,7 +196,7 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
     owner_ids = list(restore_state.owner_ids)
 
     debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
-    with timing_context("livequery"):
+    with timing_context("livequery"), index_accessor:
         with timing_context("get_case_ids_by_owners"):
             owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
             debug("owned: %r", owned_ids)
@@ -195,11 +204,13 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
         next_ids = all_ids = set(owned_ids)
         owned_ids = set(owned_ids)  # owned, open case ids (may be extensions)
         open_ids = set(owned_ids)
+        level = 0
         while next_ids:
             exclude = set(chain.from_iterable(seen_ix[id] for id in next_ids))
-            with timing_context("get_related_indices({} cases, {} seen)".format(
-                    len(next_ids), len(exclude))):
-                related = accessor.get_related_indices(list(next_ids), exclude)
+            level += 1
+            with timing_context("get_related_indices(level {}, {} cases, {} seen)".format(
+                    level, len(next_ids), len(exclude))):
+                related = index_accessor.get_related_indices(list(next_ids), exclude)
                 if not related:
                     break
                 update_open_and_deleted_ids(related)
@@ -262,6 +273,66 @@ def discard_already_synced_cases(live_ids, restore_state, accessor):
     return sync_ids
 
 
+def get_index_accessor(accessor):
+    if (should_use_sql_backend(accessor.domain)
+            and LIVEQUERY_PARALLEL_SHARD_QUERIES.enabled(accessor.domain)):
+        return ParallelIndexAccessor(accessor)
+    return SerialIndexAccessor(accessor)
+
+
+class SerialIndexAccessor(object):
+    """Case graph queries made with a single query per traversal level"""
+
+    def __init__(self, accessor):
+        self.accessor = accessor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        return self.accessor.get_related_indices(case_ids, exclude_indices)
+
+    def get_closed_and_deleted_ids(self, case_ids):
+        return self.accessor.get_closed_and_deleted_ids(case_ids)
+
+
+class ParallelIndexAccessor(object):
+    """Case graph queries sent to each partition database concurrently
+
+    Results are merged to match those of the equivalent plproxy queries.
+    """
+
+    def __init__(self, accessor):
+        self.domain = accessor.domain
+        self.db_accessor = accessor.db_accessor
+        self.pool = PartitionedQueryPool()
+
+    def __enter__(self):
+        self.pool.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.pool.__exit__(exc_type, exc_val, exc_tb)
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        # reverse indices may be on any database so all of them are queried
+        results = self.pool.map(self.db_accessor.get_related_indices_in_db, {
+            db_alias: (self.domain, case_ids, exclude_indices)
+            for db_alias in self.pool.db_aliases
+        })
+        return list(chain.from_iterable(results.values()))
+
+    def get_closed_and_deleted_ids(self, case_ids):
+        results = self.pool.map(self.db_accessor.get_closed_and_deleted_ids_in_db, {
+            db_alias: (self.domain, db_case_ids)
+            for db_alias, db_case_ids in split_list_by_db_partition(case_ids)
+        })
+        return list(chain.from_iterable(results.values()))
+
+
 class PrefetchIndexCaseAccessor(object):
 
     def __init__(self, accessor, indices):
@@ -312,6 +383,9 @@ def init_progress(async_task, total):
 
 def compile_response(timing_context, restore_state, response, batches, update_progress):
     done = 0
+    xml_cache = None
+    if restore_state.loadtest_factor == 1 and LIVEQUERY_CASE_XML_CACHE.enabled(restore_state.domain):
+        xml_cache = CaseXMLCache(restore_state.domain, restore_state.version)
     for cases in batches:
         with timing_context("get_stock_payload"):
             response.extend(get_stock_payload(
@@ -325,9 +399,35 @@ def compile_response(timing_context, restore_state, response, batches, update_pr
                 restore_state.domain, cases, restore_state.last_sync_log)
 
         with timing_context("get_xml_for_response (%s updates)" % len(updates)):
-            response.extend(item
-                for update in updates
-                for item in get_xml_for_response(update, restore_state))
+            if xml_cache is not None:
+                response.extend(get_cached_xml_for_response(updates, restore_state, xml_cache))
+            else:
+                response.extend(item
+                    for update in updates
+                    for item in get_xml_for_response(update, restore_state))
 
         done += len(cases)
         update_progress(done)
+
+
+def get_cached_xml_for_response(updates, restore_state, xml_cache):
+    """Get case XML for updates, serializing only those not in `xml_cache`
+
+    Cases are serialized the same way as `get_xml_for_response` but
+    load testing is not supported.
+
+    :returns: List of XML bytes in the same order as `updates`.
+    """
+    keys = [xml_cache.get_key(update.case, update.required_updates) for update in updates]
+    cached = xml_cache.get_many(keys)
+    elements = []
+    new_xml = {}
+    for key, update in zip(keys, updates):
+        xml = cached.get(key) if key else None
+        if xml is None:
+            xml = tostring(get_case_element(update.case, update.required_updates, restore_state.version))
+            if key:
+                new_xml[key] = xml
+        elements.append(xml)
+    xml_cache.set_many(new_xml)
+    return elements
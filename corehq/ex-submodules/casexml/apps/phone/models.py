@@ -121,6 +121,9 @@ class OTARestoreUser(object):
     def get_fixture_data_items(self):
         raise NotImplementedError()
 
+    def get_fixture_data_item_owners(self):
+        raise NotImplementedError()
+
     def get_commtrack_location_id(self):
         raise NotImplementedError()
 
@@ -160,6 +163,9 @@ class OTARestoreWebUser(OTARestoreUser):
     def get_fixture_data_items(self):
         return []
 
+    def get_fixture_data_item_owners(self):
+        return []
+
     def get_commtrack_location_id(self):
         return None
 
@@ -195,6 +201,11 @@ class OTARestoreCommCareUser(OTARestoreUser):
 
         return FixtureDataItem.by_user(self._couch_user)
 
+    def get_fixture_data_item_owners(self):
+        from corehq.apps.fixtures.models import FixtureDataItem
+
+        return FixtureDataItem.get_owners_for_user(self._couch_user)
+
     def get_commtrack_location_id(self):
         from corehq.apps.commtrack.util import get_commtrack_location_id
 
@@ -297,6 +308,7 @@ class AbstractSyncLog(SafeSaveDocument):
     cache_payload_paths = DictProperty()
 
     last_ucr_sync_times = SchemaListProperty(UCRSyncLog)
+    fixture_hashes = DictProperty()  # fixture id -> hash of the fixture last synced
 
     strict = True  # for asserts
 
@@ -1,6 +1,6 @@
+import io
 import logging
 import os
-import shutil
 import tempfile
 import uuid
 from io import BytesIO
@@ -98,12 +98,21 @@ class StockSettings(object):
 
 
 class RestoreContent(object):
+    """
+    Restore response content writer
+
+    The response is written to a single temporary file. Space for the
+    opening tag is reserved at the start of the file and the tag is
+    written once the final item count is known so the body never needs
+    to be copied to prepend it.
+    """
     start_tag_template = (
         b'<OpenRosaResponse xmlns="http://openrosa.org/http/response"%(items)s>'
         b'<message nature="%(nature)s">Successfully restored account %(username)s!</message>'
     )
     items_template = b' items="%s"'
     closing_tag = b'</OpenRosaResponse>'
+    max_items_digits = 12
 
     def __init__(self, username=None, items=False):
         self.username = username
@@ -112,10 +121,13 @@ class RestoreContent(object):
 
     def __enter__(self):
         self.response_body = tempfile.TemporaryFile('w+b')
+        self.header_size = len(self._get_start_tag(b'9' * self.max_items_digits))
+        self.response_body.seek(self.header_size)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.response_body.close()
+        if self.response_body is not None:
+            self.response_body.close()
 
     def append(self, xml_element):
         self.num_items += 1
@@ -130,29 +142,72 @@ class RestoreContent(object):
         for element in iterable:
             self.append(element)
 
-    def _write_to_file(self, fileobj):
-        # Add 1 to num_items to account for message element
-        items = (self.items_template % ('%s' % (self.num_items + 1)).encode('utf-8')) if self.items else b''
-        fileobj.write(self.start_tag_template % {
+    def _get_start_tag(self, num_items):
+        items = (self.items_template % num_items) if self.items else b''
+        return self.start_tag_template % {
             b"items": items,
             b"username": self.username.encode("utf8"),
             b"nature": ResponseNature.OTA_RESTORE_SUCCESS.encode("utf8"),
-        })
-
-        self.response_body.seek(0)
-        shutil.copyfileobj(self.response_body, fileobj)
-
-        fileobj.write(self.closing_tag)
+        }
 
     def get_fileobj(self):
-        fileobj = tempfile.TemporaryFile('w+b')
+        """Get a file object containing the complete response
+
+        Ownership of the file is passed to the caller, who is
+        responsible for closing it.
+        """
+        fileobj = self.response_body
         try:
-            self._write_to_file(fileobj)
-            fileobj.seek(0)
-            return fileobj
+            fileobj.write(self.closing_tag)
+            # Add 1 to num_items to account for message element
+            start_tag = self._get_start_tag(('%s' % (self.num_items + 1)).encode('utf-8'))
+            offset = self.header_size - len(start_tag)
+            fileobj.seek(offset)
+            fileobj.write(start_tag)
+            fileobj.seek(offset)
         except:
             fileobj.close()
             raise
+        finally:
+            self.response_body = None
+        return OffsetFile(fileobj, offset) if offset else fileobj
+
+
+class OffsetFile(io.RawIOBase):
+    """Read-only view of a file object starting at ``offset``
+
+    Deliberately does not expose ``fileno()`` so that the size of the
+    view is never taken from the underlying file.
+    """
+
+    def __init__(self, fileobj, offset):
+        super().__init__()
+        self.fileobj = fileobj
+        self.offset = offset
+        self.fileobj.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.fileobj.readinto(buffer)
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            pos = max(pos, 0) + self.offset
+        return self.fileobj.seek(pos, whence) - self.offset
+
+    def tell(self):
+        return self.fileobj.tell() - self.offset
+
+    def close(self):
+        try:
+            self.fileobj.close()
+        finally:
+            super().close()
 
 
 class RestoreResponse(object):
@@ -1,7 +1,11 @@
 import hashlib
 import logging
 import datetime
-from casexml.apps.phone.const import RESTORE_CACHE_KEY_PREFIX, ASYNC_RESTORE_CACHE_KEY_PREFIX
+from casexml.apps.phone.const import (
+    ASYNC_RESTORE_CACHE_KEY_PREFIX,
+    RESTORE_CACHE_KEY_PREFIX,
+    RESTORE_CASE_XML_CACHE_KEY_PREFIX,
+)
 from corehq.toggles import ENABLE_LOADTEST_USERS
 from corehq.util.quickcache import quickcache
 from dimagi.utils.couch.cache.cache_core import get_redis_default_cache
@@ -97,3 +101,43 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class CaseXMLCache(object):
+    """Serialized case XML shared by the restores of all users in a domain
+
+    The XML for a case only depends on the case itself, the actions
+    (create/update/close) being synced and the restore version, so
+    entries are keyed by those along with the case's
+    `server_modified_on`, which changes whenever the case does. Stale
+    entries are never read and simply expire.
+    """
+    timeout = 24 * 60 * 60
+
+    def __init__(self, domain, version):
+        self.domain = domain
+        self.version = version
+
+    def get_key(self, case, required_updates):
+        if not case.server_modified_on:
+            return None
+        return '{}:{}'.format(RESTORE_CASE_XML_CACHE_KEY_PREFIX, ','.join([
+            self.domain,
+            case.case_id,
+            case.server_modified_on.isoformat(),
+            self.version,
+            '-'.join(required_updates),
+        ]))
+
+    def get_many(self, keys):
+        """
+        :returns: dict of key -> XML bytes for keys found in the cache
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return {}
+        return get_redis_default_cache().get_many(keys)
+
+    def set_many(self, xml_by_key):
+        if xml_by_key:
+            get_redis_default_cache().set_many(xml_by_key, timeout=self.timeout)
@@ -0,0 +1,130 @@
+import threading
+from collections import namedtuple
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from casexml.apps.phone.data_providers.case.livequery import (
+    ParallelIndexAccessor,
+    SerialIndexAccessor,
+)
+
+Index = namedtuple('Index', 'case_id identifier referenced_id')
+CaseStatus = namedtuple('CaseStatus', 'case_id closed deleted')
+
+# case id -> (db alias, closed, deleted)
+CASES = {
+    'parent': ('db1', False, False),
+    'child1': ('db1', False, False),
+    'child2': ('db2', True, False),
+    'host': ('db2', False, False),
+    'ext': ('db1', False, True),
+}
+
+# indices are stored in the database of the case they belong to
+INDICES = [
+    Index('child1', 'parent', 'parent'),
+    Index('child2', 'parent', 'parent'),
+    Index('ext', 'host', 'host'),
+    Index('child1', 'host', 'host'),
+]
+
+
+def _db_for_case(case_id):
+    return CASES[case_id][0]
+
+
+class FakeDbAccessor(object):
+    """Stands in for the SQL case accessor with a sharded database
+
+    The plproxy queries look at every database while the ``*_in_db``
+    queries only look at the given one.
+    """
+
+    def __init__(self):
+        self.threads_by_db = {}
+
+    def get_related_indices(self, domain, case_ids, exclude_indices):
+        return self._get_related_indices(INDICES, case_ids, exclude_indices)
+
+    def get_related_indices_in_db(self, db_alias, domain, case_ids, exclude_indices):
+        self._record_thread(db_alias)
+        indices = [index for index in INDICES if _db_for_case(index.case_id) == db_alias]
+        return self._get_related_indices(indices, case_ids, exclude_indices)
+
+    def get_closed_and_deleted_ids(self, domain, case_ids):
+        return [CaseStatus(case_id, *CASES[case_id][1:]) for case_id in case_ids]
+
+    def get_closed_and_deleted_ids_in_db(self, db_alias, domain, case_ids):
+        self._record_thread(db_alias)
+        return [
+            CaseStatus(case_id, *CASES[case_id][1:]) for case_id in case_ids
+            if _db_for_case(case_id) == db_alias
+        ]
+
+    @staticmethod
+    def _get_related_indices(indices, case_ids, exclude_indices):
+        return [
+            index for index in indices
+            if (index.case_id in case_ids or index.referenced_id in case_ids)
+            and (index.case_id, index.identifier) not in exclude_indices
+        ]
+
+    def _record_thread(self, db_alias):
+        self.threads_by_db.setdefault(db_alias, set()).add(threading.current_thread().ident)
+
+
+class FakeCaseAccessor(object):
+
+    def __init__(self):
+        self.domain = 'index-accessor'
+        self.db_accessor = FakeDbAccessor()
+
+    def get_related_indices(self, case_ids, exclude_indices):
+        return self.db_accessor.get_related_indices(self.domain, case_ids, exclude_indices)
+
+    def get_closed_and_deleted_ids(self, case_ids):
+        return self.db_accessor.get_closed_and_deleted_ids(self.domain, case_ids)
+
+
+@patch('corehq.sql_db.util._close_connection')
+@patch('corehq.sql_db.util.get_db_alias_for_partitioned_doc', new=_db_for_case)
+@patch('corehq.sql_db.util.get_db_aliases_for_partitioned_query', return_value=['db1', 'db2'])
+class ParallelIndexAccessorTest(SimpleTestCase):
+
+    def setUp(self):
+        self.accessor = FakeCaseAccessor()
+
+    def _compare(self, query):
+        with SerialIndexAccessor(self.accessor) as serial:
+            expected = query(serial)
+        with ParallelIndexAccessor(self.accessor) as parallel:
+            actual = query(parallel)
+        self.assertEqual(sorted(actual), sorted(expected))
+        return actual
+
+    def test_get_related_indices(self, *args):
+        for case_ids, exclude_indices in [
+            (['parent'], set()),
+            (['host'], set()),
+            (['child1'], {('child1', 'parent')}),
+            (['parent', 'host', 'ext'], set()),
+        ]:
+            self._compare(lambda accessor: accessor.get_related_indices(case_ids, exclude_indices))
+
+    def test_get_closed_and_deleted_ids(self, *args):
+        result = self._compare(lambda accessor: accessor.get_closed_and_deleted_ids(list(CASES)))
+        self.assertEqual(len(result), len(CASES))
+
+    def test_thread_per_database(self, *args):
+        with ParallelIndexAccessor(self.accessor) as parallel:
+            parallel.get_related_indices(['parent'], set())
+            parallel.get_closed_and_deleted_ids(list(CASES))
+
+        threads_by_db = self.accessor.db_accessor.threads_by_db
+        self.assertEqual(set(threads_by_db), {'db1', 'db2'})
+        self.assertEqual(len(threads_by_db['db1']), 1)
+        self.assertEqual(len(threads_by_db['db2']), 1)
+        self.assertNotEqual(threads_by_db['db1'], threads_by_db['db2'])
+        self.assertNotIn(threading.current_thread().ident, threads_by_db['db1'] | threads_by_db['db2'])
@@ -783,6 +783,11 @@ class LiveQuerySyncTokenUpdateTestSQL(LiveQuerySyncTokenUpdateTest):
     pass
 
 
+@flag_enabled('LIVEQUERY_CASE_XML_CACHE')
+class LiveQueryCaseXMLCacheSyncTokenUpdateTestSQL(LiveQuerySyncTokenUpdateTestSQL):
+    pass
+
+
 class SyncDeletedCasesTest(BaseSyncTest):
 
     def test_deleted_case_doesnt_sync(self):
@@ -6,13 +6,15 @@ import os
 from django.test import SimpleTestCase
 from lxml import html, etree
 from mock import patch, Mock
+import openpyxl
 
-from couchexport.export import export_from_tables
+from couchexport.export import FormattedRow, export_from_tables
 from couchexport.models import Format
 from couchexport.writers import (
     MAX_XLS_COLUMNS,
     CsvFileWriter,
     PythonDictWriter,
+    StreamingExcel2007ExportWriter,
     XlsLengthException,
     ZippedExportWriter,
 )
@@ -121,6 +123,46 @@ class Excel2007ExportWriterTests(SimpleTestCase):
         export_from_tables(tables, file_, format_)
 
 
+class StreamingExcel2007ExportWriterTests(SimpleTestCase):
+
+    def _write(self, header_table, rows, format_as_text=False):
+        file_ = io.BytesIO()
+        writer = StreamingExcel2007ExportWriter(format_as_text=format_as_text)
+        writer.open(header_table, file_)
+        writer.write(rows)
+        writer.close()
+        file_.seek(0)
+        return openpyxl.load_workbook(file_)
+
+    def test_values(self):
+        workbook = self._write(
+            [('table', [['text', 'number', 'empty', 'escaped']])],
+            [('table', [
+                [b'row1\xe2\x80\x931', 1, None, '<a & b>'],
+                ['bad\x01char', 2.5, '', ' padded '],
+            ])],
+        )
+        self.assertEqual(workbook.sheetnames, ['table'])
+        rows = [[cell.value for cell in row] for row in workbook['table'].iter_rows()]
+        self.assertEqual(rows, [
+            ['text', 'number', 'empty', 'escaped'],
+            ['row1\u20131', 1, None, '<a & b>'],
+            ['bad?char', 2.5, None, ' padded '],
+        ])
+
+    def test_hyperlinks_and_text_format(self):
+        workbook = self._write(
+            [('table', [['link', 'value']]), ('other', [['header']])],
+            [('table', [FormattedRow(['http://example.com/?a=1&b=2', 5], hyperlink_column_indices=[0])])],
+            format_as_text=True,
+        )
+        self.assertEqual(workbook.sheetnames, ['table', 'other'])
+        link, value = workbook['table']['A2'], workbook['table']['B2']
+        self.assertEqual(link.hyperlink.target, 'http://example.com/?a=1&b=2')
+        self.assertEqual(value.number_format, '@')
+        self.assertEqual(value.value, 5)
+
+
 class Excel2003ExportWriterTests(SimpleTestCase):
 
     def test_data_length(self):
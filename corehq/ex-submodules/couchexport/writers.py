@@ -1,14 +1,17 @@
 import io
 from base64 import b64decode
 from codecs import BOM_UTF8
+import math
 import os
 import re
+import shutil
 import tempfile
 import zipfile
 import csv
 import json
 import bz2
 from collections import OrderedDict
+from xml.sax.saxutils import escape, quoteattr
 import openpyxl
 
 from django.template.loader import render_to_string, get_template
@@ -18,10 +21,16 @@ import xlwt
 from couchexport.models import Format
 from openpyxl.styles import numbers
 from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
 
 
 MAX_XLS_COLUMNS = 256
 
+# Source: http://stackoverflow.com/questions/1707890/fast-way-to-filter-illegal-xml-unicode-chars-in-python
+DIRTY_XML_CHARS = re.compile(
+    '[\x00-\x08\x0b-\x1f\x7f-\x84\x86-\x9f\ud800-\udfff\ufdd0-\ufddf\ufffe-\uffff]'
+)
+
 
 class XlsLengthException(Exception):
     pass
@@ -382,21 +391,10 @@ class Excel2007ExportWriter(ExportWriter):
         from couchexport.export import FormattedRow
         sheet = self.tables[sheet_index]
 
-        # Source: http://stackoverflow.com/questions/1707890/fast-way-to-filter-illegal-xml-unicode-chars-in-python
-        dirty_chars = re.compile(
-            '[\x00-\x08\x0b-\x1f\x7f-\x84\x86-\x9f\ud800-\udfff\ufdd0-\ufddf\ufffe-\uffff]'
-        )
-
         def get_write_value(value):
             if isinstance(value, (int, float)):
                 return value
-            if isinstance(value, bytes):
-                value = value.decode('utf-8')
-            elif value is not None:
-                value = str(value)
-            else:
-                value = ''
-            return dirty_chars.sub('?', value)
+            return _clean_xml_string(value)
 
         write_values = [get_write_value(val) for val in row]
         cells = [WriteOnlyCell(sheet, val) for val in write_values]
@@ -416,6 +414,257 @@ class Excel2007ExportWriter(ExportWriter):
         self.book.save(self.file)
 
 
+def _clean_xml_string(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    elif value is not None:
+        value = str(value)
+    else:
+        value = ''
+    return DIRTY_XML_CHARS.sub('?', value)
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+XLSX_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{number}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_SHEET = '<sheet name={name} sheetId="{number}" r:id="rId{number}"/>'
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '<Relationship Id="rId{styles_number}" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK_SHEET_REL = (
+    '<Relationship Id="rId{number}" Target="worksheets/sheet{number}.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+)
+# cell formats: 0 is the default, 1 is text and 2 is the built in "Hyperlink" style
+XLSX_TEXT_STYLE = '1'
+XLSX_HYPERLINK_STYLE = '2'
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><u/><sz val="11"/><color rgb="FF0000FF"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="2">'
+    '<fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '</fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="2">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0"/>'
+    '</cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="49" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="1" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="2">'
+    '<cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    '<cellStyle name="Hyperlink" xfId="1" builtinId="8"/>'
+    '</cellStyles>'
+    '</styleSheet>'
+)
+XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheetData>'
+)
+XLSX_SHEET_RELS_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+)
+XLSX_HYPERLINK_REL = (
+    '<Relationship Id="rId{number}" Target={target} TargetMode="External" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"/>'
+)
+# zip entries larger than this need zip64 extensions
+ZIP64_LIMIT = (1 << 31) - 1
+
+
+class _XlsxSheetFile(object):
+    """The sheet data and hyperlinks of one worksheet, kept in temporary files"""
+
+    def __init__(self):
+        self.rows = tempfile.TemporaryFile('w+b')
+        self.hyperlinks = tempfile.TemporaryFile('w+b')
+        self.hyperlink_rels = tempfile.TemporaryFile('w+b')
+        self.num_rows = 0
+        self.num_hyperlinks = 0
+
+    def add_hyperlink(self, ref, target):
+        self.num_hyperlinks += 1
+        self.hyperlinks.write(
+            '<hyperlink ref="{}" r:id="rId{}"/>'.format(ref, self.num_hyperlinks).encode('utf-8')
+        )
+        self.hyperlink_rels.write(XLSX_HYPERLINK_REL.format(
+            number=self.num_hyperlinks,
+            target=quoteattr(target),
+        ).encode('utf-8'))
+
+    @property
+    def size(self):
+        return self.rows.tell() + self.hyperlinks.tell()
+
+    @property
+    def rels_size(self):
+        return self.hyperlink_rels.tell()
+
+    def write_sheet(self, fileobj):
+        fileobj.write(XLSX_SHEET_START.encode('utf-8'))
+        self.rows.seek(0)
+        shutil.copyfileobj(self.rows, fileobj)
+        fileobj.write(b'</sheetData>')
+        if self.num_hyperlinks:
+            fileobj.write(b'<hyperlinks>')
+            self.hyperlinks.seek(0)
+            shutil.copyfileobj(self.hyperlinks, fileobj)
+            fileobj.write(b'</hyperlinks>')
+        fileobj.write(b'</worksheet>')
+
+    def write_rels(self, fileobj):
+        fileobj.write(XLSX_SHEET_RELS_START.encode('utf-8'))
+        self.hyperlink_rels.seek(0)
+        shutil.copyfileobj(self.hyperlink_rels, fileobj)
+        fileobj.write(b'</Relationships>')
+
+    def close(self):
+        self.rows.close()
+        self.hyperlinks.close()
+        self.hyperlink_rels.close()
+
+
+class StreamingExcel2007ExportWriter(Excel2007ExportWriter):
+    """
+    Writes the worksheet XML of an XLSX file directly to a temporary file
+    per sheet instead of building openpyxl cells, and zips the sheets up
+    on close.
+
+    Strings are written inline rather than to a shared strings table, so
+    apart from a counter nothing is kept in memory per row. Unlike
+    openpyxl, strings starting with "=" are written as text, not formulas.
+    """
+
+    def _init(self):
+        self.tables = OrderedDict()
+        self.table_names = OrderedDict()
+        self._column_letters = []
+
+    def _init_table(self, table_index, table_title):
+        self.tables[table_index] = _XlsxSheetFile()
+        self.table_names[table_index] = table_title
+
+    def _get_column_letters(self, num_columns):
+        column_letters = self._column_letters
+        while len(column_letters) < num_columns:
+            column_letters.append(get_column_letter(len(column_letters) + 1))
+        return column_letters
+
+    def _write_row(self, sheet_index, row):
+        from couchexport.export import FormattedRow
+        sheet = self.tables[sheet_index]
+        sheet.num_rows += 1
+        row_number = str(sheet.num_rows)
+
+        values = list(row)
+        column_letters = self._get_column_letters(len(values))
+        if isinstance(row, FormattedRow):
+            hyperlink_column_indices = set(row.hyperlink_column_indices)
+        else:
+            hyperlink_column_indices = ()
+        style = XLSX_TEXT_STYLE if self.format_as_text else None
+
+        cells = []
+        for column_index, value in enumerate(values):
+            ref = column_letters[column_index] + row_number
+            if column_index in hyperlink_column_indices:
+                value = _clean_xml_string(value)
+                if value:
+                    sheet.add_hyperlink(ref, value)
+                cells.append(_get_xlsx_cell(ref, value, XLSX_HYPERLINK_STYLE))
+            else:
+                cells.append(_get_xlsx_cell(ref, value, style))
+        sheet.rows.write('<row r="{}">{}</row>'.format(row_number, ''.join(cells)).encode('utf-8'))
+
+    def _close(self):
+        sheets = list(self.tables.values())
+        numbers = range(1, len(sheets) + 1)
+        try:
+            with zipfile.ZipFile(self.file, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES.format(sheets=''.join(
+                    XLSX_SHEET_CONTENT_TYPE.format(number=number) for number in numbers
+                )))
+                archive.writestr('_rels/.rels', XLSX_ROOT_RELS)
+                archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(sheets=''.join(
+                    XLSX_WORKBOOK_SHEET.format(name=quoteattr(_clean_xml_string(name)), number=number)
+                    for name, number in zip(self.table_names.values(), numbers)
+                )))
+                archive.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS.format(
+                    sheets=''.join(XLSX_WORKBOOK_SHEET_REL.format(number=number) for number in numbers),
+                    styles_number=len(sheets) + 1,
+                ))
+                archive.writestr('xl/styles.xml', XLSX_STYLES)
+                for sheet, number in zip(sheets, numbers):
+                    sheet_path = 'xl/worksheets/sheet{}.xml'.format(number)
+                    with archive.open(sheet_path, 'w', force_zip64=sheet.size > ZIP64_LIMIT) as sheet_file:
+                        sheet.write_sheet(sheet_file)
+                    if sheet.num_hyperlinks:
+                        rels_path = 'xl/worksheets/_rels/sheet{}.xml.rels'.format(number)
+                        with archive.open(rels_path, 'w', force_zip64=sheet.rels_size > ZIP64_LIMIT) as rels_file:
+                            sheet.write_rels(rels_file)
+        finally:
+            for sheet in sheets:
+                sheet.close()
+
+
+def _get_xlsx_cell(ref, value, style=None):
+    style_attr = ' s="{}"'.format(style) if style else ''
+    if isinstance(value, bool):
+        return '<c r="{}" t="b"{}><v>{:d}</v></c>'.format(ref, style_attr, value)
+    if isinstance(value, int) or (isinstance(value, float) and math.isfinite(value)):
+        return '<c r="{}"{}><v>{!r}</v></c>'.format(ref, style_attr, value)
+    value = _clean_xml_string(value)
+    if not value:
+        return '<c r="{}"{}/>'.format(ref, style_attr) if style else ''
+    space = ' xml:space="preserve"' if value[0].isspace() or value[-1].isspace() else ''
+    return '<c r="{}" t="inlineStr"{}><is><t{}>{}</t></is></c>'.format(
+        ref, style_attr, space, escape(value)
+    )
+
+
 class Excel2003ExportWriter(ExportWriter):
     format = Format.XLS
     max_table_name_size = 31
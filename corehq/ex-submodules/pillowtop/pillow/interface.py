@@ -38,6 +38,9 @@ class PillowRuntimeContext(object):
 
     def __init__(self, changes_seen=0):
         self.changes_seen = changes_seen
+        # feed offsets at the end of the chunk being checkpointed. Only set when
+        # processing is pipelined, in which case the feed runs ahead of processing.
+        self.processed_offsets = None
 
     def reset(self):
         self.changes_seen = 0
@@ -53,6 +56,9 @@ class PillowBase(metaclass=ABCMeta):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # number of chunks that may be queued between each stage when processing
+    # is pipelined. 0 disables pipelining. Only applies if there are batch processors.
+    processor_pipeline_depth = 0
 
     @abstractproperty
     def pillow_id(self):
@@ -139,6 +145,9 @@ class PillowBase(metaclass=ABCMeta):
             batch processors. If there are batch processors, checkpoint is updated
             at the end of the batch, otherwise is updated for every change.
         """
+        if self.processor_pipeline_depth and self.batch_processors:
+            return self._process_changes_pipelined(since, forever)
+
         context = PillowRuntimeContext(changes_seen=0)
         min_wait_seconds = 30
 
@@ -181,6 +190,70 @@ class PillowBase(metaclass=ABCMeta):
             process_offset_chunk(changes_chunk, context)
             self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
 
+    def _process_changes_pipelined(self, since, forever):
+        """
+        Same as ``process_changes`` for batch processors except that reading the
+        change feed, fetching documents and running the processors happen
+        concurrently on separate threads (see ``ChangeProcessingPipeline``).
+
+            The checkpoint is only ever updated from this thread, to the feed
+            offsets recorded when the last fully processed chunk was closed.
+        """
+        from pillowtop.pillow.pipeline import ChangeProcessingPipeline, OffsetChunk
+
+        context = PillowRuntimeContext(changes_seen=0)
+        min_wait_seconds = 30
+        change_feed = self.get_change_feed()
+        pipeline = ChangeProcessingPipeline(self, self.processor_pipeline_depth)
+
+        def checkpoint_completed(chunks):
+            for chunk in chunks:
+                context.changes_seen += len(chunk)
+                context.processed_offsets = chunk.processed_offsets
+                self._update_checkpoint(chunk.changes[-1], context)
+
+        changes_chunk = []
+        # feed offsets as they were when the last change in the chunk was read
+        chunk_offsets = None
+
+        def close_chunk():
+            nonlocal changes_chunk
+            if changes_chunk:
+                pipeline.put(OffsetChunk(changes_chunk, chunk_offsets))
+                changes_chunk = []
+
+        last_process_time = datetime.utcnow()
+        checkpoint_reset = False
+        pipeline.start()
+        try:
+            try:
+                for change in change_feed.iter_changes(since=since or None, forever=forever):
+                    if change:
+                        changes_chunk.append(change)
+                        chunk_offsets = change_feed.get_processed_offsets()
+                        chunk_full = len(changes_chunk) == self.processor_chunk_size
+                        time_elapsed = (datetime.utcnow() - last_process_time).seconds > min_wait_seconds
+                        if chunk_full or time_elapsed:
+                            last_process_time = datetime.utcnow()
+                            close_chunk()
+                    else:
+                        self._update_checkpoint(None, None)
+                    checkpoint_completed(pipeline.iter_completed())
+                close_chunk()
+                checkpoint_completed(pipeline.drain())
+            except PillowtopCheckpointReset:
+                checkpoint_reset = True
+                # the reset may have interrupted draining, in which case
+                # the remaining changes are already in the pipeline
+                if not pipeline.stopped:
+                    close_chunk()
+                checkpoint_completed(pipeline.drain())
+        finally:
+            pipeline.close()
+
+        if checkpoint_reset:
+            self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
+
     def _batch_process_with_error_handling(self, changes_chunk):
         """
         Process given chunk in batch mode first on batch-processors
@@ -402,7 +475,7 @@ class ChangeEventHandler(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_new_seq(self, change):
+    def get_new_seq(self, change, context=None):
         """
         :return: appropriate sequence value to update the checkpoint to
         """
@@ -416,11 +489,12 @@ class ConstructedPillow(PillowBase):
     """
 
     def __init__(self, name, checkpoint, change_feed, processor,
-                 change_processed_event_handler=None, processor_chunk_size=0):
+                 change_processed_event_handler=None, processor_chunk_size=0, processor_pipeline_depth=0):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
         self.processor_chunk_size = processor_chunk_size
+        self.processor_pipeline_depth = processor_pipeline_depth
         if isinstance(processor, list):
             self.processors = processor
         else:
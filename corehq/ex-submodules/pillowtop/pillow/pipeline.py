@@ -0,0 +1,169 @@
+import sys
+import threading
+from queue import Queue
+
+from django.db import connections
+
+from dimagi.utils.logging import notify_exception
+from pillowtop.logger import pillow_logging
+from pillowtop.utils import bulk_fetch_changes_docs
+
+# sentinel pushed through the stage queues to signal the end of the feed
+STOP = object()
+
+
+class OffsetChunk(object):
+    """
+    A chunk of changes as read from the change feed along with the feed
+    offsets as they were when the chunk was closed.
+    """
+
+    def __init__(self, changes, processed_offsets=None):
+        self.changes = changes
+        self.processed_offsets = processed_offsets
+
+    def __len__(self):
+        return len(self.changes)
+
+
+class PipelineStage(threading.Thread):
+    """
+    Thread that takes chunks from ``in_queue``, applies ``fn`` to them and
+    passes them on to ``out_queue`` in the order they were received.
+
+    Any exception raised by ``fn`` is kept in ``exc_info`` so that it can be
+    re-raised by the thread driving the pipeline. After that, or once
+    ``discard`` is set, the stage discards its input so that upstream stages
+    never block on a full queue.
+    """
+
+    def __init__(self, name, fn, in_queue, out_queue, discard):
+        super(PipelineStage, self).__init__(name=name, daemon=True)
+        self.fn = fn
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.discard = discard
+        self.exc_info = None
+
+    def run(self):
+        try:
+            while True:
+                chunk = self.in_queue.get()
+                if chunk is STOP:
+                    break
+                if self.exc_info or self.discard.is_set():
+                    continue
+                try:
+                    self.fn(chunk)
+                except Exception:
+                    self.exc_info = sys.exc_info()
+                else:
+                    self.out_queue.put(chunk)
+        finally:
+            self.out_queue.put(STOP)
+            # django connections are thread local so need closing here
+            connections.close_all()
+
+
+class ChangeProcessingPipeline(object):
+    """
+    Runs document fetching and processing of change chunks on separate threads
+    so that they overlap with reading from the change feed.
+
+        feed (caller thread) -> fetch stage -> process stage -> completed (caller thread)
+
+    Queues between stages are bounded by ``depth`` so that a slow stage applies
+    back-pressure to the feed. Chunks always complete in the order they were
+    fed in, so checkpointing a completed chunk never skips unprocessed changes.
+    """
+
+    def __init__(self, pillow, depth):
+        self.pillow = pillow
+        self.fetch_queue = Queue(maxsize=depth)
+        self.process_queue = Queue(maxsize=depth)
+        self.completed_queue = Queue()
+        self._discard = threading.Event()
+        self.stages = [
+            PipelineStage('{}-fetch'.format(pillow.get_name()), self._prefetch_documents,
+                          self.fetch_queue, self.process_queue, self._discard),
+            PipelineStage('{}-process'.format(pillow.get_name()), self._process_chunk,
+                          self.process_queue, self.completed_queue, self._discard),
+        ]
+        self._stopped = False
+        self._finished = False
+
+    @property
+    def stopped(self):
+        return self._stopped
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+
+    def put(self, chunk):
+        """Blocks if the pipeline is full"""
+        if self._stopped:
+            raise ValueError("Can't add chunks to a pipeline that is being drained")
+        self._raise_stage_errors()
+        self.fetch_queue.put(chunk)
+
+    def iter_completed(self, block=False):
+        """
+        Yield chunks that have been fully processed.
+
+        :param block: if True wait for every chunk in the pipeline to complete
+        """
+        while not self._finished:
+            if not block and self.completed_queue.empty():
+                break
+            chunk = self.completed_queue.get()
+            if chunk is STOP:
+                self._finished = True
+                break
+            yield chunk
+        self._raise_stage_errors()
+
+    def drain(self):
+        """
+        Stop accepting chunks and yield all remaining chunks once processed.
+        May be called again to resume draining if the caller was interrupted.
+        """
+        self._stop()
+        for chunk in self.iter_completed(block=True):
+            yield chunk
+        for stage in self.stages:
+            stage.join()
+        self._raise_stage_errors()
+
+    def close(self):
+        """Discard any chunks still in the pipeline and wait for the stages to exit"""
+        self._discard.set()
+        self._stop()
+        for stage in self.stages:
+            stage.join()
+
+    def _stop(self):
+        if not self._stopped:
+            self._stopped = True
+            self.fetch_queue.put(STOP)
+
+    def _raise_stage_errors(self):
+        for stage in self.stages:
+            if stage.exc_info:
+                raise stage.exc_info[1].with_traceback(stage.exc_info[2])
+
+    def _prefetch_documents(self, chunk):
+        changes = [
+            change for change in self.pillow._deduplicate_changes(chunk.changes)
+            if change.should_fetch_document()
+        ]
+        try:
+            bulk_fetch_changes_docs(changes)
+        except Exception as e:
+            # processors fetch whatever documents are still missing
+            # so failure here only costs us the overlap
+            pillow_logging.exception("[%s] Error prefetching documents", self.pillow.get_name())
+            notify_exception(None, "{} error prefetching documents: {}".format(self.pillow.get_name(), e))
+
+    def _process_chunk(self, chunk):
+        self.pillow._batch_process_with_error_handling(chunk.changes)
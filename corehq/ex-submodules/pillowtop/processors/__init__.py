@@ -1,3 +1,3 @@
 from .interface import PillowProcessor, BulkPillowProcessor
 from .sample import NoopProcessor, LoggingProcessor
-from .elastic import ElasticProcessor
+from .elastic import ElasticProcessor, BulkElasticProcessor
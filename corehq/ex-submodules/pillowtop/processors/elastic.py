@@ -76,6 +76,8 @@ class ElasticProcessor(PillowProcessor):
 
         # send it across
         with self._datadog_timing('load'):
+            # index (rather than create) so that the doc is created or
+            # replaced in a single request
             send_to_elasticsearch(
                 index=self.index_info.index,
                 doc_type=self.index_info.type,
@@ -83,15 +85,19 @@ class ElasticProcessor(PillowProcessor):
                 es_getter=self.es_getter,
                 name='ElasticProcessor',
                 data=doc_ready_to_save,
-                update=self._doc_exists(change.id),
+                update=True,
             )
 
-    def _doc_exists(self, doc_id):
-        return self.elasticsearch.exists(self.index_info.index, self.index_info.type, doc_id)
-
     def _delete_doc_if_exists(self, doc_id):
-        if self._doc_exists(doc_id):
-            self.elasticsearch.delete(self.index_info.index, self.index_info.type, doc_id)
+        # send_to_elasticsearch ignores docs that are not in the index
+        send_to_elasticsearch(
+            index=self.index_info.index,
+            doc_type=self.index_info.type,
+            doc_id=doc_id,
+            es_getter=self.es_getter,
+            name='ElasticProcessor',
+            delete=True,
+        )
 
     def _datadog_timing(self, step):
         return datadog_bucket_timer('commcare.change_feed.processor.timing', tags=[
@@ -102,6 +108,10 @@ class ElasticProcessor(PillowProcessor):
 
 class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
     def process_changes_chunk(self, changes_chunk):
+        # deletions don't need the document, so send them with the rest
+        # of the chunk instead of falling back to processing them serially
+        deleted_changes = [change for change in changes_chunk if change.deleted and change.id]
+        changes_chunk = [change for change in changes_chunk if not (change.deleted and change.id)]
         bad_changes, docs = bulk_fetch_changes_docs(changes_chunk)
 
         changes_to_process = {
@@ -109,6 +119,7 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
             for change in changes_chunk
             if change.document and not self.doc_filter_fn(change.document)
         }
+        changes_to_process.update((change.id, change) for change in deleted_changes)
         retry_changes = list(bad_changes)
 
         error_collector = ErrorCollector()
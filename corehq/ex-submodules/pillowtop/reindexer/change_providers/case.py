@@ -23,21 +23,24 @@ def get_couch_domain_case_change_provider(domain):
 
 class SqlDomainCaseChangeProvider(ChangeProvider):
 
-    def __init__(self, domain, limit_db_aliases=None):
+    def __init__(self, domain, limit_db_aliases=None, concurrent=False):
         self.domain = domain
         self.limit_db_aliases = limit_db_aliases
+        self.concurrent = concurrent
 
     def iter_all_changes(self, start_from=None):
         accessor = CaseReindexAccessor(self.domain, limit_db_aliases=self.limit_db_aliases)
-        for case in iter_all_rows(accessor):
+        for case in iter_all_rows(accessor, concurrent=self.concurrent):
             yield _sql_case_to_change(case)
 
 
-def get_domain_case_change_provider(domains, limit_db_aliases=None):
+def get_domain_case_change_provider(domains, limit_db_aliases=None, concurrent=False):
     change_providers = []
     for domain in domains:
         if should_use_sql_backend(domain):
-            change_providers.append(SqlDomainCaseChangeProvider(domain, limit_db_aliases=limit_db_aliases))
+            change_providers.append(SqlDomainCaseChangeProvider(
+                domain, limit_db_aliases=limit_db_aliases, concurrent=concurrent
+            ))
         else:
             change_providers.append(get_couch_domain_case_change_provider(domain))
     return CompositeChangeProvider(change_providers)
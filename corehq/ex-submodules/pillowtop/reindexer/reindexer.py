@@ -98,6 +98,12 @@ class ReindexerFactory(metaclass=ABCMeta):
             dest='limit_to_db',
             help="Limit the reindexer to only a specific SQL database. Allows running multiple in parallel."
         )
+        parser.add_argument(
+            '--concurrent',
+            action='store_true',
+            dest='concurrent',
+            help="Read from all SQL databases at the same time instead of one after another."
+        )
 
     @staticmethod
     def domain_arg(parser):
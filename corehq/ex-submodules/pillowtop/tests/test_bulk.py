@@ -51,6 +51,13 @@ class BulkTest(SimpleTestCase):
         ])
         self.assertEqual([(1, 'e1'), (2, 'e2')], errors)
 
+    def test_get_errors_with_ids_ignores_missing_deletes(self):
+        errors = get_errors_with_ids([
+            {'delete': {'_id': 1, 'status': 404, 'found': False}},
+            {'delete': {'_id': 2, 'status': 500, 'error': 'e2'}}
+        ])
+        self.assertEqual([(2, 'e2')], errors)
+
 
 @use_sql_backend
 class TestBulkDocOperations(TestCase):
@@ -121,6 +128,18 @@ class TestBulkDocOperations(TestCase):
         }
         self.assertEqual(set(self.case_ids), ids_in_es)
 
+        deleted_changes = [
+            Change(id=case_id, sequence_id=None, deleted=True)
+            for case_id in self.case_ids[:2] + [uuid.uuid4().hex]
+        ]
+        retry, errors = processor.process_changes_chunk(deleted_changes)
+        self.assertEqual([], retry)
+        self.assertEqual([], errors)
+
+        es_docs = self.es_interface.get_bulk_docs(
+            index=self.index, doc_type=TEST_INDEX_INFO.type, doc_ids=self.case_ids)
+        self.assertEqual(set(self.case_ids[2:]), {doc['_id'] for doc in es_docs})
+
     def test_process_changes_chunk_with_errors(self):
         mock_response = (5, [{'index': {'_id': self.case_ids[0], 'error': 'DateParseError'}}])
         processor = BulkElasticProcessor(Mock(), TEST_INDEX_INFO)
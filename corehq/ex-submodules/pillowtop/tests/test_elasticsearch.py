@@ -3,6 +3,9 @@ import uuid
 
 from django.conf import settings
 from django.test import SimpleTestCase
+
+from mock import patch
+
 from corehq.util.es.elasticsearch import ConnectionError
 
 from corehq.elastic import get_es_new
@@ -19,7 +22,8 @@ from pillowtop.es_utils import (
 from pillowtop.index_settings import INDEX_REINDEX_SETTINGS, INDEX_STANDARD_SETTINGS
 from corehq.util.es.interface import ElasticsearchInterface
 from pillowtop.exceptions import PillowtopIndexingError
-from pillowtop.processors.elastic import send_to_elasticsearch
+from pillowtop.feed.interface import Change
+from pillowtop.processors.elastic import ElasticProcessor, send_to_elasticsearch
 from .utils import get_doc_count, get_index_mapping, TEST_INDEX_INFO
 
 
@@ -257,3 +261,45 @@ class TestSendToElasticsearch(SimpleTestCase):
 
         # attempt to create the same doc twice shouldn't fail
         self._send_to_es_and_check(doc)
+
+
+class TestElasticProcessor(SimpleTestCase):
+
+    def setUp(self):
+        self.es = get_es_new()
+        self.es_interface = ElasticsearchInterface(self.es)
+        self.index = TEST_INDEX_INFO.index
+        self.processor = ElasticProcessor(self.es, TEST_INDEX_INFO)
+
+        with trap_extra_setup(ConnectionError):
+            ensure_index_deleted(self.index)
+            initialize_index_and_mapping(self.es, TEST_INDEX_INFO)
+
+    def tearDown(self):
+        ensure_index_deleted(self.index)
+
+    def _process(self, doc, deleted=False):
+        with patch.object(self.es, 'exists') as exists:
+            self.processor.process_change(Change(id=doc['_id'], sequence_id=None, document=doc, deleted=deleted))
+        # docs are created, replaced or deleted in a single request
+        exists.assert_not_called()
+
+    def test_create_update_delete(self):
+        doc = {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc', 'property': 'foo'}
+        self._process(doc)
+        es_doc = self.es_interface.get_doc(self.index, TEST_INDEX_INFO.type, doc['_id'])
+        self.assertEqual(es_doc['property'], 'foo')
+
+        doc['property'] = 'bar'
+        self._process(doc)
+        self.assertEqual(1, get_doc_count(self.es, self.index))
+        es_doc = self.es_interface.get_doc(self.index, TEST_INDEX_INFO.type, doc['_id'])
+        self.assertEqual(es_doc['property'], 'bar')
+
+        self._process(doc, deleted=True)
+        self.assertEqual(0, get_doc_count(self.es, self.index))
+
+    def test_delete_missing_doc(self):
+        doc = {'_id': uuid.uuid4().hex, 'doc_type': 'MyCoolDoc-Deleted', 'property': 'foo'}
+        self._process(doc)
+        self.assertEqual(0, get_doc_count(self.es, self.index))
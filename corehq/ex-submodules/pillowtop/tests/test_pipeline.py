@@ -0,0 +1,119 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from mock import Mock
+
+from pillowtop.dao.mock import MockDocumentStore
+from pillowtop.feed.interface import Change, ChangeMeta
+from pillowtop.feed.mock import MockChangeFeed
+from pillowtop.pillow.interface import ConstructedPillow
+from pillowtop.processors.interface import BulkPillowProcessor
+
+
+class RecordingBulkProcessor(BulkPillowProcessor):
+
+    def __init__(self, fail_on=None):
+        self.chunks = []
+        self.fail_on = fail_on
+
+    def process_change(self, change):
+        self.chunks.append([change.id])
+
+    def process_changes_chunk(self, changes_chunk):
+        if self.fail_on in [change.id for change in changes_chunk]:
+            raise Exception('boom')
+        self.chunks.append([(change.id, change.document) for change in changes_chunk])
+        return [], []
+
+
+class RecordingEventHandler(object):
+
+    def __init__(self, fail_on=None):
+        self.checkpoints = []
+        self.fail_on = fail_on
+
+    def update_checkpoint(self, change, context):
+        if change.id == self.fail_on:
+            raise Exception('checkpoint failed')
+        self.checkpoints.append((change.id, context.processed_offsets))
+        return False
+
+
+def _make_change(seq, document_store):
+    doc_id = 'doc-{}'.format(seq)
+    return Change(
+        id=doc_id,
+        sequence_id=seq,
+        metadata=ChangeMeta(document_id=doc_id, data_source_type='sql', data_source_name='test'),
+        document_store=document_store,
+    )
+
+
+class PipelinedProcessingTest(SimpleTestCase):
+
+    def _get_pillow(self, changes, processor, chunk_size=3, checkpoint_fail_on=None):
+        self.event_handler = RecordingEventHandler(checkpoint_fail_on)
+        return ConstructedPillow(
+            name='test-pipelined-pillow',
+            checkpoint=Mock(),
+            change_feed=MockChangeFeed(changes),
+            processor=processor,
+            change_processed_event_handler=self.event_handler,
+            processor_chunk_size=chunk_size,
+            processor_pipeline_depth=2,
+        )
+
+    def test_chunks_processed_in_order_with_documents(self):
+        store = MockDocumentStore({'doc-{}'.format(i): {'_id': 'doc-{}'.format(i)} for i in range(7)})
+        processor = RecordingBulkProcessor()
+        pillow = self._get_pillow([_make_change(i, store) for i in range(7)], processor)
+        pillow.process_changes(since=0, forever=False)
+
+        self.assertEqual(
+            [[change_id for change_id, _ in chunk] for chunk in processor.chunks],
+            [['doc-0', 'doc-1', 'doc-2'], ['doc-3', 'doc-4', 'doc-5'], ['doc-6']]
+        )
+        # documents were fetched before the chunk reached the processor
+        self.assertTrue(all(doc for chunk in processor.chunks for _, doc in chunk))
+
+    def test_checkpoint_at_processed_offsets(self):
+        store = MockDocumentStore({'doc-{}'.format(i): {'_id': 'doc-{}'.format(i)} for i in range(7)})
+        pillow = self._get_pillow([_make_change(i, store) for i in range(7)], RecordingBulkProcessor())
+        pillow.process_changes(since=0, forever=False)
+
+        # offsets are those of the last change in each chunk, not how far the feed had got
+        self.assertEqual(self.event_handler.checkpoints, [
+            ('doc-2', {'test': 2}),
+            ('doc-5', {'test': 5}),
+            ('doc-6', {'test': 6}),
+        ])
+
+    def test_idle_feed_touches_checkpoint(self):
+        pillow = self._get_pillow([None, None], RecordingBulkProcessor())
+        pillow.process_changes(since=0, forever=False)
+        self.assertEqual(pillow.checkpoint.touch.call_count, 2)
+
+    def test_stages_stopped_on_error(self):
+        store = MockDocumentStore({'doc-{}'.format(i): {'_id': 'doc-{}'.format(i)} for i in range(7)})
+        pillow = self._get_pillow([_make_change(i, store) for i in range(7)], RecordingBulkProcessor(),
+                                  checkpoint_fail_on='doc-2')
+        with self.assertRaisesMessage(Exception, 'checkpoint failed'):
+            pillow.process_changes(since=0, forever=False)
+
+        self.assertFalse([
+            thread for thread in threading.enumerate()
+            if thread.name.startswith('test-pipelined-pillow')
+        ])
+
+    def test_chunk_failure_falls_back_to_serial(self):
+        store = MockDocumentStore({'doc-{}'.format(i): {'_id': 'doc-{}'.format(i)} for i in range(4)})
+        processor = RecordingBulkProcessor(fail_on='doc-1')
+        pillow = self._get_pillow([_make_change(i, store) for i in range(4)], processor)
+        pillow.process_changes(since=0, forever=False)
+
+        self.assertEqual(processor.chunks, [
+            ['doc-0'], ['doc-1'], ['doc-2'],
+            [('doc-3', {'_id': 'doc-3'})],
+        ])
+        self.assertEqual([change_id for change_id, _ in self.event_handler.checkpoints], ['doc-2', 'doc-3'])
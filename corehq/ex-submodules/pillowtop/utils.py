@@ -356,6 +356,8 @@ def get_errors_with_ids(es_action_errors):
     return [
         (item['_id'], item['error'])
         for op_type, item in _changes_to_list(es_action_errors)
+        # deleting a doc that is not in the index is not an error
+        if not (op_type == 'delete' and item.get('status') == 404)
     ]
 
 
@@ -1,4 +1,6 @@
 from casexml.apps.case.exceptions import IllegalCaseId
+from dimagi.utils.couch import acquire_lock, release_lock
+
 from corehq.form_processor.backends.sql.dbaccessors import CaseAccessorSQL
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.casedb_base import AbstractCaseDbCache
@@ -21,6 +23,46 @@ class CaseDbCacheSQL(AbstractCaseDbCache):
             if not self.deleted_ok:
                 raise IllegalCaseId("Case [%s] is deleted " % case.case_id)
 
+    def prefetch(self, case_ids):
+        """
+        Acquire the locks for all cases up front and load them with a single query.
+        Only pass the cases being updated: others (e.g. the cases they index)
+        would be locked until the cache is closed.
+
+        Cases that are not found or not valid are left for ``get`` to handle as usual
+        so their locks are released here.
+        """
+        case_ids = sorted({case_id for case_id in case_ids if case_id and case_id not in self.cache})
+        if len(case_ids) < 2:
+            return
+
+        locks = {}
+        if self.lock:
+            # acquire in a consistent order to avoid deadlocks between concurrent submissions
+            for case_id in case_ids:
+                lock = CommCareCaseSQL.get_obj_lock_by_id(case_id)
+                locks[case_id] = acquire_lock(lock, degrade_gracefully=True, blocking=True)
+
+        try:
+            cases = CaseAccessorSQL.get_cases(case_ids)
+        except Exception:
+            for lock in locks.values():
+                release_lock(lock, True)
+            raise
+
+        for case in cases:
+            try:
+                self._validate_case(case)
+            except IllegalCaseId:
+                continue
+            self.set(case.case_id, case)
+            lock = locks.pop(case.case_id, None)
+            if lock is not None:
+                self.locks.append(lock)
+
+        for lock in locks.values():
+            release_lock(lock, True)
+
     def _iter_cases(self, case_ids):
         return iter(CaseAccessorSQL.get_cases(case_ids))
 
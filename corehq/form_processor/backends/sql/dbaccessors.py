@@ -4,7 +4,8 @@ import logging
 import operator
 import struct
 from abc import ABCMeta, abstractmethod, abstractproperty
-from collections import namedtuple
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
 from datetime import datetime
 from io import BytesIO
 from itertools import groupby
@@ -54,11 +55,13 @@ from corehq.form_processor.models import (
     XFormOperationSQL,
 )
 from corehq.form_processor.utils.sql import (
+    bulk_save_models,
     fetchall_as_namedtuple,
     fetchone_as_namedtuple,
 )
 from corehq.sql_db.config import plproxy_config
 from corehq.sql_db.util import (
+    PartitionedQueryPool,
     estimate_row_count,
     get_db_aliases_for_partitioned_query,
     split_list_by_db_partition,
@@ -78,10 +81,21 @@ doc_type_to_state = {
 state_to_doc_type = {v: k for k, v in doc_type_to_state.items()}
 
 
-def iter_all_rows(reindex_accessor):
+def iter_all_rows(reindex_accessor, concurrent=False):
     """Returns a generator that will iterate over all rows provided by the
     reindex accessor
+
+    :param concurrent: Read from all databases at the same time rather than
+    one after another. Rows are then not grouped by database.
     """
+    if concurrent:
+        for db_alias, docs in iter_pages_concurrently(
+                reindex_accessor.sql_db_aliases,
+                lambda db_alias, last_id: list(reindex_accessor.get_docs(db_alias, last_doc_pk=last_id)),
+                lambda doc: getattr(doc, reindex_accessor.primary_key_field_name)):
+            yield from docs
+        return
+
     for db_alias in reindex_accessor.sql_db_aliases:
         docs = reindex_accessor.get_docs(db_alias)
         while docs:
@@ -92,11 +106,20 @@ def iter_all_rows(reindex_accessor):
             docs = reindex_accessor.get_docs(db_alias, last_doc_pk=last_id)
 
 
-def iter_all_ids(reindex_accessor):
-    return itertools.chain.from_iterable(iter_all_ids_chunked(reindex_accessor))
+def iter_all_ids(reindex_accessor, concurrent=False):
+    return itertools.chain.from_iterable(iter_all_ids_chunked(reindex_accessor, concurrent))
+
 
+def iter_all_ids_chunked(reindex_accessor, concurrent=False):
+    if concurrent:
+        for db_alias, docs in iter_pages_concurrently(
+                reindex_accessor.sql_db_aliases,
+                lambda db_alias, last_id: list(reindex_accessor.get_doc_ids(db_alias, last_doc_pk=last_id)),
+                lambda doc: doc.primary_key):
+            if docs:
+                yield [d.doc_id for d in docs]
+        return
 
-def iter_all_ids_chunked(reindex_accessor):
     for db_alias in reindex_accessor.sql_db_aliases:
         docs = list(reindex_accessor.get_doc_ids(db_alias))
         while docs:
@@ -106,6 +129,42 @@ def iter_all_ids_chunked(reindex_accessor):
             docs = list(reindex_accessor.get_doc_ids(db_alias, last_doc_pk=last_id))
 
 
+def iter_pages_concurrently(checkpoints, get_page, get_primary_key):
+    """Read pages of rows from several databases at the same time
+
+    Each database is paginated independently and its next page is read
+    while the previous one is being consumed, so at most two pages per
+    database are held at once.
+
+    :param checkpoints: list of db aliases to read from the start or dict
+    of db alias -> primary key of the last row already read from that
+    database (``None`` to read it from the start).
+    :param get_page: ``get_page(db_alias, last_doc_pk)`` returning a list
+    of rows.
+    :param get_primary_key: function returning the primary key of a row.
+    :returns: generator of ``(db_alias, page)`` tuples in the order the
+    pages are read. An empty page marks the end of a database.
+    """
+    if not isinstance(checkpoints, dict):
+        checkpoints = dict.fromkeys(checkpoints)
+    if not checkpoints:
+        return
+    with PartitionedQueryPool(list(checkpoints)) as pool:
+        futures = {
+            pool.submit(get_page, db_alias, last_id): db_alias
+            for db_alias, last_id in checkpoints.items()
+        }
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                db_alias = futures.pop(future)
+                page = future.result()
+                if page:
+                    next_future = pool.submit(get_page, db_alias, get_primary_key(page[-1]))
+                    futures[next_future] = db_alias
+                yield db_alias, page
+
+
 class ShardAccessor(object):
     hash_key = b'\x00' * 16
 
@@ -981,44 +1040,70 @@ class CaseAccessorSQL(AbstractCaseAccessor):
 
     @staticmethod
     def save_case(case):
-        transactions_to_save = case.get_live_tracked_models(CaseTransaction)
-
-        indices_to_save_or_update = case.get_live_tracked_models(CommCareCaseIndexSQL)
-        index_ids_to_delete = [index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL)]
-
-        attachments_to_save = case.get_tracked_models_to_create(CaseAttachmentSQL)
-        attachment_ids_to_delete = [att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL)]
-        for attachment in attachments_to_save:
-            if attachment.is_saved():
-                raise CaseSaveError(
-                    """Updating attachments is not supported.
-                    case id={}, attachment id={}""".format(
-                        case.case_id, attachment.attachment_id
+        CaseAccessorSQL.save_cases([case])
+
+    @staticmethod
+    def save_cases(cases):
+        """Save cases along with their tracked transactions, indices and attachments
+
+        Each type of model is written to each shard database with a single
+        (batched) statement rather than one statement per model.
+        """
+        cases_by_db = defaultdict(list)
+        for case in cases:
+            cases_by_db[case.db].append(case)
+        for db_name, db_cases in cases_by_db.items():
+            CaseAccessorSQL._save_cases_in_db(db_name, db_cases)
+
+    @staticmethod
+    def _save_cases_in_db(db_name, cases):
+        transactions_to_save = []
+        indices_to_save_or_update = []
+        index_ids_to_delete = []
+        attachments_to_save = []
+        attachment_ids_to_delete = []
+        for case in cases:
+            transactions_to_save.extend(case.get_live_tracked_models(CaseTransaction))
+
+            for index in case.get_live_tracked_models(CommCareCaseIndexSQL):
+                index.domain = case.domain  # ensure domain is set on indices
+                indices_to_save_or_update.append(index)
+            index_ids_to_delete.extend(
+                index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL))
+
+            case_attachments = case.get_tracked_models_to_create(CaseAttachmentSQL)
+            for attachment in case_attachments:
+                if attachment.is_saved():
+                    raise CaseSaveError(
+                        """Updating attachments is not supported.
+                        case id={}, attachment id={}""".format(
+                            case.case_id, attachment.attachment_id
+                        )
                     )
-                )
+            attachments_to_save.extend(case_attachments)
+            attachment_ids_to_delete.extend(
+                att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL))
 
         try:
-            with transaction.atomic(using=case.db, savepoint=False):
-                case.save()
-                for case_transaction in transactions_to_save:
-                    case_transaction.save()
-
-                for index in indices_to_save_or_update:
-                    index.domain = case.domain  # ensure domain is set on indices
-                    update_fields = None
-                    if index.is_saved():
-                        # prevent changing identifier
-                        update_fields = ['referenced_id', 'referenced_type', 'relationship_id']
-                    index.save(update_fields=update_fields)
+            with transaction.atomic(using=db_name, savepoint=False):
+                bulk_save_models(CommCareCaseSQL, cases, db_name)
+                bulk_save_models(CaseTransaction, transactions_to_save, db_name)
+                # prevent changing identifier of saved indices
+                bulk_save_models(
+                    CommCareCaseIndexSQL, indices_to_save_or_update, db_name,
+                    update_fields=['referenced_id', 'referenced_type', 'relationship_id'],
+                )
 
-                CommCareCaseIndexSQL.objects.using(case.db).filter(id__in=index_ids_to_delete).delete()
+                if index_ids_to_delete:
+                    CommCareCaseIndexSQL.objects.using(db_name).filter(id__in=index_ids_to_delete).delete()
 
-                for attachment in attachments_to_save:
-                    attachment.save()
+                bulk_save_models(CaseAttachmentSQL, attachments_to_save, db_name)
 
-                CaseAttachmentSQL.objects.using(case.db).filter(id__in=attachment_ids_to_delete).delete()
+                if attachment_ids_to_delete:
+                    CaseAttachmentSQL.objects.using(db_name).filter(id__in=attachment_ids_to_delete).delete()
 
-                case.clear_tracked_models()
+                for case in cases:
+                    case.clear_tracked_models()
         except InternalError as e:
             raise CaseSaveError(e)
 
@@ -1056,6 +1141,18 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             'SELECT * FROM get_related_indices(%s, %s, %s)',
             [domain, case_ids, list(exclude_indices)]))
 
+    @staticmethod
+    def get_related_indices_in_db(db_alias, domain, case_ids, exclude_indices):
+        """Same as ``get_related_indices`` but for a single partition database"""
+        assert isinstance(case_ids, list), case_ids
+        if not case_ids:
+            return []
+        return list(CommCareCaseIndexSQL.objects.raw(
+            'SELECT * FROM get_related_indices(%s, %s, %s)',
+            [domain, case_ids, list(exclude_indices)],
+            using=db_alias,
+        ))
+
     @staticmethod
     def get_closed_and_deleted_ids(domain, case_ids):
         assert isinstance(case_ids, list), case_ids
@@ -1068,6 +1165,19 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             )
             return list(fetchall_as_namedtuple(cursor))
 
+    @staticmethod
+    def get_closed_and_deleted_ids_in_db(db_alias, domain, case_ids):
+        """Same as ``get_closed_and_deleted_ids`` but for a single partition database"""
+        assert isinstance(case_ids, list), case_ids
+        if not case_ids:
+            return []
+        with CommCareCaseSQL.get_cursor_for_partition_db(db_alias, readonly=True) as cursor:
+            cursor.execute(
+                'SELECT case_id, closed, deleted FROM get_closed_and_deleted_ids(%s, %s)',
+                [domain, case_ids]
+            )
+            return list(fetchall_as_namedtuple(cursor))
+
     @staticmethod
     def get_modified_case_ids(accessor, case_ids, sync_log):
         assert isinstance(case_ids, list), case_ids
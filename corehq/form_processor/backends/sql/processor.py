@@ -8,6 +8,7 @@ from django.db import transaction
 from lxml import etree
 
 from casexml.apps.case.xform import get_case_updates
+from corehq.apps.change_feed.producer import producer
 from corehq.form_processor.backends.sql.update_strategy import SqlCaseUpdateStrategy
 from corehq.form_processor.backends.sql.dbaccessors import (
     FormAccessorSQL, CaseAccessorSQL, LedgerAccessorSQL
@@ -113,8 +114,7 @@ class FormProcessorSQL(object):
 
             FormAccessorSQL.save_new_form(processed_forms.submitted)
             if cases:
-                for case in cases:
-                    CaseAccessorSQL.save_case(case)
+                CaseAccessorSQL.save_cases(cases)
 
             if stock_result:
                 ledgers_to_save = stock_result.models_to_save
@@ -136,14 +136,16 @@ class FormProcessorSQL(object):
 
     @staticmethod
     def publish_changes_to_kafka(processed_forms, cases, stock_result):
-        publish_form_saved(processed_forms.submitted)
-        cases = cases or []
-        for case in cases:
-            publish_case_saved(case)
+        # wait for the form, case and ledger changes together rather than one by one
+        with producer.batch():
+            publish_form_saved(processed_forms.submitted)
+            cases = cases or []
+            for case in cases:
+                publish_case_saved(case)
 
-        if stock_result:
-            for ledger in stock_result.models_to_save:
-                publish_ledger_v2_saved(ledger)
+            if stock_result:
+                for ledger in stock_result.models_to_save:
+                    publish_ledger_v2_saved(ledger)
 
     @classmethod
     def apply_deprecation(cls, existing_xform, new_xform):
@@ -242,7 +244,10 @@ class FormProcessorSQL(object):
                     )
         else:
             xform = xforms[0]
-            for case_update in get_case_updates(xform):
+            case_updates = get_case_updates(xform)
+            # only the updated cases are locked, as they were when loaded one by one
+            case_db.prefetch([case_update.id for case_update in case_updates])
+            for case_update in case_updates:
                 case_update_meta = case_db.get_case_from_case_update(case_update, xform)
                 if case_update_meta.case:
                     touched_cases[case_update_meta.case.case_id] = case_update_meta
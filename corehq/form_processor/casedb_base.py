@@ -121,6 +121,13 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
         for case in self._iter_cases(case_ids):
             self.set(_get_id_for_case(case), case)
 
+    def prefetch(self, case_ids):
+        """
+        Hint that a set of cases is about to be updated so that backends can load
+        (and lock) them in bulk. Cases not loaded here are loaded by ``get`` as usual.
+        """
+        pass
+
     @abstractmethod
     def _iter_cases(self, case_ids):
         pass
@@ -181,8 +181,14 @@ class Attachment(IsImageMixin):
         :param xform: The XForm instance associated with this attachment.
         :returns: `BlobMeta` object.
         """
-        return blob_db.put(
-            self.open(),
+        return blob_db.put(self.open(), **self.get_blob_meta_args(xform))
+
+    def get_blob_meta_args(self, xform):
+        """Get `BlobMeta` arguments for saving this attachment
+
+        This is not part of the `BlobMeta` interface.
+        """
+        return dict(
             key=self.key,
             domain=xform.domain,
             parent_id=xform.form_id,
@@ -252,10 +258,10 @@ class AttachmentMixin(SaveStateMixin):
             return noop_context()
 
         def write_attachments(blob_db):
-            self._attachments_list = [
-                attachment.write(blob_db, self)
+            self._attachments_list = blob_db.put_many([
+                (attachment.open(), attachment.get_blob_meta_args(self))
                 for attachment in self.attachments_list
-            ]
+            ])
 
         @contextmanager
         def atomic_attachments():
@@ -385,6 +385,36 @@ class CaseAccessorTestsSQL(TestCase):
         with self.assertRaises(CaseSaveError):
             CaseAccessorSQL.save_case(case)
 
+    def test_save_cases(self):
+        case1 = _create_case()
+        case1.name = 'updated'
+        case2 = CommCareCaseSQL(
+            case_id=uuid.uuid4().hex,
+            domain=DOMAIN,
+            type='child',
+            owner_id='user1',
+            modified_on=datetime.utcnow(),
+            modified_by='user1',
+            server_modified_on=datetime.utcnow(),
+        )
+        for case in [case1, case2]:
+            case.track_create(CommCareCaseIndexSQL(
+                case=case,
+                identifier='parent',
+                referenced_type='mother',
+                referenced_id=uuid.uuid4().hex,
+                relationship_id=CommCareCaseIndexSQL.CHILD
+            ))
+        CaseAccessorSQL.save_cases([case1, case2])
+
+        self.assertIsNotNone(case2.id)
+        self.assertEqual(CaseAccessorSQL.get_case(case1.case_id).name, 'updated')
+        for case in [case1, case2]:
+            [index] = CaseAccessorSQL.get_indices(case.domain, case.case_id)
+            self.assertEqual(index.identifier, 'parent')
+            self.assertEqual(index.domain, DOMAIN)
+            self.assertFalse(case.get_live_tracked_models(CommCareCaseIndexSQL))
+
     def test_get_case_ids_by_owners(self):
         case1 = _create_case(user_id="user1")
         case2 = _create_case(user_id="user1")
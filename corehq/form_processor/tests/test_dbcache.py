@@ -114,7 +114,28 @@ class CaseDbCacheTest(TestCase):
 
 @use_sql_backend
 class CaseDbCacheTestSQL(CaseDbCacheTest):
-    pass
+
+    def testPrefetch(self):
+        case_ids = _make_some_cases(3)
+        missing_id = uuid.uuid4().hex
+        with self.interface.casedb_cache(domain='dbcache-test', lock=True) as cache:
+            cache.prefetch(case_ids + [missing_id])
+            for id in case_ids:
+                self.assertTrue(cache.in_cache(id))
+            self.assertFalse(cache.in_cache(missing_id))
+            self.assertIsNone(cache.get(missing_id))
+            self.assertEqual(len(cache.locks), 3)
+
+        self.assertEqual(cache.locks, [])
+
+    def testPrefetchOtherDomain(self):
+        case_ids = _make_some_cases(2)
+        cache = self.interface.casedb_cache(domain='bad-domain')
+        cache.prefetch(case_ids)
+        for id in case_ids:
+            self.assertFalse(cache.in_cache(id))
+        with self.assertRaises(IllegalCaseId):
+            cache.get(case_ids[0])
 
 
 class CaseDbCacheNoDbTest(SimpleTestCase):
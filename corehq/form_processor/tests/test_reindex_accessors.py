@@ -5,12 +5,14 @@ from unittest import SkipTest
 
 from django.conf import settings
 from django.db import connections, DEFAULT_DB_ALIAS
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
+
+import mock
 
 from corehq.apps.change_feed.data_sources import get_document_store_for_doc_type
 from corehq.form_processor.backends.sql.dbaccessors import (
     CaseAccessorSQL, FormReindexAccessor, CaseReindexAccessor,
-    LedgerAccessorSQL, LedgerReindexAccessor
+    LedgerAccessorSQL, LedgerReindexAccessor, iter_pages_concurrently
 )
 from corehq.form_processor.models import LedgerValue, CommCareCaseSQL
 from corehq.form_processor.tests.utils import FormProcessorTestUtils, create_form_for_test, use_sql_backend
@@ -183,6 +185,40 @@ class UnshardedLedgerReindexAccessorTests(BaseReindexAccessorTest, TestCase):
         return [doc.ledger_reference.as_id() for doc in docs]
 
 
+class IterPagesConcurrentlyTest(SimpleTestCase):
+    rows = {
+        'db1': [1, 2, 3, 4, 5],
+        'db2': [10, 20, 30],
+    }
+
+    def _get_page(self, db_alias, last_id):
+        rows = [row for row in self.rows[db_alias] if last_id is None or row > last_id]
+        return rows[:2]
+
+    def _read(self, checkpoints):
+        pages = {}
+        for db_alias, page in iter_pages_concurrently(checkpoints, self._get_page, lambda row: row):
+            pages.setdefault(db_alias, []).append(page)
+        return pages
+
+    @mock.patch('corehq.sql_db.util._close_connection')
+    def test_all_databases(self, close_connection):
+        self.assertEqual(self._read(['db1', 'db2']), {
+            'db1': [[1, 2], [3, 4], [5], []],
+            'db2': [[10, 20], [30], []],
+        })
+
+    @mock.patch('corehq.sql_db.util._close_connection')
+    def test_resume(self, close_connection):
+        self.assertEqual(self._read({'db1': 4, 'db2': None}), {
+            'db1': [[5], []],
+            'db2': [[10, 20], [30], []],
+        })
+
+    def test_no_databases(self):
+        self.assertEqual(self._read([]), {})
+
+
 def _create_ledger(domain, entry_id, balance, case_id=None, section_id='stock'):
     user_id = 'user1'
     utcnow = datetime.utcnow()
@@ -5,9 +5,12 @@ in the table DSL
 import json
 from collections import namedtuple
 
+from django.db import connections
 from jsonfield.fields import JSONEncoder
 from psycopg2.extensions import adapt
 
+from dimagi.utils.chunked import chunked
+
 from corehq.form_processor.models import (
     CommCareCaseSQL_DB_TABLE, CaseAttachmentSQL_DB_TABLE,
     CommCareCaseIndexSQL_DB_TABLE, CaseTransaction_DB_TABLE,
@@ -35,6 +38,60 @@ def _namedtuple_from_cursor(cursor):
     return namedtuple('Result', [col[0] for col in desc])
 
 
+def bulk_save_models(model_class, objects, using, update_fields=None, batch_size=500):
+    """Save model instances with multi-row ``INSERT ... ON CONFLICT`` statements
+
+    Like calling ``obj.save()`` for each object: objects without a primary key
+    are inserted (and get their primary key set) while objects with one are
+    updated. If ``update_fields`` is given only those fields are updated
+    for existing objects.
+    """
+    if not objects:
+        return
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    meta = model_class._meta
+    pk_field = meta.pk
+    fields = [field for field in meta.concrete_fields if field is not pk_field]
+    if update_fields is None:
+        update_fields = fields
+    else:
+        update_fields = [meta.get_field(name) for name in update_fields]
+
+    sql_template = (
+        'INSERT INTO {table} ({columns}) VALUES {{rows}} '
+        'ON CONFLICT ({pk}) DO UPDATE SET {updates} RETURNING {pk}'
+    ).format(
+        table=quote_name(meta.db_table),
+        columns=', '.join(quote_name(field.column) for field in [pk_field] + fields),
+        pk=quote_name(pk_field.column),
+        updates=', '.join(
+            '{column} = EXCLUDED.{column}'.format(column=quote_name(field.column))
+            for field in update_fields
+        ),
+    )
+    with connection.cursor() as cursor:
+        for batch in chunked(objects, batch_size, list):
+            rows = []
+            params = []
+            for obj in batch:
+                adding = obj.pk is None
+                # let the database assign ids to new rows
+                placeholders = ['DEFAULT' if adding else '%s']
+                if not adding:
+                    params.append(pk_field.get_db_prep_save(obj.pk, connection))
+                for field in fields:
+                    placeholders.append('%s')
+                    params.append(field.get_db_prep_save(field.pre_save(obj, adding), connection))
+                rows.append('({})'.format(', '.join(placeholders)))
+            cursor.execute(sql_template.format(rows=', '.join(rows)), params)
+            # rows are returned in the order of the VALUES list
+            for obj, (pk,) in zip(batch, cursor.fetchall()):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = using
+
+
 def form_adapter(form):
     fields = [
         form.id,
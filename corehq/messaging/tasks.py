@@ -1,3 +1,4 @@
+from corehq import toggles
 from corehq.apps.data_interfaces.models import AutomaticUpdateRule
 from corehq.apps.sms import tasks as sms_tasks
 from corehq.form_processor.exceptions import CaseNotFound
@@ -10,12 +11,18 @@ from corehq.messaging.util import MessagingRuleProgressHelper, use_phone_entries
 from corehq.sql_db.util import paginate_query_across_partitioned_databases
 from corehq.util.celery_utils import no_result_task
 from corehq.util.datadog.utils import case_load_counter
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import CriticalSection
+from dimagi.utils.logging import notify_exception
 from django.conf import settings
 from django.db.models import Q
 from django.db import transaction
 
 
+# number of cases each task processes when a rule is run in chunks
+CASES_PER_MESSAGING_RULE_TASK = 100
+
+
 def get_sync_key(case_id):
     return 'sync-case-for-messaging-%s' % case_id
 
@@ -40,6 +47,29 @@ def sync_case_for_messaging_rule(self, domain, case_id, rule_id):
         self.retry(exc=e)
 
 
+@no_result_task(serializer='pickle', queue=settings.CELERY_REMINDER_CASE_UPDATE_QUEUE, acks_late=True,
+                default_retry_delay=5 * 60, max_retries=12, bind=True)
+def sync_cases_for_messaging_rule(self, domain, case_ids, rule_id):
+    try:
+        # keys are sorted so that tasks locking overlapping cases can't deadlock
+        keys = sorted(get_sync_key(case_id) for case_id in case_ids)
+        with CriticalSection(keys, timeout=5 * 60):
+            failed_case_ids = _sync_cases_for_messaging_rule(domain, case_ids, rule_id)
+    except Exception as e:
+        self.retry(exc=e)
+
+    if not failed_case_ids:
+        return
+
+    if self.request.retries < self.max_retries:
+        # only the cases that failed are retried
+        self.retry(args=(domain, failed_case_ids, rule_id))
+
+    # give up on these cases, but count them so that the run's progress
+    # still reaches its total
+    MessagingRuleProgressHelper(rule_id).increase_current_case_count(len(failed_case_ids))
+
+
 def _sync_case_for_messaging(domain, case_id):
     try:
         case = CaseAccessors(domain).get_case(case_id)
@@ -83,6 +113,36 @@ def _sync_case_for_messaging_rule(domain, case_id, rule_id):
         MessagingRuleProgressHelper(rule_id).increment_current_case_count()
 
 
+def _sync_cases_for_messaging_rule(domain, case_ids, rule_id):
+    """
+    Runs the rule against each case and returns the ids of the cases
+    that raised an error.
+    """
+    rule = _get_cached_rule(domain, rule_id)
+    if not rule:
+        return []
+
+    cases = CaseAccessors(domain).get_cases(case_ids)
+    case_load_counter("messaging_rule_sync", domain)(len(cases))
+    now = utcnow()
+    failed_case_ids = []
+    for case in cases:
+        try:
+            rule.run_rule(case, now)
+        except Exception:
+            notify_exception(
+                None,
+                message="Error running messaging rule on case",
+                details={'domain': domain, 'case_id': case.case_id, 'rule_id': rule_id},
+            )
+            failed_case_ids.append(case.case_id)
+
+    # cases that no longer exist are counted too so that the run's progress
+    # still reaches its total
+    MessagingRuleProgressHelper(rule_id).increase_current_case_count(len(case_ids) - len(failed_case_ids))
+    return failed_case_ids
+
+
 def initiate_messaging_rule_run(rule):
     if not rule.active:
         return
@@ -124,9 +184,19 @@ def run_messaging_rule(domain, rule_id):
     progress_helper = MessagingRuleProgressHelper(rule_id)
     progress_helper.set_initial_progress()
 
-    for case_id in get_case_ids_for_messaging_rule(domain, rule.case_type):
-        sync_case_for_messaging_rule.delay(domain, case_id, rule_id)
-        incr += 1
+    chunk_cases = toggles.MESSAGING_RULE_CASE_CHUNKS.enabled(domain)
+    case_ids = get_case_ids_for_messaging_rule(domain, rule.case_type)
+    if chunk_cases:
+        case_ids = chunked(case_ids, CASES_PER_MESSAGING_RULE_TASK)
+
+    for item in case_ids:
+        if chunk_cases:
+            chunk = list(item)
+            sync_cases_for_messaging_rule.delay(domain, chunk, rule_id)
+            incr += len(chunk)
+        else:
+            sync_case_for_messaging_rule.delay(domain, item, rule_id)
+            incr += 1
         if incr >= 1000:
             progress_helper.increase_total_case_count(incr)
             incr = 0
@@ -7,6 +7,19 @@ CHECK_REPEATERS_KEY = 'check-repeaters-key'
 
 POST_TIMEOUT = 75  # seconds
 
+# Chunked dispatch of repeat records (see ``process_repeat_record_chunk``)
+DISPATCH_CHUNK_SIZE = 100
+MAX_CONCURRENT_REQUESTS = 4  # per repeater
+CHUNK_CHAIN_TIMEOUT = 60 * 60  # seconds without progress before a chain of chunks is abandoned
+THROTTLED_STATUS_CODES = (429, 503)
+THROTTLED_RETRY_WAIT = timedelta(minutes=5)
+# Requests to a repeater are backed off when responses are slower than
+# this, or when at least MIN_REQUESTS_FOR_ERROR_RATE have been sent and
+# more than MAX_ERROR_RATE of them failed
+SLOW_RESPONSE_SECONDS = 10
+MIN_REQUESTS_FOR_ERROR_RATE = 10
+MAX_ERROR_RATE = 0.5
+
 RECORD_PENDING_STATE = 'PENDING'
 RECORD_SUCCESS_STATE = 'SUCCESS'
 RECORD_FAILURE_STATE = 'FAIL'
@@ -185,6 +185,7 @@ class Repeater(QuickCachedDocumentMixin, Document):
     payload_generator_classes = ()
 
     _has_config = False
+    _session = None
 
     def __str__(self):
         url = "@".join((self.username, self.url)) if self.username else self.url
@@ -370,11 +371,21 @@ class Repeater(QuickCachedDocumentMixin, Document):
     def notify_addresses(self):
         return [addr for addr in re.split('[, ]+', self.notify_addresses_str) if addr]
 
+    def use_session(self, session):
+        """
+        Send requests using ``session`` (a ``requests.Session``) so that
+        connections to the remote API are reused. Subclasses that
+        manage their own connections ignore it.
+        """
+        self._session = session
+
     def send_request(self, repeat_record, payload):
         headers = self.get_headers(repeat_record)
         auth = self.get_auth()
         url = self.get_url(repeat_record)
-        return simple_post(payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth, verify=self.verify)
+        kwargs = {'session': self._session} if self._session is not None else {}
+        return simple_post(payload, url, headers=headers, timeout=POST_TIMEOUT, auth=auth, verify=self.verify,
+                           **kwargs)
 
     def fire_for_record(self, repeat_record):
         payload = self.get_payload(repeat_record)
@@ -666,12 +677,18 @@ class RepeatRecord(Document):
         return self
 
     @property
-    @memoized
     def repeater(self):
-        try:
-            return Repeater.get(self.repeater_id)
-        except ResourceNotFound:
-            return None
+        if not hasattr(self, '_repeater'):
+            try:
+                self._repeater = Repeater.get(self.repeater_id)
+            except ResourceNotFound:
+                self._repeater = None
+        return self._repeater
+
+    @repeater.setter
+    def repeater(self, repeater):
+        # allows repeat records of the same repeater to share an instance
+        self._repeater = repeater
 
     @property
     def url(self):
@@ -723,10 +740,11 @@ class RepeatRecord(Document):
         for i, attempt in enumerate(self.attempts):
             yield i + 1, attempt
 
-    def postpone_by(self, duration):
+    def postpone_by(self, duration, save=True):
         self.last_checked = datetime.utcnow()
         self.next_check = self.last_checked + duration
-        self.save()
+        if save:
+            self.save()
 
     def make_set_next_try_attempt(self, failure_reason):
         # we use an exponential back-off to avoid submitting to bad urls
@@ -775,7 +793,7 @@ class RepeatRecord(Document):
             succeeded=False,
         )
 
-    def fire(self, force_send=False):
+    def fire(self, force_send=False, save=True):
         if self.try_now() or force_send:
             self.overall_tries += 1
             try:
@@ -790,7 +808,8 @@ class RepeatRecord(Document):
                 # that'll only happen if fire_for_record raise a non-Exception exception (e.g. SIGINT)
                 # or handle_payload_exception raises an exception. I'm okay with that. -DMR
                 self.add_attempt(attempt)
-                self.save()
+                if save:
+                    self.save()
 
     @staticmethod
     def _format_response(response):
@@ -860,24 +879,25 @@ class RepeatRecord(Document):
         self.next_check = None
         self.cancelled = True
 
-    def attempt_forward_now(self):
-        from corehq.motech.repeaters.tasks import process_repeat_record
-
-        def is_ready():
-            return self.next_check < datetime.utcnow()
-
-        def already_processed():
-            return self.succeeded or self.cancelled or self.next_check is None
-
-        if already_processed() or not is_ready():
-            return
+    def is_ready_to_forward(self):
+        already_processed = self.succeeded or self.cancelled or self.next_check is None
+        return not already_processed and self.next_check < datetime.utcnow()
 
+    def set_next_check_for_processing(self):
         # Set the next check to happen an arbitrarily long time from now so
         # if something goes horribly wrong with the delayed task it will not
         # be lost forever. A check at this time is expected to occur rarely,
         # if ever, because `process_repeat_record` will usually succeed or
         # reset the next check to sometime sooner.
         self.next_check = datetime.utcnow() + timedelta(hours=48)
+
+    def attempt_forward_now(self):
+        from corehq.motech.repeaters.tasks import process_repeat_record
+
+        if not self.is_ready_to_forward():
+            return
+
+        self.set_next_check_for_processing()
         try:
             self.save()
         except ResourceConflict:
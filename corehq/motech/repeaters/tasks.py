@@ -1,26 +1,46 @@
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.db import connections
 
+import requests
 from celery.schedules import crontab
 from celery.task import periodic_task, task
 from celery.utils.log import get_task_logger
+from couchdbkit.exceptions import ResourceNotFound
+from requests.adapters import HTTPAdapter
 
 from corehq.apps.accounting.utils import domain_has_privilege
 from corehq.privileges import DATA_FORWARDING
-from dimagi.utils.couch import get_redis_lock
+from corehq.toggles import DISPATCH_REPEAT_RECORDS_IN_CHUNKS
+from corehq.util.couch import IterDB
+from dimagi.utils.couch import get_redis_client, get_redis_lock
+from dimagi.utils.couch.database import iter_docs
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 from corehq.motech.repeaters.const import (
     CHECK_REPEATERS_INTERVAL,
     CHECK_REPEATERS_KEY,
+    CHUNK_CHAIN_TIMEOUT,
+    DISPATCH_CHUNK_SIZE,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_ERROR_RATE,
+    MIN_REQUESTS_FOR_ERROR_RATE,
     RECORD_FAILURE_STATE,
     RECORD_PENDING_STATE,
+    SLOW_RESPONSE_SECONDS,
+    THROTTLED_RETRY_WAIT,
+    THROTTLED_STATUS_CODES,
 )
 from corehq.motech.repeaters.dbaccessors import (
     get_overdue_repeat_record_count,
     iterate_repeat_records,
 )
+from corehq.motech.repeaters.models import Repeater, RepeatRecord
 from corehq.util.datadog.gauges import (
     datadog_bucket_timer,
     datadog_counter,
@@ -66,12 +86,17 @@ def check_repeaters():
             tags=[],
             timing_buckets=_check_repeaters_buckets,
         ):
+            dispatcher = RepeatRecordDispatcher()
             for record in iterate_repeat_records(start):
                 if datetime.utcnow() > six_hours_later:
                     _soft_assert(False, "I've been iterating repeat records for six hours. I quit!")
                     break
                 datadog_counter("commcare.repeaters.check.attempt_forward")
-                record.attempt_forward_now()
+                if DISPATCH_REPEAT_RECORDS_IN_CHUNKS.enabled(record.domain):
+                    dispatcher.add(record)
+                else:
+                    record.attempt_forward_now()
+            dispatcher.flush()
     finally:
         check_repeater_lock.release()
 
@@ -118,6 +143,283 @@ def process_repeat_record(repeat_record):
         logging.exception('Failed to process repeat record: {}'.format(repeat_record._id))
 
 
+class RepeatRecordDispatcher(object):
+    """
+    Groups due repeat records by repeater and queues them in chunks of
+    ``DISPATCH_CHUNK_SIZE`` on the repeater's ``RepeaterChunkQueue``,
+    instead of queuing a task per repeat record.
+
+    Like ``RepeatRecord.attempt_forward_now``, records are claimed by
+    moving their next check into the future before they are queued, but
+    the claims are saved in bulk. Repeaters that are still working through
+    chunks queued by a previous run are skipped, so their records are
+    neither claimed nor queued twice.
+    """
+
+    def __init__(self, chunk_size=DISPATCH_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._records_by_repeater_id = defaultdict(list)
+        self._queues = {}
+
+    def add(self, record):
+        if not record.is_ready_to_forward():
+            return
+        queue = self._get_queue(record.repeater_id)
+        if queue is None:
+            return
+        records = self._records_by_repeater_id[record.repeater_id]
+        records.append(record)
+        if len(records) >= self.chunk_size:
+            self._dispatch(queue)
+
+    def flush(self):
+        for repeater_id in list(self._records_by_repeater_id):
+            self._dispatch(self._queues[repeater_id])
+
+    def _get_queue(self, repeater_id):
+        """
+        :returns: the repeater's queue, or None if it is busy with chunks
+        dispatched by a previous run
+        """
+        if repeater_id not in self._queues:
+            queue = RepeaterChunkQueue(repeater_id)
+            if queue.is_active():
+                queue = None
+            else:
+                # Drop chunks left over from a chain that died. Their
+                # records are dispatched again once their claims expire.
+                queue.clear()
+            self._queues[repeater_id] = queue
+        return self._queues[repeater_id]
+
+    def _dispatch(self, queue):
+        records = self._records_by_repeater_id.pop(queue.repeater_id)
+        with IterDB(RepeatRecord.get_db(), chunksize=self.chunk_size) as iter_db:
+            for record in records:
+                record.set_next_check_for_processing()
+                iter_db.save(record.to_json())
+        # Records that failed to save were changed by another process
+        # since they were read, which is taken to mean it has claimed them
+        record_ids = [record._id for record in records if record._id in iter_db.saved_ids]
+        if record_ids:
+            queue.push(record_ids)
+
+
+class RepeaterChunkQueue(object):
+    """
+    Chunks of claimed repeat record IDs waiting to be sent to a repeater
+
+    The chunks are sent by a chain of ``process_repeat_record_chunk``
+    tasks, each of which queues the next chunk when it is done. So each
+    repeater has at most one chunk on the celery queue, and its endpoint
+    receives at most MAX_CONCURRENT_REQUESTS at once.
+
+    The "active" key is held while a chain is running, and only its
+    holder queues chunks. It expires if the chain makes no progress for
+    CHUNK_CHAIN_TIMEOUT, e.g. because a worker died.
+    """
+
+    def __init__(self, repeater_id):
+        self.repeater_id = repeater_id
+        self._client = get_redis_client().client.get_client()
+        self._chunks_key = 'repeat-record-chunks-{}'.format(repeater_id)
+        self._active_key = 'repeat-record-chunks-active-{}'.format(repeater_id)
+
+    def is_active(self):
+        return bool(self._client.exists(self._active_key))
+
+    def clear(self):
+        self._client.delete(self._chunks_key, self._active_key)
+
+    def push(self, record_ids):
+        self._client.rpush(self._chunks_key, json.dumps(record_ids))
+        self._client.expire(self._chunks_key, CHUNK_CHAIN_TIMEOUT)
+        if self._activate():
+            self.queue_next()
+
+    def keep_active(self):
+        self._client.expire(self._active_key, CHUNK_CHAIN_TIMEOUT)
+        self._client.expire(self._chunks_key, CHUNK_CHAIN_TIMEOUT)
+
+    def queue_next(self):
+        """
+        Queue the next chunk, or end the chain if there are none left.
+        Only called by the holder of the active key.
+        """
+        while True:
+            chunk = self._client.lpop(self._chunks_key)
+            if chunk is not None:
+                process_repeat_record_chunk.delay(self.repeater_id, json.loads(chunk))
+                return
+            self._client.delete(self._active_key)
+            # A chunk pushed while we held the key would be stranded, so
+            # check again now that pushers can take over the chain
+            if not self._client.llen(self._chunks_key) or not self._activate():
+                return
+
+    def _activate(self):
+        """:returns: True if this process now holds the active key"""
+        return bool(self._client.set(self._active_key, 1, nx=True, ex=CHUNK_CHAIN_TIMEOUT))
+
+
+@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeat_record_chunk(repeater_id, record_ids):
+    queue = RepeaterChunkQueue(repeater_id)
+    queue.keep_active()
+    try:
+        _process_repeat_record_chunk(repeater_id, record_ids, queue)
+    except Exception:
+        logging.exception('Failed to process repeat record chunk for repeater {}'.format(repeater_id))
+    finally:
+        queue.queue_next()
+
+
+def _process_repeat_record_chunk(repeater_id, record_ids, queue):
+    records = [RepeatRecord.wrap(doc) for doc in iter_docs(RepeatRecord.get_db(), record_ids)]
+    if not records:
+        return
+    try:
+        repeater = Repeater.get(repeater_id)
+    except ResourceNotFound:
+        repeater = None
+    for record in records:
+        record.repeater = repeater
+
+    # See `process_repeat_record`. These checks apply to all the records
+    # of a repeater, which share its domain.
+    if repeater is None or not domain_has_privilege(repeater.domain, DATA_FORWARDING):
+        for record in records:
+            record.cancel()
+        _save_repeat_records(records)
+        return
+    if repeater.paused:
+        for record in records:
+            record.postpone_by(timedelta(days=1), save=False)
+        _save_repeat_records(records)
+        return
+    if repeater.doc_type.endswith(DELETED_SUFFIX):
+        for record in records:
+            if not record.doc_type.endswith(DELETED_SUFFIX):
+                record.doc_type += DELETED_SUFFIX
+        _save_repeat_records(records)
+        return
+
+    to_save = []
+    to_send = []
+    for record in records:
+        if record.cancelled:
+            continue
+        if record.state == RECORD_FAILURE_STATE and record.overall_tries >= record.max_possible_tries:
+            record.cancel()
+            to_save.append(record)
+        elif record.state == RECORD_PENDING_STATE or record.state == RECORD_FAILURE_STATE:
+            to_send.append(record)
+
+    sent, retry_after = _send_repeat_records(repeater, to_send, queue)
+    not_sent = to_send[len(sent):]
+    if not_sent:
+        datadog_counter('commcare.repeaters.throttled', tags=['domain:{}'.format(repeater.domain)])
+        for record in not_sent:
+            # not counted as an attempt
+            record.postpone_by(retry_after, save=False)
+    _save_repeat_records(to_save + to_send)
+
+
+def _send_repeat_records(repeater, records, queue=None):
+    """
+    Send ``records`` using a pooled session, starting with one request
+    at a time. The number of concurrent requests doubles after each
+    round, up to MAX_CONCURRENT_REQUESTS, and halves after a round with a
+    failed response or one slower than SLOW_RESPONSE_SECONDS.
+
+    Stops if the endpoint asks us to slow down (see ``_get_retry_after``)
+    or if more than MAX_ERROR_RATE of the requests sent so far failed.
+
+    ``queue``, the repeater's ``RepeaterChunkQueue``, is kept active
+    before each round so that a slow chunk doesn't let its chain expire.
+
+    :returns: (records_sent, retry_after) where ``records_sent`` are the
+    leading records of ``records`` that were sent, and ``retry_after``
+    is the time to wait before sending the remaining records.
+    """
+    sent = []
+    failed = 0
+    concurrency = 1
+    with _ThrottleAwareSession(MAX_CONCURRENT_REQUESTS) as session, \
+            ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        repeater.use_session(session)
+        try:
+            while len(sent) < len(records):
+                if queue is not None:
+                    queue.keep_active()
+                batch = records[len(sent):len(sent) + concurrency]
+                durations = list(executor.map(_fire_repeat_record, batch))
+                sent.extend(batch)
+                if session.retry_after is not None:
+                    return sent, session.retry_after
+                batch_failed = len([record for record in batch if not record.succeeded])
+                failed += batch_failed
+                if len(sent) >= MIN_REQUESTS_FOR_ERROR_RATE and failed > MAX_ERROR_RATE * len(sent):
+                    return sent, THROTTLED_RETRY_WAIT
+                if batch_failed or max(durations) > SLOW_RESPONSE_SECONDS:
+                    concurrency = max(concurrency // 2, 1)
+                else:
+                    concurrency = min(concurrency * 2, MAX_CONCURRENT_REQUESTS)
+        finally:
+            repeater.use_session(None)
+    return sent, None
+
+
+def _fire_repeat_record(record):
+    """:returns: the number of seconds taken"""
+    start = time.time()
+    try:
+        record.fire(save=False)
+    except Exception:
+        logging.exception('Failed to process repeat record: {}'.format(record._id))
+    finally:
+        # This runs in a worker thread, which has its own connections
+        connections.close_all()
+    return time.time() - start
+
+
+def _save_repeat_records(records):
+    with IterDB(RepeatRecord.get_db()) as iter_db:
+        for record in records:
+            iter_db.save(record.to_json())
+    if iter_db.error_ids:
+        logging.error('Failed to save repeat records: {}'.format(', '.join(sorted(iter_db.error_ids))))
+
+
+class _ThrottleAwareSession(requests.Session):
+    """
+    A session that keeps up to ``max_connections`` connections to each
+    host alive, and sets ``retry_after`` if a response indicates that
+    the remote API is overloaded or rate limiting us.
+    """
+
+    def __init__(self, max_connections):
+        super(_ThrottleAwareSession, self).__init__()
+        adapter = HTTPAdapter(pool_maxsize=max_connections)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self.retry_after = None
+        self.hooks['response'].append(self._check_throttled)
+
+    def _check_throttled(self, response, *args, **kwargs):
+        if response.status_code in THROTTLED_STATUS_CODES:
+            self.retry_after = _get_retry_after(response)
+
+
+def _get_retry_after(response):
+    try:
+        seconds = int(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        # Retry-After is missing or an HTTP date
+        return THROTTLED_RETRY_WAIT
+    return max(timedelta(seconds=seconds), THROTTLED_RETRY_WAIT)
+
+
 repeaters_overdue = datadog_gauge_task(
     'commcare.repeaters.overdue',
     get_overdue_repeat_record_count,
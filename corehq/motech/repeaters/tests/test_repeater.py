@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from django.test import SimpleTestCase, TestCase, override_settings
 
 import attr
-from mock import Mock, patch
+from mock import ANY, Mock, call, patch
 
 from casexml.apps.case.mock import CaseBlock, CaseFactory
 from casexml.apps.case.xform import get_case_ids_from_form
@@ -54,9 +54,14 @@ from corehq.motech.repeaters.repeater_generators import (
     RegisterGenerator,
 )
 from corehq.motech.repeaters.tasks import (
+    RepeaterChunkQueue,
+    _get_retry_after,
+    _send_repeat_records,
     check_repeaters,
     process_repeat_record,
+    process_repeat_record_chunk,
 )
+from corehq.util.test_utils import flag_enabled
 
 MockResponse = namedtuple('MockResponse', 'status_code reason')
 CASE_ID = "ABC123CASEID"
@@ -952,6 +957,195 @@ class TestRepeaterDeleted(BaseRepeaterTest):
             self.assertEqual(self.repeat_record.doc_type, "RepeatRecord-Deleted")
 
 
+@flag_enabled('DISPATCH_REPEAT_RECORDS_IN_CHUNKS')
+class RepeatRecordChunkTest(BaseRepeaterTest):
+
+    def setUp(self):
+        super(RepeatRecordChunkTest, self).setUp()
+        self.domain = "test-domain"
+        create_domain(self.domain)
+        self.case_repeater = CaseRepeater(
+            domain=self.domain,
+            url='case-repeater-url',
+        )
+        self.case_repeater.save()
+        self.form_repeater = FormRepeater(
+            domain=self.domain,
+            url='form-repeater-url',
+        )
+        self.form_repeater.save()
+        with patch('corehq.motech.repeaters.models.simple_post',
+                   return_value=MockResponse(status_code=500, reason="Borked")):
+            self.post_xml(self.xform_xml, self.domain)
+
+    def tearDown(self):
+        for repeater in (self.case_repeater, self.form_repeater):
+            RepeaterChunkQueue(repeater._id).clear()
+        self.case_repeater.delete()
+        self.form_repeater.delete()
+        FormProcessorTestUtils.delete_all_cases_forms_ledgers(self.domain)
+        delete_all_repeat_records()
+        super(RepeatRecordChunkTest, self).tearDown()
+
+    def repeat_records(self):
+        return super(RepeatRecordChunkTest, self).repeat_records(self.domain)
+
+    def _make_records_due(self):
+        for record in self.repeat_records():
+            record.next_check = datetime.utcnow()
+            record.save()
+
+    @run_with_all_backends
+    def test_check_repeaters_dispatches_chunks(self):
+        self._make_records_due()
+        with patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process, \
+                patch('corehq.motech.repeaters.tasks.process_repeat_record_chunk') as mock_process_chunk:
+            check_repeaters()
+        self.assertEqual(mock_process.delay.call_count, 0)
+        self.assertEqual(
+            sorted(call[0] for call in mock_process_chunk.delay.call_args_list),
+            sorted((record.repeater_id, [record._id]) for record in self.repeat_records())
+        )
+        # records are claimed so they are not dispatched again
+        for record in self.repeat_records():
+            self.assertGreater(record.next_check, datetime.utcnow() + timedelta(hours=47))
+
+    @run_with_all_backends
+    def test_check_repeaters_skips_active_repeaters(self):
+        self._make_records_due()
+        with patch('corehq.motech.repeaters.tasks.process_repeat_record_chunk') as mock_process_chunk:
+            RepeaterChunkQueue(self.case_repeater._id).push(['other-record-id'])
+            mock_process_chunk.reset_mock()
+            check_repeaters()
+        # only the form repeater's records are dispatched while the case
+        # repeater works through its queued chunk
+        self.assertEqual(
+            [call[0][0] for call in mock_process_chunk.delay.call_args_list],
+            [self.form_repeater._id]
+        )
+        for record in self.repeat_records():
+            if record.repeater_id == self.case_repeater._id:
+                self.assertLess(record.next_check, datetime.utcnow())
+
+    def test_chunk_queue_queues_one_chunk_at_a_time(self):
+        queue = RepeaterChunkQueue(self.case_repeater._id)
+        with patch('corehq.motech.repeaters.tasks.process_repeat_record_chunk') as mock_process_chunk:
+            queue.push(['a'])
+            queue.push(['b'])
+            self.assertEqual(mock_process_chunk.delay.call_args_list, [call(self.case_repeater._id, ['a'])])
+
+            # the task for a chunk queues the next one when it is done
+            queue.queue_next()
+            self.assertEqual(mock_process_chunk.delay.call_args_list[-1], call(self.case_repeater._id, ['b']))
+            self.assertTrue(queue.is_active())
+
+            queue.queue_next()
+            self.assertEqual(mock_process_chunk.delay.call_count, 2)
+            self.assertFalse(queue.is_active())
+
+            # a chunk pushed after the chain ended starts a new one
+            queue.push(['c'])
+            self.assertEqual(mock_process_chunk.delay.call_args_list[-1], call(self.case_repeater._id, ['c']))
+
+    @run_with_all_backends
+    def test_process_repeat_record_chunk(self):
+        records = [record for record in self.repeat_records() if record.repeater_id == self.case_repeater._id]
+        with patch('corehq.motech.repeaters.models.simple_post',
+                   return_value=MockResponse(status_code=200, reason='OK')) as mock_post:
+            process_repeat_record_chunk(self.case_repeater._id, [record._id for record in records])
+        self.assertEqual(mock_post.call_count, len(records))
+        mock_post.assert_called_with(ANY, 'case-repeater-url', headers=ANY, timeout=POST_TIMEOUT,
+                                     auth=None, verify=True, session=ANY)
+        for record in records:
+            record = RepeatRecord.get(record._id)
+            self.assertEqual(record.state, RECORD_SUCCESS_STATE)
+
+    @run_with_all_backends
+    def test_process_repeat_record_chunk_paused(self):
+        self.case_repeater.pause()
+        records = [record for record in self.repeat_records() if record.repeater_id == self.case_repeater._id]
+        with patch('corehq.motech.repeaters.models.simple_post') as mock_post:
+            process_repeat_record_chunk(self.case_repeater._id, [record._id for record in records])
+        self.assertEqual(mock_post.call_count, 0)
+        for record in records:
+            record = RepeatRecord.get(record._id)
+            self.assertGreater(record.next_check, datetime.utcnow() + timedelta(hours=23))
+
+
+class SendRepeatRecordsTests(SimpleTestCase):
+
+    def _get_records(self, count, throttled_index=None, succeeded=True):
+        repeater = Mock()
+
+        def fire(i):
+            def fire_(save=True):
+                if i == throttled_index:
+                    repeater.use_session.call_args_list[0][0][0].retry_after = timedelta(minutes=10)
+            return fire_
+        records = []
+        for i in range(count):
+            record = Mock(succeeded=succeeded)
+            record.fire.side_effect = fire(i)
+            records.append(record)
+        return repeater, records
+
+    def test_send_all(self):
+        repeater, records = self._get_records(10)
+        sent, retry_after = _send_repeat_records(repeater, records)
+        self.assertEqual(sent, records)
+        self.assertIsNone(retry_after)
+        for record in records:
+            record.fire.assert_called_once_with(save=False)
+        self.assertEqual(repeater.use_session.call_args_list[-1][0], (None,))
+
+    def test_keeps_chain_active(self):
+        # records are sent in rounds of 1, 2, 4, 3
+        repeater, records = self._get_records(10)
+        queue = Mock()
+        _send_repeat_records(repeater, records, queue)
+        self.assertEqual(queue.keep_active.call_count, 4)
+
+    def test_throttled(self):
+        # records are sent in rounds of 1, 2, 4, 4
+        repeater, records = self._get_records(10, throttled_index=2)
+        sent, retry_after = _send_repeat_records(repeater, records)
+        self.assertEqual(sent, records[:3])
+        self.assertEqual(retry_after, timedelta(minutes=10))
+        for record in records[3:]:
+            record.fire.assert_not_called()
+
+    def test_backs_off_on_error_rate(self):
+        # failures keep requests one at a time, and sending stops once
+        # enough have been sent to judge the error rate
+        repeater, records = self._get_records(20, succeeded=False)
+        sent, retry_after = _send_repeat_records(repeater, records)
+        self.assertEqual(sent, records[:10])
+        self.assertEqual(retry_after, timedelta(minutes=5))
+        for record in records[10:]:
+            record.fire.assert_not_called()
+
+    @patch('corehq.motech.repeaters.tasks.SLOW_RESPONSE_SECONDS', -1)
+    def test_backs_off_on_slow_responses(self):
+        repeater, records = self._get_records(5)
+        with patch('corehq.motech.repeaters.tasks.ThreadPoolExecutor') as executor_class:
+            executor = executor_class.return_value.__enter__.return_value
+            executor.map.side_effect = lambda fn, batch: [fn(record) for record in batch]
+            sent, retry_after = _send_repeat_records(repeater, records)
+        self.assertEqual(sent, records)
+        # slow responses keep requests one at a time
+        self.assertEqual([len(batch) for _, batch in (c[0] for c in executor.map.call_args_list)],
+                         [1, 1, 1, 1, 1])
+
+    def test_get_retry_after(self):
+        self.assertEqual(_get_retry_after(Mock(headers={'Retry-After': '3600'})), timedelta(hours=1))
+        self.assertEqual(_get_retry_after(Mock(headers={'Retry-After': '1'})), timedelta(minutes=5))
+        self.assertEqual(_get_retry_after(Mock(headers={})), timedelta(minutes=5))
+        self.assertEqual(
+            _get_retry_after(Mock(headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})),
+            timedelta(minutes=5)
+        )
+
+
 @attr.s
 class Response(object):
     status_code = attr.ib()
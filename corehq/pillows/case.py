@@ -165,6 +165,7 @@ class SqlCaseReindexerFactory(ReindexerFactory):
 
     def build(self):
         limit_to_db = self.options.pop('limit_to_db', None)
+        concurrent = self.options.pop('concurrent', False)
         domain = self.options.pop('domain', None)
         start_date = self.options.pop('start_date', None)
         end_date = self.options.pop('end_date', None)
@@ -178,7 +179,7 @@ class SqlCaseReindexerFactory(ReindexerFactory):
             domain=domain, limit_db_aliases=limit_db_aliases,
             start_date=start_date, end_date=end_date
         )
-        doc_provider = SqlDocumentProvider(iteration_key, reindex_accessor)
+        doc_provider = SqlDocumentProvider(iteration_key, reindex_accessor, concurrent=concurrent)
         return ResumableBulkElasticPillowReindexer(
             doc_provider,
             elasticsearch=get_es_new(),
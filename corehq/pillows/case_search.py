@@ -1,4 +1,4 @@
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 
 from django.core.mail import mail_admins
@@ -6,6 +6,8 @@ from django.db import ProgrammingError
 
 from casexml.apps.case.models import CommCareCase
 from corehq.apps.case_search.const import (
+    ANCESTOR_PATH_SEPARATOR,
+    DENORMALIZED_ANCESTOR_DEPTH,
     INDEXED_ON,
     SPECIAL_CASE_PROPERTIES_MAP,
     SYSTEM_PROPERTIES,
@@ -21,6 +23,7 @@ from corehq.apps.change_feed.consumer.feed import (
 from corehq.apps.es import CaseSearchES
 from corehq.elastic import get_es_new
 from corehq.form_processor.backends.sql.dbaccessors import CaseReindexAccessor
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.utils.general import should_use_sql_backend
 from corehq.pillows.mappings.case_mapping import CASE_ES_TYPE
 from corehq.pillows.mappings.case_search_mapping import (
@@ -30,6 +33,7 @@ from corehq.pillows.mappings.case_search_mapping import (
 )
 from corehq.toggles import (
     CASE_LIST_EXPLORER,
+    CASE_SEARCH_DENORMALIZED_ANCESTORS,
     EXPLORE_CASE_DATA,
     ECD_MIGRATED_DOMAINS,
 )
@@ -44,7 +48,7 @@ from pillowtop.checkpoints.manager import (
 from pillowtop.es_utils import initialize_index_and_mapping
 from pillowtop.feed.interface import Change
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors.elastic import ElasticProcessor
+from pillowtop.processors.elastic import BulkElasticProcessor
 from pillowtop.reindexer.change_providers.case import (
     get_domain_case_change_provider,
 )
@@ -53,6 +57,7 @@ from pillowtop.reindexer.reindexer import (
     ReindexerFactory,
     ResumableBulkElasticPillowReindexer,
 )
+from pillowtop.utils import bulk_fetch_changes_docs, get_errors_with_ids
 
 
 @quickcache([], timeout=24 * 60 * 60, memoize_timeout=60)
@@ -67,7 +72,11 @@ def domain_needs_search_index(domain):
     return domain in domains_needing_search_index()
 
 
-def transform_case_for_elasticsearch(doc_dict):
+def transform_case_for_elasticsearch(doc_dict, ancestors=None):
+    """
+    :param ancestors: the cases ``doc_dict`` indexes, as returned by
+        ``get_ancestor_cases``. These are loaded for the case if not passed.
+    """
     doc = {
         desired_property: doc_dict.get(desired_property)
         for desired_property in CASE_SEARCH_MAPPING['properties'].keys()
@@ -76,6 +85,8 @@ def transform_case_for_elasticsearch(doc_dict):
     doc['_id'] = doc_dict.get('_id')
     doc[INDEXED_ON] = json_format_datetime(datetime.utcnow())
     doc['case_properties'] = _get_case_properties(doc_dict)
+    if CASE_SEARCH_DENORMALIZED_ANCESTORS.enabled(doc_dict.get('domain')):
+        doc['case_properties'].extend(_get_ancestor_case_properties(doc_dict, ancestors))
     return doc
 
 
@@ -96,26 +107,192 @@ def _get_case_properties(doc_dict):
     return base_case_properties + dynamic_mapping
 
 
-class CaseSearchPillowProcessor(ElasticProcessor):
+def get_ancestor_cases(domain, docs, depth=DENORMALIZED_ANCESTOR_DEPTH):
+    """Returns the json of the cases that ``docs`` index, directly or through
+    up to ``depth`` levels of indices, by case id
+
+    Each level is loaded in a single query for all of ``docs``.
+    """
+    accessor = CaseAccessors(domain)
+    ancestors = {}
+    level = docs
+    for _ in range(depth):
+        case_ids = {
+            index['referenced_id']
+            for doc in level
+            for index in doc.get('indices', [])
+            if index.get('referenced_id') and index['referenced_id'] not in ancestors
+        }
+        if not case_ids:
+            break
+        level = [case.to_json() for case in accessor.get_cases(list(case_ids))]
+        ancestors.update((doc['_id'], doc) for doc in level)
+    return ancestors
+
+
+def _get_ancestor_case_properties(doc_dict, ancestors=None):
+    """Returns the case properties of the cases ``doc_dict`` indexes, up to
+    ``DENORMALIZED_ANCESTOR_DEPTH`` levels up, keyed by their path from the case
+
+    e.g. ``{'key': 'parent/host/name', 'value': 'Mace'}``
+    """
+    domain = doc_dict['domain']
+    if ancestors is None:
+        ancestors = get_ancestor_cases(domain, [doc_dict])
+    properties = []
+    # (path, doc) of the cases at the current level
+    level = [('', doc_dict)]
+    for depth in range(DENORMALIZED_ANCESTOR_DEPTH):
+        referenced = [
+            (path + index['identifier'] + ANCESTOR_PATH_SEPARATOR, index['referenced_id'])
+            for path, doc in level
+            for index in doc.get('indices', [])
+            if index.get('referenced_id')
+        ]
+        level = []
+        for path, case_id in referenced:
+            ancestor = ancestors.get(case_id)
+            if (ancestor is None or ancestor.get('domain') != domain
+                    or ancestor.get('doc_type', '').endswith('-Deleted')):
+                continue
+            level.append((path, ancestor))
+            properties.extend(
+                {'key': path + prop['key'], VALUE: prop[VALUE]}
+                for prop in _get_case_properties(ancestor)
+            )
+        if not level:
+            break
+    return properties
+
+
+def get_descendant_case_ids(domain, case_ids, depth=DENORMALIZED_ANCESTOR_DEPTH):
+    """Returns the ids of the cases that index ``case_ids``, directly or
+    through up to ``depth`` levels of indices
+    """
+    accessor = CaseAccessors(domain)
+    seen = set(case_ids)
+    descendant_ids = []
+    level = list(case_ids)
+    for _ in range(depth):
+        level = list({
+            index.case_id for index in accessor.get_all_reverse_indices_info(level)
+            if index.case_id not in seen
+        })
+        if not level:
+            break
+        seen.update(level)
+        descendant_ids.extend(level)
+    return descendant_ids
+
+
+def reindex_cases_for_case_search(domain, case_ids):
+    """Reindexes ``case_ids`` in the case search index
+
+    :returns: the ids of the cases that failed to index
+    """
+    docs = [case.to_json() for case in CaseAccessors(domain).get_cases(case_ids)]
+    ancestors = get_ancestor_cases(domain, docs)
+    _, errors = ElasticsearchInterface(get_es_new()).bulk_ops([{
+        "_op_type": "index",
+        "_index": CASE_SEARCH_INDEX_INFO.index,
+        "_type": CASE_SEARCH_INDEX_INFO.type,
+        "_id": doc['_id'],
+        "_source": transform_case_for_elasticsearch(doc, ancestors),
+    } for doc in docs], raise_on_error=False, raise_on_exception=False)
+    return [case_id for case_id, error in get_errors_with_ids(errors)]
+
+
+class CaseSearchPillowProcessor(BulkElasticProcessor):
+
+    def __init__(self, elasticsearch, index_info, doc_prep_fn=None, doc_filter_fn=None,
+                 reindex_descendants=True):
+        super(CaseSearchPillowProcessor, self).__init__(elasticsearch, index_info, doc_prep_fn, doc_filter_fn)
+        # reindexers process every case anyway
+        self.reindex_descendants = reindex_descendants
+        # the ancestors of the cases in the chunk being processed, by domain
+        self._ancestors_by_domain = None
+        self._doc_prep_fn = self.doc_transform_fn
+        self.doc_transform_fn = self._transform
+
+    def _transform(self, doc):
+        if self._ancestors_by_domain is None:
+            return self._doc_prep_fn(doc)
+        return self._doc_prep_fn(doc, self._ancestors_by_domain.get(doc['domain'], {}))
 
     def process_change(self, change):
+        if self._needs_search_index(change):
+            super(CaseSearchPillowProcessor, self).process_change(change)
+            self._reindex_descendants([change])
+
+    def process_changes_chunk(self, changes_chunk):
+        changes_chunk = [change for change in changes_chunk if self._needs_search_index(change)]
+        self._ancestors_by_domain = self._get_ancestors_for_chunk(changes_chunk)
+        try:
+            retry_changes, error_changes = super(CaseSearchPillowProcessor, self).process_changes_chunk(
+                changes_chunk
+            )
+        finally:
+            self._ancestors_by_domain = None
+        failed_ids = {change.id for change in retry_changes} | {change.id for change, _ in error_changes}
+        self._reindex_descendants([change for change in changes_chunk if change.id not in failed_ids])
+        return retry_changes, error_changes
+
+    def _get_ancestors_for_chunk(self, changes):
+        """Loads the ancestors of all the cases in the chunk up front so that
+        transforming each case doesn't query for its own
+        """
+        changes = [
+            change for change in changes
+            if not change.deleted and CASE_SEARCH_DENORMALIZED_ANCESTORS.enabled(self._get_domain(change))
+        ]
+        # the documents are kept on the changes for the rest of the chunk
+        _, docs = bulk_fetch_changes_docs(changes)
+        docs_by_domain = defaultdict(list)
+        for doc in docs:
+            docs_by_domain[doc['domain']].append(doc)
+        return {
+            domain: get_ancestor_cases(domain, domain_docs)
+            for domain, domain_docs in docs_by_domain.items()
+        }
+
+    def _reindex_descendants(self, changes):
+        """Queue a reindex of the cases that have the properties of the
+        changed cases copied onto them (see ``_get_ancestor_case_properties``)
+        """
+        if not self.reindex_descendants:
+            return
+        from corehq.apps.case_search.tasks import reindex_case_search_descendants
+        case_ids_by_domain = defaultdict(set)
+        for change in changes:
+            domain = self._get_domain(change)
+            if CASE_SEARCH_DENORMALIZED_ANCESTORS.enabled(domain):
+                case_ids_by_domain[domain].add(change.id)
+
+        for domain, case_ids in case_ids_by_domain.items():
+            reindex_case_search_descendants.delay(domain, sorted(case_ids))
+
+    @staticmethod
+    def _get_domain(change):
         assert isinstance(change, Change)
         if change.metadata is not None:
             # Comes from KafkaChangeFeed (i.e. running pillowtop)
-            domain = change.metadata.domain
+            return change.metadata.domain
         else:
             # comes from ChangeProvider (i.e reindexing)
-            domain = change.get_document()['domain']
+            return change.get_document()['domain']
 
-        if domain and domain_needs_search_index(domain):
-            super(CaseSearchPillowProcessor, self).process_change(change)
+    @classmethod
+    def _needs_search_index(cls, change):
+        domain = cls._get_domain(change)
+        return domain and domain_needs_search_index(domain)
 
 
-def get_case_search_processor():
+def get_case_search_processor(reindex_descendants=True):
     return CaseSearchPillowProcessor(
         elasticsearch=get_es_new(),
         index_info=CASE_SEARCH_INDEX_INFO,
-        doc_prep_fn=transform_case_for_elasticsearch
+        doc_prep_fn=transform_case_for_elasticsearch,
+        reindex_descendants=reindex_descendants,
     )
 
 
@@ -153,6 +330,7 @@ class CaseSearchReindexerFactory(ReindexerFactory):
         enabled, or a single domain if passed in
         """
         limit_to_db = self.options.pop('limit_to_db', None)
+        concurrent = self.options.pop('concurrent', False)
         domain = self.options.pop('domain', None)
 
         limit_db_aliases = [limit_to_db] if limit_to_db else None
@@ -166,13 +344,15 @@ class CaseSearchReindexerFactory(ReindexerFactory):
                 # return changes for all enabled domains
                 domains = domains_needing_search_index()
 
-            change_provider = get_domain_case_change_provider(domains=domains, limit_db_aliases=limit_db_aliases)
+            change_provider = get_domain_case_change_provider(
+                domains=domains, limit_db_aliases=limit_db_aliases, concurrent=concurrent
+            )
         except ProgrammingError:
             # The db hasn't been intialized yet, so skip this reindex and complain.
             return _fail_gracefully_and_tell_admins()
         else:
             return PillowChangeProviderReindexer(
-                get_case_search_processor(),
+                get_case_search_processor(reindex_descendants=False),
                 change_provider=change_provider,
             )
 
@@ -224,6 +404,7 @@ class ResumableCaseSearchReindexerFactory(ReindexerFactory):
 
     def build(self):
         limit_to_db = self.options.pop('limit_to_db', None)
+        concurrent = self.options.pop('concurrent', False)
         domain = self.options.pop('domain')
         if not domain_needs_search_index(domain):
             raise CaseSearchNotEnabledException("{} does not have case search enabled".format(domain))
@@ -234,7 +415,7 @@ class ResumableCaseSearchReindexerFactory(ReindexerFactory):
         )
         limit_db_aliases = [limit_to_db] if limit_to_db else None
         accessor = CaseReindexAccessor(domain=domain, limit_db_aliases=limit_db_aliases)
-        doc_provider = SqlDocumentProvider(iteration_key, accessor)
+        doc_provider = SqlDocumentProvider(iteration_key, accessor, concurrent=concurrent)
         return ResumableBulkElasticPillowReindexer(
             doc_provider,
             elasticsearch=get_es_new(),
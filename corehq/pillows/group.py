@@ -6,7 +6,7 @@ from corehq.elastic import get_es_new
 from .mappings.group_mapping import GROUP_INDEX_INFO
 from pillowtop.checkpoints.manager import get_checkpoint_for_elasticsearch_pillow
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors import ElasticProcessor
+from pillowtop.processors import BulkElasticProcessor
 from pillowtop.reindexer.change_providers.couch import CouchViewChangeProvider
 from pillowtop.reindexer.reindexer import ElasticPillowReindexer, ReindexerFactory
 
@@ -15,7 +15,7 @@ def get_group_to_elasticsearch_processor():
     """
     This processor adds users from xform submissions that come in to the User Index if they don't exist in HQ
     """
-    return ElasticProcessor(
+    return BulkElasticProcessor(
         elasticsearch=get_es_new(),
         index_info=GROUP_INDEX_INFO,
     )
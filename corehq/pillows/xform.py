@@ -266,6 +266,7 @@ class SqlFormReindexerFactory(ReindexerFactory):
 
     def build(self):
         limit_to_db = self.options.pop('limit_to_db', None)
+        concurrent = self.options.pop('concurrent', False)
         domain = self.options.pop('domain', None)
 
         iteration_key = "SqlXFormToElasticsearchPillow_{}_reindexer_{}_{}".format(
@@ -274,7 +275,7 @@ class SqlFormReindexerFactory(ReindexerFactory):
         limit_db_aliases = [limit_to_db] if limit_to_db else None
 
         reindex_accessor = FormReindexAccessor(domain=domain, limit_db_aliases=limit_db_aliases)
-        doc_provider = SqlDocumentProvider(iteration_key, reindex_accessor)
+        doc_provider = SqlDocumentProvider(iteration_key, reindex_accessor, concurrent=concurrent)
         return ResumableBulkElasticPillowReindexer(
             doc_provider,
             elasticsearch=get_es_new(),
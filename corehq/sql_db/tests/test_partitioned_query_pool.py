@@ -0,0 +1,43 @@
+import threading
+
+from django.test import SimpleTestCase
+
+import mock
+
+from corehq.sql_db.util import PartitionedQueryPool
+
+
+def _query(db_alias, value):
+    return db_alias, value, threading.current_thread().ident
+
+
+class PartitionedQueryPoolTest(SimpleTestCase):
+
+    def test_single_database_runs_inline(self):
+        with PartitionedQueryPool(['db1']) as pool:
+            results = pool.map(_query, {'db1': (1,)})
+        self.assertEqual(results, {'db1': ('db1', 1, threading.current_thread().ident)})
+
+    @mock.patch('corehq.sql_db.util._close_connection')
+    def test_thread_per_database(self, close_connection):
+        with PartitionedQueryPool(['db1', 'db2']) as pool:
+            first = pool.map(_query, {'db1': (1,), 'db2': (2,)})
+            second = pool.map(_query, {'db1': (3,)})
+
+        self.assertEqual({db: value for db, (_, value, _) in first.items()}, {'db1': 1, 'db2': 2})
+        self.assertNotEqual(first['db1'][2], first['db2'][2])
+        # the same thread (and connection) is used for each query to a database
+        self.assertEqual(first['db1'][2], second['db1'][2])
+        self.assertEqual(
+            sorted(call[0][0] for call in close_connection.call_args_list),
+            ['db1', 'db2']
+        )
+
+    @mock.patch('corehq.sql_db.util._close_connection')
+    def test_errors_raised(self, close_connection):
+        def fail(db_alias):
+            raise ValueError(db_alias)
+
+        with PartitionedQueryPool(['db1', 'db2']) as pool:
+            with self.assertRaises(ValueError):
+                pool.map(fail, {'db1': (), 'db2': ()})
@@ -2,6 +2,7 @@ import random
 import re
 import uuid
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
 
 from django.conf import settings
@@ -167,6 +168,70 @@ def get_db_aliases_for_partitioned_query():
     return db_names
 
 
+class PartitionedQueryPool(object):
+    """Run queries on several partitioned databases concurrently
+
+    Each database gets its own worker thread so that the connection to
+    it is reused by every query sent to it while the pool is open.
+    Queries run in the calling thread when there is only one database.
+
+        with PartitionedQueryPool() as pool:
+            results_by_db = pool.map(query_fn, {db_alias: args, ...})
+    """
+
+    def __init__(self, db_aliases=None):
+        self.db_aliases = list(db_aliases or get_db_aliases_for_partitioned_query())
+        self._executors = {}
+
+    def __enter__(self):
+        if len(self.db_aliases) > 1:
+            self._executors = {
+                db_alias: ThreadPoolExecutor(max_workers=1)
+                for db_alias in self.db_aliases
+            }
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        executors, self._executors = self._executors, {}
+        for db_alias, executor in executors.items():
+            # connections are thread local so must be closed by the worker
+            executor.submit(_close_connection, db_alias)
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+
+    def map(self, query_fn, args_by_db):
+        """Call ``query_fn(db_alias, *args)`` for each database
+
+        :param args_by_db: dict of db alias -> tuple of args
+        :returns: dict of db alias -> result
+        """
+        if not self._executors:
+            return {db_alias: query_fn(db_alias, *args) for db_alias, args in args_by_db.items()}
+        futures = {
+            db_alias: self.submit(query_fn, db_alias, *args)
+            for db_alias, args in args_by_db.items()
+        }
+        return {db_alias: future.result() for db_alias, future in futures.items()}
+
+    def submit(self, query_fn, db_alias, *args):
+        """Schedule ``query_fn(db_alias, *args)`` on the database's worker thread
+
+        :returns: a ``Future``, which is already done when the pool runs queries inline
+        """
+        if self._executors:
+            return self._executors[db_alias].submit(query_fn, db_alias, *args)
+        future = Future()
+        try:
+            future.set_result(query_fn(db_alias, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _close_connection(db_alias):
+    connections[db_alias].close()
+
+
 def get_default_db_aliases():
     return [DEFAULT_DB_ALIAS]
 
@@ -545,6 +545,13 @@ DHIS2_INTEGRATION = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+DISPATCH_REPEAT_RECORDS_IN_CHUNKS = StaticToggle(
+    'dispatch_repeat_records_in_chunks',
+    'Send repeat records in chunks per repeater using pooled connections',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 GRAPH_CREATION = StaticToggle(
     'graph-creation',
     'Case list/detail graph creation',
@@ -619,6 +626,18 @@ UCR_SUM_WHEN_TEMPLATES = StaticToggle(
     help_link='https://commcare-hq.readthedocs.io/ucr.html#sumwhencolumn-and-sumwhentemplatecolumn',
 )
 
+COMPILE_UCR_EXPRESSIONS = StaticToggle(
+    'compile_ucr_expressions',
+    'Evaluate UCR data source filters and indicators using compiled python functions',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN],
+    description=(
+        "Compiles the expressions of every data source in the domain into flat python "
+        "functions when processing documents in the UCR pillow. Values should be the same "
+        "as without this toggle; it only makes processing documents faster."
+    ),
+)
+
 ASYNC_RESTORE = StaticToggle(
     'async_restore',
     'Generate restore response in an asynchronous task to prevent timeouts',
@@ -710,6 +729,16 @@ EXPLORE_CASE_DATA = StaticToggle(
     namespaces=[NAMESPACE_DOMAIN, NAMESPACE_USER],
 )
 
+CASE_SEARCH_DENORMALIZED_ANCESTORS = StaticToggle(
+    'case_search_denormalized_ancestors',
+    'Copy the case properties of parent and grandparent cases onto each case in '
+    "the case search index so that related case filters (e.g. parent/name = 'x') "
+    "are answered by a single query. Enabling this reindexes the project's cases.",
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    save_fn=_enable_search_index,
+)
+
 ECD_MIGRATED_DOMAINS = StaticToggle(
     'ecd_migrated_domains',
     'Domains that have undergone migration for Explore Case Data and have a '
@@ -735,6 +764,20 @@ LIVEQUERY_SYNC = StaticToggle(
     namespaces=[NAMESPACE_DOMAIN],
 )
 
+LIVEQUERY_CASE_XML_CACHE = StaticToggle(
+    'livequery_case_xml_cache',
+    'Reuse serialized case XML between livequery restores',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+LIVEQUERY_PARALLEL_SHARD_QUERIES = StaticToggle(
+    'livequery_parallel_shard_queries',
+    'Query each shard concurrently when traversing the case graph in livequery sync',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
 NO_VELLUM = StaticToggle(
     'no_vellum',
     'Allow disabling Form Builder per form '
@@ -1289,6 +1332,20 @@ PAGINATED_EXPORTS = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+INCREMENTAL_DAILY_SAVED_EXPORTS = StaticToggle(
+    'incremental_daily_saved_exports',
+    'Rebuild daily saved exports from the documents indexed since their last build',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+STREAMING_XLSX_EXPORTS = StaticToggle(
+    'streaming_xlsx_exports',
+    'Write Excel 2007 exports with the streaming XLSX writer instead of openpyxl',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 PUBLISH_CUSTOM_REPORTS = StaticToggle(
     'publish_custom_reports',
     "Publish custom reports (No needed Authorization)",
@@ -1651,6 +1708,48 @@ SKIP_ORM_FIXTURE_UPLOAD = StaticToggle(
     [NAMESPACE_DOMAIN]
 )
 
+CACHE_USER_ITEM_LISTS = StaticToggle(
+    'cache_user_item_lists',
+    'Cache the lookup tables owned by each user, group and location between restores',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+SKIP_UNCHANGED_ITEM_LISTS = StaticToggle(
+    'skip_unchanged_item_lists',
+    'Only send lookup tables that have changed since the last sync on incremental syncs',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+CACHE_LOCATION_FIXTURES = StaticToggle(
+    'cache_location_fixtures',
+    'Share location fixtures between users with the same locations',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+CASE_UPDATE_RULE_SQL_FILTERS = StaticToggle(
+    'case_update_rule_sql_filters',
+    'Only check cases that may match case update rule criteria in SQL',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+MESSAGING_RULE_CASE_CHUNKS = StaticToggle(
+    'messaging_rule_case_chunks',
+    'Run conditional alerts over chunks of cases instead of one task per case',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
+PARALLEL_APP_BUILD = StaticToggle(
+    'parallel_app_build',
+    'Generate app build files in a pool of processes',
+    TAG_INTERNAL,
+    [NAMESPACE_DOMAIN]
+)
+
 ENABLE_UCR_MIRRORS = StaticToggle(
     'enable_ucr_mirrors',
     'Enable the mirrored engines for UCRs in this domain',
@@ -1,6 +1,8 @@
 from corehq.util.doc_processor.interface import DocumentProvider
 from corehq.util.pagination import ResumableFunctionIterator, ArgsProvider
 
+CONCURRENT_ITERATION_KEY_SUFFIX = '_concurrent'
+
 
 class SqlModelArgsProvider(ArgsProvider):
     def __init__(self, db_list):
@@ -26,7 +28,49 @@ class SqlModelArgsProvider(ArgsProvider):
             return [next_db, None], {}
 
 
-def resumable_sql_model_iterator(iteration_key, reindex_accessor, chunk_size=100, event_handler=None):
+class ConcurrentSqlModelArgsProvider(ArgsProvider):
+    """Args provider that reads pages from all databases concurrently
+
+    The only arg is a dict of db alias -> primary key of the last row
+    yielded from that database (``None`` before the first row), so the
+    saved iteration state holds a checkpoint per database. Databases are
+    removed from the dict once they have been read completely.
+    """
+
+    def __init__(self, reindex_accessor, chunk_size):
+        self.reindex_accessor = reindex_accessor
+        self.chunk_size = chunk_size
+        self._pages = None
+        self._page_db = None
+
+    def get_initial_args(self):
+        return [dict.fromkeys(self.reindex_accessor.sql_db_aliases)], {}
+
+    def data_function(self, checkpoints):
+        from corehq.form_processor.backends.sql.dbaccessors import iter_pages_concurrently
+        if self._pages is None:
+            accessor = self.reindex_accessor
+            self._pages = iter_pages_concurrently(
+                checkpoints,
+                lambda db_alias, last_id: list(accessor.get_docs(db_alias, last_id, limit=self.chunk_size)),
+                lambda doc: getattr(doc, accessor.primary_key_field_name),
+            )
+        self._page_db, page = next(self._pages, (None, []))
+        return page
+
+    def get_next_args(self, result, checkpoints):
+        if self._page_db is None:
+            raise StopIteration
+        checkpoints = dict(checkpoints)
+        if result is None:
+            del checkpoints[self._page_db]
+        else:
+            checkpoints[self._page_db] = getattr(result, self.reindex_accessor.primary_key_field_name)
+        return [checkpoints], {}
+
+
+def resumable_sql_model_iterator(iteration_key, reindex_accessor, chunk_size=100, event_handler=None,
+                                 concurrent=False):
     """Perform one-time resumable iteration over documents
 
     Iteration can be efficiently stopped and resumed. The iteration may
@@ -42,16 +86,25 @@ def resumable_sql_model_iterator(iteration_key, reindex_accessor, chunk_size=100
     iteration checkpoint. In the worst case about this many documents
     that were previously yielded may be yielded again if the iteration
     is stopped and later resumed.
+    :param concurrent: Read from all databases at the same time, keeping
+    a checkpoint per database, rather than one database after another.
     """
     NULL = object()
 
-    def data_function(from_db, filter_value, last_id=NULL):
+    def sequential_data_function(from_db, filter_value, last_id=NULL):
         if last_id is NULL:
             # adapt to old iteration states
             last_id = filter_value
         return reindex_accessor.get_docs(from_db, last_id, limit=chunk_size)
 
-    args_provider = SqlModelArgsProvider(reindex_accessor.sql_db_aliases)
+    if concurrent:
+        # the iteration state is not compatible with that of a sequential iteration
+        iteration_key += CONCURRENT_ITERATION_KEY_SUFFIX
+        args_provider = ConcurrentSqlModelArgsProvider(reindex_accessor, chunk_size)
+        data_function = args_provider.data_function
+    else:
+        args_provider = SqlModelArgsProvider(reindex_accessor.sql_db_aliases)
+        data_function = sequential_data_function
 
     class ResumableModelIterator(ResumableFunctionIterator):
         def __iter__(self):
@@ -68,18 +121,21 @@ class SqlDocumentProvider(DocumentProvider):
 
     :param iteration_key: unique key to identify the document iterator
     :param reindex_accessor: A ``ReindexAccessor`` object
+    :param concurrent: Read from all databases at the same time
     """
-    def __init__(self, iteration_key, reindex_accessor):
+    def __init__(self, iteration_key, reindex_accessor, concurrent=False):
         """
         :type reindex_accessor: ReindexAccessor
         """
         self.iteration_key = iteration_key
         self.reindex_accessor = reindex_accessor
+        self.concurrent = concurrent
 
     def get_document_iterator(self, chunk_size, event_handler=None):
         return resumable_sql_model_iterator(
             self.iteration_key, self.reindex_accessor,
-            chunk_size=chunk_size, event_handler=event_handler
+            chunk_size=chunk_size, event_handler=event_handler,
+            concurrent=self.concurrent,
         )
 
     def get_total_document_count(self):
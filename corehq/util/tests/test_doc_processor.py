@@ -307,6 +307,52 @@ class CaseResumableSqlModelIteratorTest(BaseResumableSqlModelIteratorTest, TestC
         super(CaseResumableSqlModelIteratorTest, self).tearDown()
 
 
+@override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
+class ConcurrentCaseResumableSqlModelIteratorTest(CaseResumableSqlModelIteratorTest):
+
+    def get_iterator(self, deleted_doc_ids=None, chunk_size=2):
+        reindex_accessor = SimulateDeleteReindexAccessor(self.reindex_accessor, deleted_doc_ids)
+        return resumable_sql_model_iterator(self.iteration_key, reindex_accessor, chunk_size, concurrent=True)
+
+    def test_iteration(self):
+        self.assertEqual(sorted(doc["_id"] for doc in self.itr), sorted(self.all_doc_ids))
+
+    def test_resume_iteration(self):
+        itr = iter(self.itr)
+        yielded = [next(itr)["_id"] for i in range(6)]
+        # stop/resume iteration
+        self.itr = self.get_iterator()
+        resumed = [doc["_id"] for doc in self.itr]
+        # the last page read before stopping is read again
+        self.assertEqual(len(resumed), len(self.all_doc_ids) - 4)
+        self.assertEqual(set(yielded) | set(resumed), set(self.all_doc_ids))
+
+    def test_resume_iteration_with_v1_persistent_state(self):
+        # the state of sequential iterations is kept separately
+        itr = iter(self.get_iterator())
+        next(itr)
+        self.itr = self.get_iterator()
+        self.assertEqual(sorted(doc["_id"] for doc in self.itr), sorted(self.all_doc_ids))
+        resumable_sql_model_iterator(self.iteration_key, self.reindex_accessor).discard_state()
+
+    def test_resume_iteration_with_new_chunk_size(self):
+        itr = iter(self.itr)
+        yielded = [next(itr)["_id"] for i in range(6)]
+        # stop/resume iteration
+        self.itr = self.get_iterator(chunk_size=3)
+        resumed = [doc["_id"] for doc in self.itr]
+        self.assertEqual(len(resumed), len(self.all_doc_ids) - 4)
+        self.assertEqual(set(yielded) | set(resumed), set(self.all_doc_ids))
+
+    def test_iteration_with_retry(self):
+        itr = iter(self.itr)
+        doc = next(itr)
+        self.itr.retry(doc['_id'])
+        docs = [doc["_id"]] + [d["_id"] for d in itr]
+        self.assertEqual(sorted(docs[:-1]), sorted(self.all_doc_ids))
+        self.assertEqual(docs[-1], doc["_id"])
+
+
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
 class LedgerResumableSqlModelIteratorTest(BaseResumableSqlModelIteratorTest, TestCase):
     @property